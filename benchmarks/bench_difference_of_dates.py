@@ -0,0 +1,70 @@
+"""
+Times filling demand's gaps from generation's publish times with the
+original nested loop against the anti-join in
+Transform.difference_of_dates, as the window grows, and checks both add
+the same placeholder rows.
+
+Usage:
+    python -m benchmarks.bench_difference_of_dates
+"""
+import argparse
+import time
+from itertools import chain
+
+import pandas as pd
+
+from pipeline.transform import Transform
+from benchmarks.bench_transform_memory import make_frame
+
+VOLUMES = {"day": 1, "week": 7, "month": 31}
+
+
+def nested_loop(transform: Transform, data: dict) -> dict:
+    """
+    difference_of_dates as it was, scanning generation per missing time.
+    """
+    time_g = transform.time_g.to_pylist()
+    time_d = transform.time_d.to_pylist()
+    diff = list(set(time_g) - set(time_d))
+    for time_ in diff:
+        for values in data['generation']:
+            if values[0] == time_:
+                data['demand'].append((values[0], 0))
+                break
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--missing", type=float, default=0.5,
+                        help="share of publish times demand is missing")
+    args = parser.parse_args()
+
+    for name, days in VOLUMES.items():
+        transform = Transform()
+        generation_df = make_frame(days)
+        generation = list(chain.from_iterable(transform.generation_transform(generation_df)))
+        times = generation_df["publishTime"].unique()
+        kept = times[int(len(times) * args.missing):]
+        demand = list(chain.from_iterable(
+            transform.demand_transform(pd.DataFrame({"startTime": kept, "demand": 1}))))
+
+        timings = {}
+        results = {}
+        for method, run in {"nested loop": lambda: nested_loop(
+                                transform, {"generation": generation, "demand": list(demand)}),
+                            "anti-join": lambda: transform.difference_of_dates(
+                                {"generation": [generation], "demand": [demand]})}.items():
+            started = time.perf_counter()
+            results[method] = run()
+            timings[method] = time.perf_counter() - started
+
+        anti_join = list(chain.from_iterable(results["anti-join"]["demand"]
+                                             + results["anti-join"].get("demand_gaps", [])))
+        assert sorted(results["nested loop"]["demand"]) == sorted(anti_join)
+        print(f"{name:>6} ({len(generation):>6} rows, {len(times) - len(kept):>5} missing): "
+              + ", ".join(f"{method} {seconds:.3f}s" for method, seconds in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compares the sequential, threaded and asyncio extraction paths.
+
+Serves FUELINST-shaped payloads from a local HTTP server that waits
+`--latency` seconds before each response, so the numbers show how each
+path copes with network waits rather than with the real APIs.
+
+Usage:
+    python -m benchmarks.bench_extract_engines --windows 60 --latency 0.1
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pipeline.async_extract import AsyncExtractor, Job
+from pipeline.extract_generation import APIClient
+from pipeline.sessions import HTTPSession
+from pipeline.windows import split_range
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_payload(rows: int) -> bytes:
+    """
+    Builds a FUELINST-like response body with `rows` records.
+    """
+    return json.dumps({"data": [{
+        "dataset": "FUELINST",
+        "publishTime": "2024-01-01T00:00:00Z",
+        "startTime": "2024-01-01T00:00:00Z",
+        "settlementDate": "2024-01-01",
+        "settlementPeriod": 1,
+        "fuelType": "WIND",
+        "generation": 1000 + i,
+    } for i in range(rows)]}).encode()
+
+
+def serve(latency: float, payload: bytes) -> ThreadingHTTPServer:
+    """
+    Starts a local server that answers every GET after `latency` seconds.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--windows", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    server = serve(args.latency, make_payload(args.rows))
+    url = f"http://127.0.0.1:{server.server_port}/FUELINST"
+    windows = split_range(START, START + timedelta(hours=args.windows), timedelta(hours=1))
+    api_client = APIClient(base_url=url,
+                           session=HTTPSession(pool_size=args.workers))
+
+    timings = {}
+
+    started = time.perf_counter()
+    sequential = [api_client.fetch_window(start, end) for start, end in windows]
+    timings["sequential"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    threaded = list(api_client.fetch_range(windows[0][0], windows[-1][1],
+                                           timedelta(hours=1), args.workers))
+    timings["threaded"] = time.perf_counter() - started
+
+    jobs = [Job("generation", url, params=api_client.construct_range_params(start, end))
+            for start, end in windows]
+    started = time.perf_counter()
+    asynchronous = AsyncExtractor(max_concurrency=args.workers).run(jobs)
+    timings["asyncio"] = time.perf_counter() - started
+
+    assert len(sequential) == len(threaded) == len(asynchronous) == len(windows)
+    assert all(data == sequential[0] for _, data in asynchronous)
+
+    print(f"{len(windows)} requests, {args.latency}s latency, "
+          f"{args.rows} rows each, {args.workers} workers")
+    for name, seconds in timings.items():
+        print(f"{name:>10}: {seconds:7.3f}s  "
+              f"({timings['sequential'] / seconds:5.1f}x sequential)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares the row-by-row `.apply(lambda ...)` flattening the carbon and
+piechart extracts used to do with the vectorized `flatten_records`, at
+day, month and year payload sizes of half-hourly intervals.
+
+Usage:
+    python -m benchmarks.bench_flatten
+"""
+import argparse
+import time
+from typing import Callable
+
+import pandas as pd
+
+from pipeline import extract_carbon, extract_piechart
+from pipeline.flatten import flatten_records
+
+INTERVALS_PER_DAY = 48
+SIZES = {"day": 1, "month": 30, "year": 365}
+FUELS = ["biomass", "coal", "imports", "gas", "nuclear", "other", "hydro", "solar", "wind"]
+LEVELS = ["very low", "low", "moderate", "high", "very high"]
+
+
+def carbon_records(intervals: int) -> list:
+    return [{"from": f"2024-01-01T{i % 24:02}:00Z", "to": f"2024-01-01T{i % 24:02}:30Z",
+             "intensity": {"forecast": i % 400, "actual": i % 390,
+                           "index": LEVELS[i % len(LEVELS)]}}
+            for i in range(intervals)]
+
+
+def piechart_records(intervals: int) -> list:
+    return [{"from": f"2024-01-01T{i % 24:02}:00Z", "to": f"2024-01-01T{i % 24:02}:30Z",
+             "generationmix": [{"fuel": fuel, "perc": (i + j) % 100 / 3}
+                               for j, fuel in enumerate(FUELS)]}
+            for i in range(intervals)]
+
+
+def carbon_apply(records: list) -> pd.DataFrame:
+    df = pd.DataFrame(records)
+    df['forecast'] = df['intensity'].apply(lambda x: x['forecast'])
+    df['carbon level'] = df['intensity'].apply(lambda x: x['index'])
+    return df[['from', 'to', 'forecast', 'carbon level']]
+
+
+def piechart_apply(records: list) -> pd.DataFrame:
+    df = pd.DataFrame(records).explode('generationmix', ignore_index=True)
+    df["fuel_type"] = df['generationmix'].apply(lambda x: x['fuel'])
+    df["percentage"] = df['generationmix'].apply(lambda x: x['perc'])
+    return df[['from', 'to', 'fuel_type', 'percentage']]
+
+
+def best_of(repeats: int, function: Callable, records: list) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function(records)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = [
+        ("carbon", carbon_records, carbon_apply,
+         lambda records: flatten_records(records, extract_carbon.COLUMNS,
+                                         types=extract_carbon.TYPES)),
+        ("piechart", piechart_records, piechart_apply,
+         lambda records: flatten_records(records, extract_piechart.COLUMNS,
+                                         explode="generationmix",
+                                         types=extract_piechart.TYPES)),
+    ]
+    for source, make_records, apply, vectorized in cases:
+        for size, days in SIZES.items():
+            records = make_records(days * INTERVALS_PER_DAY)
+            before = best_of(args.repeats, apply, records)
+            after = best_of(args.repeats, vectorized, records)
+            print(f"{source:>9} {size:>6}: apply {before * 1000:8.2f} ms, "
+                  f"vectorized {after * 1000:8.2f} ms ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
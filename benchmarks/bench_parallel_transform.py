@@ -0,0 +1,77 @@
+"""
+Times Transform.get_data on a window of partition files for all four
+datasets, transformed one after another in this process against each
+dataset in a worker process of its own, and prints each dataset's time.
+
+Usage:
+    python -m benchmarks.bench_parallel_transform --days 31
+"""
+import argparse
+import os
+import tempfile
+import time
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from pipeline.transform import Transform, available_cores
+from benchmarks.bench_streaming_decode import FUEL_TYPES
+from benchmarks.bench_transform_memory import make_frame
+
+
+def make_frames(days: int) -> dict:
+    """
+    Builds a window of each dataset, generation five-minutely per fuel type
+    and the others half-hourly.
+    """
+    generation = make_frame(days)
+    times = pd.Series(generation["publishTime"].unique())
+    half_hours = times[::6].reset_index(drop=True)
+    return {
+        "generation": generation,
+        "demand": pd.DataFrame({"startTime": times,
+                                "demand": np.arange(len(times)) % 40000}),
+        "carbon": pd.DataFrame({"from": half_hours,
+                                "forecast": np.arange(len(half_hours)) % 300}),
+        "piechart": pd.DataFrame({
+            "fuel_type": np.tile(FUEL_TYPES, len(half_hours)),
+            "from": np.repeat(half_hours, len(FUEL_TYPES)),
+            "percentage": np.tile(np.linspace(0, 20, len(FUEL_TYPES)), len(half_hours))}),
+    }
+
+
+def write_partitions(directory: str, frames: dict, days: int) -> list:
+    """
+    Writes each dataset as a file per day, named as synced partitions are.
+    """
+    files = []
+    for dataset, df in frames.items():
+        for day, part in enumerate(np.array_split(df, days)):
+            path = os.path.join(directory, f"dataset={dataset}_date=day{day}_hour=00_run.feather")
+            part.reset_index(drop=True).to_feather(path)
+            files.append(path)
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=31)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = write_partitions(directory, make_frames(args.days), args.days)
+        print(f"{len(files)} files over {args.days} days, {available_cores()} cores")
+        for workers in (1, 4):
+            transform = Transform(max_workers=workers)
+            started = time.perf_counter()
+            data = transform.get_data(files=files)
+            rows = sum(len(batch) for batch in chain.from_iterable(data.values()))
+            seconds = time.perf_counter() - started
+            per_dataset = ", ".join(f"{dataset} {took:.2f}s"
+                                    for dataset, took in transform.timings.items())
+            print(f"{workers} worker(s): {rows} rows in {seconds:.2f}s ({per_dataset})")
+
+
+if __name__ == "__main__":
+    main()
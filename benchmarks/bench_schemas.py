@@ -0,0 +1,34 @@
+"""
+Reports how much memory each dataset's frame takes as decoded (strings
+and int64) against typed with its declared schema, and how long typing
+it takes.
+
+Usage:
+    python -m benchmarks.bench_schemas --days 31
+"""
+import argparse
+import time
+
+from pipeline.schemas import apply_schema, memory_report
+from benchmarks.bench_parallel_transform import make_frames
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=31)
+    args = parser.parse_args()
+
+    for dataset, df in make_frames(args.days).items():
+        # As a response decodes it, before the schema is applied
+        df = df.astype({column: "int64" for column in df.select_dtypes("integer")})
+        started = time.perf_counter()
+        typed = apply_schema(df, dataset)
+        seconds = time.perf_counter() - started
+        report = memory_report(df, typed)
+        print(f"{dataset:>10} ({len(df):>7} rows): {report['before'] / 1024 ** 2:6.1f} MB -> "
+              f"{report['after'] / 1024 ** 2:5.1f} MB ({100 * report['saved']:.0f}% smaller), "
+              f"typed in {seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
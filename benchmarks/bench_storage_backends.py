@@ -0,0 +1,96 @@
+"""
+Runs the extract -> storage -> transform path end to end without AWS,
+against the in-memory and local-filesystem storage backends, timing the
+upload, the sync and the read and transform separately.
+
+Usage:
+    python -m benchmarks.bench_storage_backends --hours 720
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from pipeline.common import DataProcessor
+from pipeline.manifest import SyncManifest
+from pipeline.storage import LocalStorage, MemoryStorage
+from pipeline.transform import Transform
+from benchmarks.bench_streaming_decode import FUEL_TYPES
+from benchmarks.bench_upload import NullLogger
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_frames(hours: int) -> dict:
+    """
+    Builds five-minutely generation (one row per fuel type) and demand.
+    """
+    times = pd.date_range(START, periods=hours * 12, freq="5min").strftime("%Y-%m-%dT%H:%M:%SZ")
+    fuels = len(FUEL_TYPES)
+    generation = pd.DataFrame({
+        "startTime": np.repeat(times, fuels),
+        "publishTime": np.repeat(times, fuels),
+        "fuelType": np.tile(FUEL_TYPES, len(times)),
+        "settlementPeriod": np.repeat(np.arange(len(times)) // 6 % 48 + 1, fuels),
+        "generation": np.arange(len(times) * fuels) % 5000 - 100,
+    })
+    demand = pd.DataFrame({"startTime": times, "demand": np.arange(len(times)) % 40000})
+    return {"generation": generation, "demand": demand}
+
+
+def run(storage, frames: dict, hours: int, directory: str) -> dict:
+    """
+    Uploads the frames as hourly partitions, syncs them back down and
+    transforms them, timing each step.
+    """
+    timings = {}
+    started = time.perf_counter()
+    for dataset, df in frames.items():
+        processor = DataProcessor("unused.feather", None, None, None, "", "benchmark",
+                                  NullLogger(), keep_local_copy=False, dataset=dataset,
+                                  time_column="startTime", storage=storage)
+        processor.save_data_locally(df)
+        processor.save_data_to_s3()
+    timings["upload"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    files = processor.get_files_from_bucket(
+        directory=directory, datasets=list(frames), start=START,
+        end=START + timedelta(hours=hours),
+        manifest=SyncManifest(NullLogger(), os.path.join(directory, "manifest.json")))
+    timings["sync"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    Transform().get_data(files=files)
+    timings["transform"] = time.perf_counter() - started
+    for file in files:
+        os.remove(file)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hours", type=int, default=168)
+    args = parser.parse_args()
+
+    frames = make_frames(args.hours)
+    rows = sum(len(df) for df in frames.values())
+    print(f"{rows} rows over {args.hours} hourly partitions per dataset")
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {"memory": MemoryStorage(),
+                    "local": LocalStorage(os.path.join(directory, "bucket"))}
+        for name, storage in backends.items():
+            sync_directory = os.path.join(directory, f"sync-{name}")
+            os.makedirs(sync_directory)
+            timings = run(storage, frames, args.hours, sync_directory)
+            print(f"{name:>8}: " + ", ".join(f"{step} {seconds:.3f}s"
+                                             for step, seconds in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
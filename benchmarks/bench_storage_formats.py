@@ -0,0 +1,77 @@
+"""
+Compares feather and parquet for a month of FUELINST-shaped generation
+data: file size, a full read, and a read filtered to one day of one
+fuel type.
+
+Usage:
+    python -m benchmarks.bench_storage_formats
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from pipeline.formats import read_frame, write_frame
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+FUEL_TYPES = ["BIOMASS", "CCGT", "COAL", "INTELEC", "INTEW", "INTFR", "INTIFA2",
+              "INTIRL", "INTNED", "INTNEM", "INTNSL", "INTVKL", "NPSHYD", "NUCLEAR",
+              "OCGT", "OIL", "OTHER", "PS", "WIND", "INTGRNL"]
+
+
+def month_of_fuelinst(days: int) -> pd.DataFrame:
+    """
+    Builds `days` of 5-minute readings for every fuel type.
+    """
+    times = pd.date_range(START, periods=days * 288, freq="5min")
+    rows = len(times) * len(FUEL_TYPES)
+    start_times = np.repeat(times.strftime("%Y-%m-%dT%H:%M:%SZ"), len(FUEL_TYPES))
+    return pd.DataFrame({
+        "dataset": "FUELINST",
+        "publishTime": start_times,
+        "startTime": start_times,
+        "settlementDate": np.repeat(times.strftime("%Y-%m-%d"), len(FUEL_TYPES)),
+        "settlementPeriod": np.repeat(times.hour * 2 + times.minute // 30 + 1, len(FUEL_TYPES)),
+        "fuelType": np.tile(FUEL_TYPES, len(times)),
+        "generation": np.random.default_rng(0).integers(0, 15000, rows),
+    })
+
+
+def best_of(repeats: int, function) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    df = month_of_fuelinst(args.days)
+    day_start = START + timedelta(days=args.days // 2)
+    print(f"{len(df)} rows over {args.days} days")
+
+    for storage_format in ("feather", "parquet"):
+        sink = pa.BufferOutputStream()
+        write_seconds = best_of(1, lambda: write_frame(df, sink, storage_format, "startTime"))
+        buffer = sink.getvalue()
+
+        full = best_of(args.repeats, lambda: read_frame(buffer, storage_format))
+        filtered = best_of(args.repeats, lambda: read_frame(
+            buffer, storage_format, time_column="startTime", start=day_start,
+            end=day_start + timedelta(days=1), fuel_types=["WIND"]))
+        print(f"{storage_format:>8}: {buffer.size / 1024 ** 2:6.2f} MB, "
+              f"write {write_seconds * 1000:6.1f} ms, full read {full * 1000:6.1f} ms, "
+              f"one day of WIND {filtered * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compares decoding a FUELINST-shaped payload whole (`json.loads` then
+`pd.DataFrame`) with streaming it into column buffers.
+
+Each mode runs in its own subprocess so peak RSS is measured separately.
+
+Usage:
+    python -m benchmarks.bench_streaming_decode --rows 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from pipeline.extract_generation import COLUMN_TYPES
+from pipeline.streaming import decode_data_frame
+
+CHUNK_SIZE = 64 * 1024
+FUEL_TYPES = ["WIND", "CCGT", "NUCLEAR", "BIOMASS", "COAL", "SOLAR"]
+
+
+def write_payload(path: str, rows: int) -> None:
+    """
+    Writes a FUELINST-like response body with `rows` records to `path`.
+    """
+    with open(path, "w") as file_data:
+        file_data.write('{"data": [')
+        for i in range(rows):
+            if i:
+                file_data.write(",")
+            json.dump({"dataset": "FUELINST",
+                       "publishTime": "2024-01-01T00:00:00Z",
+                       "startTime": "2024-01-01T00:00:00Z",
+                       "settlementDate": "2024-01-01",
+                       "settlementPeriod": i % 48 + 1,
+                       "fuelType": FUEL_TYPES[i % len(FUEL_TYPES)],
+                       "generation": 1000 + i}, file_data)
+        file_data.write("]}")
+
+
+def read_chunks(path: str):
+    """
+    Yields the file in response-sized chunks, like `iter_content`.
+    """
+    with open(path, "rb") as file_data:
+        while chunk := file_data.read(CHUNK_SIZE):
+            yield chunk
+
+
+def decode(mode: str, path: str) -> None:
+    """
+    Decodes the payload with one mode and prints its timing and peak RSS.
+    """
+    started = time.perf_counter()
+    if mode == "whole":
+        df = pd.DataFrame(json.loads(b"".join(read_chunks(path)))["data"])
+    else:
+        df = decode_data_frame(read_chunks(path), COLUMN_TYPES)
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"mode": mode, "rows": len(df),
+                      "seconds": elapsed, "peak_rss_mb": peak}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--mode", choices=["whole", "streaming"])
+    parser.add_argument("--path")
+    args = parser.parse_args()
+
+    if args.mode:
+        decode(args.mode, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "payload.json")
+        write_payload(path, args.rows)
+        size = os.path.getsize(path) / 1024 ** 2
+        print(f"{args.rows} rows, {size:.1f} MB payload")
+
+        for mode in ("whole", "streaming"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_streaming_decode",
+                 "--mode", mode, "--path", path],
+                check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(f"{mode:>10}: {result['seconds']:.2f} seconds, "
+                  f"peak RSS {result['peak_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
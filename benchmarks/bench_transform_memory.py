@@ -0,0 +1,113 @@
+"""
+Compares the transform's peak memory (RSS) on generation data read with
+`pd.read_feather` and transformed in pandas (the old path) against data
+read memory-mapped and transformed on Arrow tables, both holding every
+row at once, and against the Arrow path's rows taken a batch at a time,
+as Load takes them.
+
+Each path runs in a fresh process, and the growth in peak RSS over what
+the process had after its imports is reported.
+
+Usage:
+    python -m benchmarks.bench_transform_memory --days 31
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_streaming_decode import FUEL_TYPES
+
+
+def make_frame(days: int) -> pd.DataFrame:
+    """
+    Builds five-minutely FUELINST-style generation, a row per fuel type.
+    """
+    times = pd.date_range("2024-01-01", periods=days * 288, freq="5min").strftime(
+        "%Y-%m-%dT%H:%M:%SZ")
+    fuels = len(FUEL_TYPES)
+    rows = len(times) * fuels
+    return pd.DataFrame({
+        "dataset": ["FUELINST"] * rows,
+        "publishTime": np.repeat(times, fuels),
+        "startTime": np.repeat(times, fuels),
+        "settlementDate": np.repeat(times.str[:10], fuels),
+        "settlementPeriod": np.repeat(np.arange(len(times)) // 6 % 48 + 1, fuels),
+        "fuelType": np.tile(FUEL_TYPES, len(times)),
+        "generation": np.arange(rows) % 5000 - 100,
+    })
+
+
+def pandas_transform(path: str) -> list:
+    df = pd.read_feather(path)
+    df['publish_date'] = df['publishTime'].apply(lambda x: x.split('T')[0])
+    df['gain_loss'] = df['generation'].apply(lambda x: '+' if x > 0 else '-')
+    df = df.get(['publishTime', 'publish_date', 'fuelType', 'gain_loss',
+                 'generation', 'settlementPeriod'])
+    return list(df.itertuples(index=False, name=None))
+
+
+def arrow_transform(path: str) -> list:
+    from pipeline.formats import read_table
+    from pipeline.transform import Transform
+
+    return list(chain.from_iterable(
+        Transform().generation_transform(read_table(path, memory_map=True))))
+
+
+def batched_transform(path: str) -> range:
+    from pipeline.formats import read_table
+    from pipeline.transform import Transform
+
+    rows = 0
+    for batch in Transform().generation_transform(read_table(path, memory_map=True)):
+        rows += len(batch)
+    return range(rows)
+
+
+def measure(name: str, path: str, queue: multiprocessing.Queue) -> None:
+    """
+    Runs one path in this (child) process and reports its peak RSS growth.
+    """
+    # Imported before the baseline, so only the data is counted
+    import pipeline.transform  # noqa: F401
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    rows = {"pandas": pandas_transform, "arrow": arrow_transform,
+            "batched": batched_transform}[name](path)
+    seconds = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((len(rows), (peak - baseline) / 1024, seconds))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=31)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "generation.feather")
+        df = make_frame(args.days)
+        df.to_feather(path)
+        print(f"{len(df)} rows, {os.path.getsize(path) / 1024 ** 2:.1f} MB on disk")
+        del df
+
+        for name in ("pandas", "arrow", "batched"):
+            queue = context.Queue()
+            process = context.Process(target=measure, args=(name, path, queue))
+            process.start()
+            rows, growth, seconds = queue.get()
+            process.join()
+            print(f"{name:>7}: {rows} rows, peak RSS +{growth:.0f} MB, {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compares writing Feather to disk and uploading the file (the old path)
+with serializing to an in-memory Arrow buffer and uploading that.
+
+Uploads go to a local stand-in for S3 that accepts and discards PUTs, so
+the numbers show serialization and disk costs rather than the network.
+
+Usage:
+    python -m benchmarks.bench_upload --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+import numpy as np
+import pandas as pd
+
+from pipeline.common import DataProcessor
+from benchmarks.bench_streaming_decode import FUEL_TYPES
+
+
+class NullLogger:
+    def info(self, *args, **kwargs):
+        pass
+
+    error = debug = warning = info
+
+
+def serve() -> ThreadingHTTPServer:
+    """
+    Starts a local server that reads and drops every PUT body.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_PUT(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(200)
+            self.send_header("ETag", '"0"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "startTime": pd.date_range("2024-01-01", periods=rows, freq="5min").astype(str),
+        "fuelType": np.array(FUEL_TYPES)[np.arange(rows) % len(FUEL_TYPES)],
+        "settlementPeriod": np.arange(rows) % 48 + 1,
+        "generation": np.arange(rows),
+    })
+
+
+def file_path(processor: DataProcessor, df: pd.DataFrame) -> dict:
+    started = time.perf_counter()
+    df.to_feather(processor.save_location)
+    serialized = time.perf_counter()
+    processor.save_data_to_s3()
+    return {"serialize": serialized - started, "upload": time.perf_counter() - serialized}
+
+
+def memory_path(processor: DataProcessor, df: pd.DataFrame) -> dict:
+    started = time.perf_counter()
+    processor.save_data_locally(df)
+    serialized = time.perf_counter()
+    processor.save_data_to_s3()
+    return {"serialize": serialized - started, "upload": time.perf_counter() - serialized}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    server = serve()
+    s3_client = boto3.client("s3", endpoint_url=f"http://127.0.0.1:{server.server_port}",
+                             aws_access_key_id="benchmark", aws_secret_access_key="benchmark",
+                             region_name="eu-west-2")
+    df = make_frame(args.rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        modes = {
+            "file": (file_path, True),
+            "memory + local copy": (memory_path, True),
+            "memory only": (memory_path, False),
+        }
+        for name, (run, keep_local_copy) in modes.items():
+            best = None
+            for _ in range(args.repeats):
+                processor = DataProcessor(os.path.join(directory, "data.feather"),
+                                          "benchmark", "benchmark", "eu-west-2",
+                                          "data.feather", "benchmark", NullLogger(),
+                                          keep_local_copy=keep_local_copy)
+                processor.s3_client = s3_client
+                timings = run(processor, df)
+                if best is None or sum(timings.values()) < sum(best.values()):
+                    best = timings
+            print(f"{name:>20}: serialize {best['serialize']:.3f}s, "
+                  f"upload {best['upload']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,7 @@ class Constants:
     RAW_DEMAND_DATA_PATH = DATA + RAW_DEMAND_DATA_NAME
     RAW_PRICE_DATA_PATH = DATA + RAW_PRICE_DATA_NAME
     RAW_CARBON_DATA_PATH = DATA + RAW_CARBON_DATA_NAME
+    RAW_PIECHART_DATA_PATH = DATA + RAW_PIECHART_DATA_NAME
 
     # Endpoints
     GENERATION_ENDPOINT = "https://data.elexon.co.uk/bmrs/api/v1/datasets/FUELINST"
@@ -34,5 +35,88 @@ class Constants:
     # S3 Data
     S3_BUCKET = "c12-energy-tracker"
 
+    # Extraction
+    EXTRACT_MAX_WORKERS = 4
+    EXTRACT_WINDOW_HOURS = 12
+    DEFAULT_EXTRACT_MODE = "incremental"  # or "full"
+
+    # Backfills of historical ranges
+    BACKFILL_WINDOW_HOURS = 24
+    BACKFILL_MAX_WORKERS = 4
+    ASYNC_MAX_CONCURRENCY = 8
+
+    # Watermarks for incremental extraction
+    WATERMARK_DIR = DATA + "watermarks/"
+    WATERMARK_PREFIX = "watermarks/"
+    WATERMARK_OVERLAP_MINUTES = 30
+    DEFAULT_WATERMARK_STORE = "s3"  # the storage backend, which outlives a Lambda; or "local"
+
+    # HTTP
+    HTTP_TIMEOUT = (5, 30)  # (connect, read) seconds
+    HTTP_RETRIES = 3
+    HTTP_BACKOFF_FACTOR = 0.5
+    HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+    HTTP_POOL_SIZE = 10
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    # On-disk HTTP response cache, TTLs in seconds per endpoint
+    CACHE_DIR = "tmp/cache/"
+    CACHE_TTLS = {
+        CARBON_ENDPOINT: 30 * 60,
+        PIECHART_ENDPOINT: 5 * 60,
+    }
+    CACHE_DEFAULT_TTL = 0  # always revalidate
+
+    # Hashes of each source's last upload, to skip uploading unchanged data
+    CONTENT_HASH_DIR = DATA + "content_hashes/"
+    CONTENT_HASH_PREFIX = "content_hashes/"  # where they are kept in the storage backend
+
+    # Incremental syncs of the bucket for the transform
+    SYNC_DIR = DATA + "sync/"
+    SYNC_MANIFEST = SYNC_DIR + "manifest.json"
+    SYNC_MANIFEST_KEY = "manifests/sync.json"  # where it is kept in the storage backend
+
+    # Diagnostics
+    DIAGNOSTICS_DIR = "tmp/diagnostics/"
+    DIAGNOSTICS_SAMPLE_SIZE = 100  # records kept in a payload dump
+
+    # S3 transfers
+    TRANSFER_MAX_WORKERS = 8  # objects transferred at once
+    TRANSFER_MULTIPART_THRESHOLD = 8 * 1024 * 1024  # bytes
+    TRANSFER_CHUNK_SIZE = 8 * 1024 * 1024  # bytes per multipart part
+    TRANSFER_MAX_CONCURRENCY = 4  # parts of one object transferred at once
+    TRANSFER_PROGRESS_STEP = 25  # percent between progress logs
+
+    # Partitioned raw data
+    RAW_DATASETS = ("generation", "demand", "carbon", "piechart")
+    TRANSFORM_LOOKBACK_HOURS = 12  # hours of partitions each transform run reads
+    # Datasets extracted ahead of time, read up to the end of the next day
+    FORECAST_DATASETS = ("carbon",)
+    DEFAULT_STORAGE_FORMAT = "feather"  # or "parquet"
+    DEFAULT_STORAGE_BACKEND = "s3"  # or "local" or "memory"
+    LOCAL_STORAGE_DIR = DATA + "buckets/"
+    COMPACTED_FILE_NAME = "compacted"  # one per dataset per day, beside the hours
+    # Columns identifying a row, the latest run's copy being kept on compaction
+    COMPACTION_KEYS = {
+        "generation": ("publishTime", "fuelType"),
+        "demand": ("startTime",),
+        "carbon": ("from",),
+        "piechart": ("from", "fuel_type"),
+    }
+    # Column each dataset's rows are partitioned (and read back) by
+    PARTITION_TIME_COLUMNS = {
+        "generation": "startTime",
+        "demand": "startTime",
+        "carbon": "from",
+        "piechart": "from",
+    }
+    COMPACTION_DAYS = 7  # complete days each compaction run looks back over
+    # Most datasets transformed at once, each in a process, which only
+    # applies with more than one core; the deployed task has one
+    TRANSFORM_MAX_WORKERS = 1
+    LOAD_BATCH_SIZE = 10000  # rows handed from the transform to each INSERT
+    PARQUET_COMPRESSION = "zstd"
+    PARQUET_ROW_GROUP_ROWS = 16384
+
     def __setattr__(self, name: str, value: Any) -> None:
         raise AttributeError(f"Can't Reassign Constant {name}")
\ No newline at end of file
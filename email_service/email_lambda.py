@@ -15,6 +15,8 @@ from psycopg2 import connect
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
+from pipeline import clients
+from pipeline.sessions import HTTPSession, get_session
 import config as cg
 from constants import Constants as ct
 
@@ -35,11 +37,13 @@ class APIClient:
     """
 
     def __init__(self,
-                 logger: logging.Logger = global_logger) -> None:
+                 logger: logging.Logger = global_logger,
+                 session: Optional[HTTPSession] = None) -> None:
         """
         Initialise class variables.
         """
         self.logger = logger
+        self.session = session or get_session()
 
     def fetch_regional_data(self, postcode: str) -> Optional[Dict[str, Any]]:
         """
@@ -50,7 +54,7 @@ class APIClient:
         base_url = ENDPOINT_1 + str(now) + ENDPOINT_2 + postcode.split(' ')[0]
 
         try:
-            response = requests.get(base_url, headers=headers, timeout=20)
+            response = self.session.get(base_url, headers=headers)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -146,14 +150,13 @@ class SendEmail:
 
     def get_client(self) -> boto3.client:
         """
-        gets the client
+        gets the client, shared by every email sent from this process
         """
 
-        return boto3.client('ses',
-                            aws_access_key_id=os.environ.get("AWS_ACCESS_KEY"),
-                            aws_secret_access_key=os.environ.get(
-                                "AWS_SECRET_KEY"),
-                            region_name=os.environ.get("AWS_REGION"))
+        return clients.get_client('ses',
+                                  os.environ.get("AWS_REGION"),
+                                  os.environ.get("AWS_ACCESS_KEY"),
+                                  os.environ.get("AWS_SECRET_KEY"))
 
     def send_email(self, data: list) -> None:
         """
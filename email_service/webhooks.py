@@ -16,6 +16,7 @@ from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
 from pipeline.common import DataProcessor
+from pipeline.sessions import HTTPSession, get_session
 import config as cg
 from constants import Constants as ct
 
@@ -74,11 +75,13 @@ class APIClient:
     """
 
     def __init__(self,
-                 logger: logging.Logger = global_logger) -> None:
+                 logger: logging.Logger = global_logger,
+                 session: Optional[HTTPSession] = None) -> None:
         """
         Initialise class variables.
         """
         self.logger = logger
+        self.session = session or get_session()
 
     def post_webhook_data(self, user_data, on_off) -> Optional[Dict[str, Any]]:
         """
@@ -89,8 +92,8 @@ class APIClient:
             user_data['user_id'] + STOP_START_CHARGING + on_off
 
         try:
-            response = requests.post(
-                base_url, data=json.dumps(user_data), headers=headers, timeout=20)
+            response = self.session.post(
+                base_url, data=json.dumps(user_data), headers=headers)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
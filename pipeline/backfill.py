@@ -0,0 +1,178 @@
+"""
+Backfills the raw generation or demand data over a historical range,
+fetching API-sized windows in parallel and streaming each one through the
+usual process -> feather -> S3 path.
+
+Usage:
+    python -m pipeline.backfill generation 2024-01-01 2024-02-01
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import boto3
+
+from pipeline import extract_demand, extract_generation
+import config as cg
+from constants import Constants as ct
+
+SCRIPT_NAME = (os.path.basename(__file__)).split(".")[0]
+LOGGING_LEVEL = logging.DEBUG
+logger = cg.setup_logging(SCRIPT_NAME, LOGGING_LEVEL)
+
+# Sources with time-ranged endpoints
+BACKFILL_SOURCES = {
+    "generation": extract_generation,
+    "demand": extract_demand,
+}
+
+
+def window_file_name(save_name: str, start: datetime, end: datetime) -> str:
+    """
+    Gets a source's save name with the window appended, e.g.
+    `raw_generation_data_20240101T0000_20240102T0000.feather`.
+    """
+    stem, extension = os.path.splitext(save_name)
+    return f"{stem}_{start:%Y%m%dT%H%M}_{end:%Y%m%dT%H%M}{extension}"
+
+
+class Backfill:
+    """
+    Fetches a source over a range and saves and uploads it window by window.
+    """
+
+    def __init__(self, source: str,
+                 window: timedelta = timedelta(hours=ct.BACKFILL_WINDOW_HOURS),
+                 max_workers: int = ct.BACKFILL_MAX_WORKERS,
+                 logger: logging.Logger = logger) -> None:
+        """
+        Initialize class variables.
+        """
+        self.source = source
+        self.module = BACKFILL_SOURCES[source]
+        self.api_client = self.module.APIClient()
+        self.window = window
+        self.max_workers = max_workers
+        self.logger = logger
+        self.s3_client: Optional[boto3.client] = None
+
+    def window_processor(self, start: datetime, end: datetime):
+        """
+        Builds a CustomDataProcessor that saves this window under its own
+        name, so windows neither overwrite each other locally nor in S3.
+        Windows are always uploaded, as their hashes would be stored under
+        the dataset's name and replace the scheduled extract's.
+        """
+        name = window_file_name(self.module.SAVE_NAME, start, end)
+        processor = self.module.CustomDataProcessor(save_location=ct.DATA + name,
+                                                    s3_file_name=name)
+        processor.s3_client = self.s3_client
+        processor.skip_unchanged = False
+        return processor
+
+    def save_window(self, start: datetime, end: datetime,
+                    data: Optional[Dict[str, Any]]) -> int:
+        """
+        Processes, saves and uploads one window, returning its row count.
+        """
+        processor = self.window_processor(start, end)
+        result = processor.process_data(data) if data else None
+        if result is None:
+            self.logger.warning("No data for window %s - %s.", start, end)
+            return 0
+
+        df, _ = result
+        processor.save_data_locally(df)
+        processor.save_data_to_s3()
+        return len(df)
+
+    def save_windows(self, windows: Iterable[Tuple[datetime, datetime, Optional[Dict[str, Any]]]]
+                     ) -> Iterator[Tuple[datetime, datetime, int]]:
+        """
+        Saves and uploads fetched windows on a pool of transfer threads,
+        yielding `(start, end, rows)` as each one finishes. At most one
+        window per thread waits in memory, so fetching is held back when
+        uploads fall behind.
+        """
+        saving = {}
+        with ThreadPoolExecutor(max_workers=ct.TRANSFER_MAX_WORKERS) as uploads:
+            for window_start, window_end, data in windows:
+                if len(saving) >= ct.TRANSFER_MAX_WORKERS:
+                    done, _ = wait(saving, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield (*saving.pop(future), future.result())
+                future = uploads.submit(self.save_window, window_start, window_end, data)
+                saving[future] = (window_start, window_end)
+
+            for future in as_completed(saving):
+                yield (*saving[future], future.result())
+
+    def run(self, start: datetime, end: datetime) -> Dict[str, Any]:
+        """
+        Backfills [start, end), logging throughput as windows complete.
+        """
+        self.logger.info("Backfilling %s from %s to %s in %s windows, %s workers.",
+                         self.source, start, end, self.window, self.max_workers)
+        os.makedirs(ct.DATA, exist_ok=True)
+
+        processor = self.module.CustomDataProcessor()
+        self.s3_client = processor.get_s3_client()
+
+        started = time.perf_counter()
+        rows = 0
+        windows = 0
+        fetched = self.api_client.fetch_range(start, end, self.window, self.max_workers)
+        for window_start, window_end, window_rows in self.save_windows(fetched):
+            rows += window_rows
+            windows += 1
+
+            elapsed = time.perf_counter() - started
+            self.logger.info("Window %s - %s: %s rows (%s rows total, %.0f rows/second)",
+                             window_start, window_end, window_rows,
+                             rows, rows / elapsed if elapsed else 0.0)
+
+        elapsed = time.perf_counter() - started
+        rows_per_second = rows / elapsed if elapsed else 0.0
+        self.logger.info("Backfilled %s rows of %s over %s windows in %.1f seconds "
+                         "(%.0f rows/second).",
+                         rows, self.source, windows, elapsed, rows_per_second)
+
+        return {"source": self.source, "rows": rows, "windows": windows,
+                "seconds": elapsed, "rows_per_second": rows_per_second}
+
+
+def parse_time(value: str) -> datetime:
+    """
+    Parses an ISO 8601 date or datetime, assuming UTC when no zone is given.
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def main() -> None:
+    """
+    Runs a backfill from the command line.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("source", choices=sorted(BACKFILL_SOURCES))
+    parser.add_argument("start", type=parse_time)
+    parser.add_argument("end", type=parse_time)
+    parser.add_argument("--window-hours", type=float, default=ct.BACKFILL_WINDOW_HOURS)
+    parser.add_argument("--workers", type=int, default=ct.BACKFILL_MAX_WORKERS)
+    args = parser.parse_args()
+
+    backfill = Backfill(args.source,
+                        window=timedelta(hours=args.window_hours),
+                        max_workers=args.workers)
+    backfill.run(args.start, args.end)
+    backfill.api_client.session.log_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+An opt-in on-disk cache of decoded API responses, for endpoints that are
+fetched many times while their documents rarely change.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+from pipeline.sessions import HTTPSession
+from constants import Constants as ct
+
+
+class ResponseCache:
+    """
+    Stores each response's decoded JSON under a key built from its URL and
+    parameters. Fresh entries are returned without touching the network or
+    decoding JSON; stale ones are revalidated with ETag/If-Modified-Since
+    where the API gave us those headers.
+    """
+
+    def __init__(self, logger: logging.Logger,
+                 directory: str = ct.CACHE_DIR,
+                 ttls: Dict[str, int] = ct.CACHE_TTLS,
+                 default_ttl: int = ct.CACHE_DEFAULT_TTL) -> None:
+        """
+        Initialize class variables. `ttls` maps endpoint URLs to seconds.
+        """
+        self.logger = logger
+        self.directory = directory
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def key(self, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Gets the cache key for a URL and its parameters.
+        """
+        identity = json.dumps([url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        """
+        Gets the file a cache entry is stored in.
+        """
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def read(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Reads a cache entry, treating unreadable entries as missing.
+        """
+        try:
+            with open(self.path(key), "rb") as file_data:
+                return pickle.load(file_data)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError) as e:
+            self.logger.warning("Ignoring unreadable cache entry `%s`: %s", key, e)
+            return None
+
+    def write(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Writes a cache entry atomically, so readers never see half a file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        temporary_path = f"{self.path(key)}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as file_data:
+            pickle.dump(entry, file_data, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, self.path(key))
+
+    def count(self, outcome: str) -> None:
+        """
+        Increments one of the hit/miss/revalidated counters and logs them.
+        """
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.logger.info("Response cache %s (hits: %s, misses: %s, revalidated: %s)",
+                             outcome, self.hits, self.misses, self.revalidated)
+
+    def fetch(self, session: HTTPSession, url: str,
+              params: Optional[Dict[str, Any]] = None,
+              headers: Optional[Dict[str, str]] = None) -> Any:
+        """
+        Returns the decoded JSON for a request, from the cache when it is
+        fresh or still valid, otherwise from the API. Request errors are
+        raised as usual.
+        """
+        key = self.key(url, params)
+        entry = self.read(key)
+        ttl = self.ttls.get(url, self.default_ttl)
+
+        if entry and time.time() - entry["stored_at"] < ttl:
+            self.count("hits")
+            return entry["data"]
+
+        request_headers = dict(headers or {})
+        if entry and entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = session.get(url, params=params, headers=request_headers)
+
+        if entry and response.status_code == requests.codes.not_modified:
+            entry["stored_at"] = time.time()
+            self.write(key, entry)
+            self.count("revalidated")
+            return entry["data"]
+
+        response.raise_for_status()
+        data = response.json()
+        self.write(key, {"data": data,
+                         "stored_at": time.time(),
+                         "etag": response.headers.get("ETag"),
+                         "last_modified": response.headers.get("Last-Modified")})
+        self.count("misses")
+        return data
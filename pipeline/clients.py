@@ -0,0 +1,66 @@
+"""
+Holds the boto3 clients shared across the process, so each is built once
+(loading botocore's models and resolving its endpoint) and then reused by
+every extractor, email and warm Lambda invocation.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+
+import config as cg
+
+# Logging
+SCRIPT_NAME = os.path.basename(__file__).split(".")[0]
+LOGGING_LEVEL = logging.DEBUG
+logger = cg.setup_logging(SCRIPT_NAME, LOGGING_LEVEL)
+
+ClientKey = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+_clients: Dict[ClientKey, Any] = {}
+_construction_times: Dict[ClientKey, float] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service: str,
+               region: Optional[str] = None,
+               aws_access_key: Optional[str] = None,
+               aws_secret_key: Optional[str] = None) -> Any:
+    """
+    Returns the process-wide client for a service, region and set of
+    credentials, creating it on first use.
+    """
+    key = (service, region, aws_access_key, aws_secret_key)
+    with _clients_lock:
+        # Held while building, as boto3's default session isn't thread safe
+        if key not in _clients:
+            start = time.perf_counter()
+            _clients[key] = boto3.client(service,
+                                         aws_access_key_id=aws_access_key,
+                                         aws_secret_access_key=aws_secret_key,
+                                         region_name=region)
+            _construction_times[key] = time.perf_counter() - start
+            logger.info("Created the %s client for `%s` in %.3f seconds.",
+                        service, region, _construction_times[key])
+        return _clients[key]
+
+
+def construction_times() -> Dict[str, float]:
+    """
+    Gets how long each client took to build, by service and region.
+    """
+    with _clients_lock:
+        return {f"{service} ({region})": seconds
+                for (service, region, _, _), seconds in _construction_times.items()}
+
+
+def clear_clients() -> None:
+    """
+    Forgets every client, so the next `get_client` builds a new one.
+    """
+    with _clients_lock:
+        _clients.clear()
+        _construction_times.clear()
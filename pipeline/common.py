@@ -2,9 +2,121 @@
 Holds the classes that are common the the pipelines' extract scripts
 """
 import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 import pandas as pd
+import pyarrow as pa
 import boto3
-from typing import Dict, Any, Optional
+from boto3.s3.transfer import TransferConfig
+from typing import Dict, Any, Iterable, List, Optional
+
+from pipeline.clients import get_client
+from pipeline.content_hash import ContentHash, hash_buffers
+from pipeline.formats import format_of, read_table, with_format, write_frame
+from pipeline.manifest import SyncManifest
+from pipeline.schemas import cast_table
+from pipeline.storage import StorageBackend, get_storage, get_transfer_config
+from constants import Constants as ct
+
+
+def new_run_id() -> str:
+    """
+    Gets a unique, time-ordered id for one run's extract files.
+    """
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def partition_prefix(dataset: str, hour: datetime) -> str:
+    """
+    Gets the key prefix of a dataset's partition for one hour, e.g.
+    `dataset=generation/date=2024-01-01/hour=13/`.
+    """
+    return f"dataset={dataset}/date={hour:%Y-%m-%d}/hour={hour:%H}/"
+
+
+def partition_key(dataset: str, hour: datetime, run_id: str,
+                  extension: str = ".feather") -> str:
+    """
+    Gets the key one run writes a dataset's hour of data to.
+    """
+    return f"{partition_prefix(dataset, hour)}{run_id}{extension}"
+
+
+def compacted_key(dataset: str, day: date, storage_format: str = "feather") -> str:
+    """
+    Gets the key a dataset's day of partitions is compacted into, which
+    sits beside that day's hourly partitions.
+    """
+    return f"dataset={dataset}/date={day:%Y-%m-%d}/{ct.COMPACTED_FILE_NAME}.{storage_format}"
+
+
+def partition_hours(start: datetime, end: datetime) -> List[datetime]:
+    """
+    Gets the start of every hour overlapping [start, end), in UTC.
+    """
+    hour = start.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    hours = []
+    while hour < end:
+        hours.append(hour)
+        hour += timedelta(hours=1)
+    return hours
+
+
+def list_partition_objects(storage: StorageBackend, dataset: str,
+                           start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """
+    Lists the objects of a dataset's partitions that overlap [start, end).
+    Each day overlapped is listed once and its objects kept only for the
+    hours wanted, along with the day's compacted file, if it has one.
+    """
+    hours = partition_hours(start, end)
+    days = sorted({partition_prefix(dataset, hour).split("hour=")[0] for hour in hours})
+    wanted = {partition_prefix(dataset, hour) for hour in hours} | set(days)
+
+    items = [item for day in days for item in storage.list(day)
+             if item["Key"].rsplit("/", 1)[0] + "/" in wanted]
+    return sorted(items, key=lambda item: item["Key"])
+
+
+def list_partitions(storage: StorageBackend, dataset: str,
+                    start: datetime, end: datetime) -> List[str]:
+    """
+    Lists the keys of a dataset's partitions that overlap [start, end).
+    """
+    return [item["Key"] for item in
+            list_partition_objects(storage, dataset, start, end)]
+
+
+def dataset_of(key: str) -> Optional[str]:
+    """
+    Gets the dataset a partition key (or a file named after one) is in.
+    """
+    for part in key.replace("_", "/").split("/"):
+        if part.startswith("dataset="):
+            return part[len("dataset="):]
+    return None
+
+
+def read_partitions(storage: StorageBackend, keys: List[str],
+                    max_workers: int = ct.TRANSFER_MAX_WORKERS) -> pd.DataFrame:
+    """
+    Reads partition files concurrently into one DataFrame, dropping rows
+    that more than one run extracted. Each file is cast to its dataset's
+    schema first, so files written before it was applied still agree.
+    """
+    def read(key: str) -> pd.DataFrame:
+        table = read_table(pa.py_buffer(storage.get(key)), format_of(key))
+        return cast_table(table, dataset_of(key)).to_pandas()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(read, keys))
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).drop_duplicates(ignore_index=True)
 
 
 class DataProcessor:
@@ -18,44 +130,124 @@ class DataProcessor:
                  region: str,
                  s3_file_name: str,
                  bucket: str,
-                 logger: logging.Logger) -> None:
+                 logger: logging.Logger,
+                 keep_local_copy: Optional[bool] = None,
+                 transfer_config: Optional[TransferConfig] = None,
+                 dataset: Optional[str] = None,
+                 time_column: Optional[str] = None,
+                 storage_format: Optional[str] = None,
+                 storage: Optional[StorageBackend] = None,
+                 skip_unchanged: Optional[bool] = None) -> None:
         """
         Initialize class variables.
 
         All vars are initiated here as flexibility is irrelevant,
-        readability and convenience is King.
+        readability and convenience is King. `keep_local_copy` defaults
+        to the KEEP_LOCAL_COPY environment variable, on unless it is `0`.
+        With a `dataset` and `time_column`, data is uploaded to hourly
+        partitions keyed on that column instead of to `s3_file_name`.
+        `storage_format` ("feather" or "parquet") defaults to the
+        STORAGE_FORMAT environment variable, and sets the files' extensions.
+        `storage` is where files are uploaded to and synced from; unless
+        the STORAGE_BACKEND environment variable picks another, it is the
+        bucket, through the client `get_s3_client` sets up.
+        `skip_unchanged` defaults to the SKIP_UNCHANGED environment
+        variable, on unless it is `0`, and skips uploading data identical
+        to the last data uploaded under the same dataset or file name.
         """
-        self.save_location = save_location
+        if storage_format is None:
+            storage_format = os.getenv('STORAGE_FORMAT', ct.DEFAULT_STORAGE_FORMAT)
+        self.storage_format = storage_format
+        self.save_location = with_format(save_location, storage_format)
         self.aws_access_key = aws_access_key
         self.aws_secret_key = aws_secret_key
         self.region = region
-        self.s3_file_name = s3_file_name
+        self.s3_file_name = with_format(s3_file_name, storage_format)
         self.bucket = bucket
         self.logger = logger
         self.s3_client = None
+        if keep_local_copy is None:
+            keep_local_copy = os.getenv('KEEP_LOCAL_COPY', '1') != '0'
+        self.keep_local_copy = keep_local_copy
+        # S3 keys and the serialized data to upload to each of them
+        self.buffers: Dict[str, pa.Buffer] = {}
+        self.transfer_config = transfer_config or get_transfer_config()
+        self.dataset = dataset
+        self.time_column = time_column
+        self.run_id = new_run_id()
+        if storage is None and os.getenv('STORAGE_BACKEND', ct.DEFAULT_STORAGE_BACKEND) != "s3":
+            storage = get_storage(bucket=bucket)
+        self.storage = storage
+        if skip_unchanged is None:
+            skip_unchanged = os.getenv('SKIP_UNCHANGED', '1') != '0'
+        self.skip_unchanged = skip_unchanged
+        # The hash of the serialized data, and whether its upload was skipped
+        self.content_hash: Optional[str] = None
+        self.skipped_upload = False
+
+    def serialize(self, dataframe: pd.DataFrame) -> pa.Buffer:
+        """
+        Serializes the DataFrame in the storage format to an in-memory
+        Arrow buffer.
+        """
+        start = time.perf_counter()
+        sink = pa.BufferOutputStream()
+        write_frame(dataframe, sink, self.storage_format, self.time_column)
+        buffer = sink.getvalue()
+        self.logger.info("Serialized %s rows into %s bytes in %.3f seconds.",
+                         len(dataframe), buffer.size, time.perf_counter() - start)
+        return buffer
+
+    def partition(self, dataframe: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Splits the DataFrame by the hour of its time column, keyed on each
+        hour's partition key, or keys all of it on `s3_file_name` when
+        partitioning isn't set up.
+        """
+        if not (self.dataset and self.time_column):
+            return {self.s3_file_name: dataframe}
+
+        hours = pd.to_datetime(dataframe[self.time_column], utc=True).dt.floor("h")
+        extension = f".{self.storage_format}"
+        return {partition_key(self.dataset, hour, self.run_id, extension):
+                part.reset_index(drop=True)
+                for hour, part in dataframe.groupby(hours, sort=True)}
 
     def save_data_locally(self, dataframe: pd.DataFrame) -> None:
         """
-        Saves the DataFrame to the specified save location in Feather format.
+        Serializes the DataFrame (each partition of it, when partitioned)
+        in memory for `save_data_to_s3` and, unless
+        `keep_local_copy` is off, writes it to the save location.
         """
-        dataframe.to_feather(self.save_location)
+        self.buffers = {key: self.serialize(part)
+                        for key, part in self.partition(dataframe).items()}
+        self.content_hash = hash_buffers(self.buffers.values())
+        if not self.keep_local_copy:
+            return
+
+        if list(self.buffers) == [self.s3_file_name]:
+            with open(self.save_location, 'wb') as file_data:
+                file_data.write(self.buffers[self.s3_file_name])
+        else:
+            write_frame(dataframe, self.save_location, self.storage_format, self.time_column)
         self.logger.info(f"Raw data saved to `{self.save_location}`")
 
     def get_s3_client(self) -> Optional[boto3.client]:
         """
         Gets the boto3 client so that s3 bucket can be accessed for data storage.
+        A client that was already created or handed in is reused, as is the
+        process-wide one for these credentials.
         """
+        if self.s3_client:
+            return self.s3_client
+
         self.logger.info("Fetching boto3 client...")
         self.logger.info("AWS access key: `%s`", self.aws_access_key)
         self.logger.info("AWS secret key: `%s`", self.aws_secret_key)
 
         try:
-            self.s3_client = boto3.client(
-                's3',
-                aws_access_key_id=self.aws_access_key,
-                aws_secret_access_key=self.aws_secret_key,
-                region_name=self.region
-            )
+            self.s3_client = get_client('s3', self.region,
+                                        self.aws_access_key, self.aws_secret_key)
             self.logger.info("Retrieved client successfully.")
             self.logger.debug(f"Client: {self.s3_client}")
 
@@ -66,30 +258,117 @@ class DataProcessor:
 
         return self.s3_client
 
-    def save_data_to_s3(self) -> None:
+    def get_backend(self) -> StorageBackend:
+        """
+        Gets the storage files go to, which is the bucket unless another
+        backend was given.
+        """
+        if self.storage is not None:
+            return self.storage
+        return get_storage("s3", self.bucket, self.s3_client, self.logger,
+                           self.transfer_config)
+
+    def get_content_hash(self) -> ContentHash:
+        """
+        Gets the store of the hash of this dataset's (or file's) last upload,
+        which is kept beside the uploads, as runs may not share a disk.
+        """
+        name = self.dataset or os.path.splitext(os.path.basename(self.s3_file_name))[0]
+        return ContentHash(name, self.logger, storage=self.get_backend())
+
+    def is_unchanged(self) -> bool:
         """
-        Save data to the S3 bucket.
+        Whether the serialized data is the same as the last data uploaded.
         """
-        if not self.s3_client:
+        return bool(self.skip_unchanged and self.content_hash
+                    and self.content_hash == self.get_content_hash().load())
+
+    def save_data_to_s3(self) -> bool:
+        """
+        Save data to the S3 bucket (or the storage backend in its place),
+        returning whether the upload succeeded.
+        """
+        if self.storage is None and not self.s3_client:
             self.logger.error("S3 client not initialized!")
-            return
+            return False
 
+        self.skipped_upload = self.is_unchanged()
+        if self.skipped_upload:
+            self.logger.info("Skipped uploading unchanged data: %s objects, %s bytes.",
+                             len(self.buffers),
+                             sum(buffer.size for buffer in self.buffers.values()))
+            return True
+
+        backend = self.get_backend()
         try:
-            with open(self.save_location, 'rb') as file_data:
-                self.s3_client.put_object(
-                    Bucket=self.bucket, Key=self.s3_file_name, Body=file_data)
-            self.logger.info(f"Data successfully saved to S3 as `{
-                             self.s3_file_name}`.")
+            if self.buffers:
+                with ThreadPoolExecutor(max_workers=ct.TRANSFER_MAX_WORKERS) as executor:
+                    list(executor.map(backend.put, self.buffers, self.buffers.values()))
+                keys = ", ".join(self.buffers)
+            else:
+                # Large uploads are split into parts sent in parallel
+                backend.put_file(self.s3_file_name, self.save_location)
+                keys = self.s3_file_name
+            self.logger.info(f"Data successfully saved to S3 as `{keys}`.")
         except Exception as e:
             self.logger.error(f"Error saving data to S3: {e}")
+            return False
+
+        if self.skip_unchanged and self.content_hash:
+            try:
+                self.get_content_hash().save(self.content_hash)
+            except Exception as e:
+                # The data is up; the next run just won't know to skip it
+                self.logger.warning(f"Error saving the hash of `{keys}`: {e}")
+        return True
 
-    def get_files_from_bucket(self) -> None:
+    def get_files_from_bucket(self,
+                              directory: str = ".",
+                              datasets: Optional[Iterable[str]] = None,
+                              start: Optional[datetime] = None,
+                              end: Optional[datetime] = None,
+                              manifest: Optional[SyncManifest] = None,
+                              max_workers: int = ct.TRANSFER_MAX_WORKERS) -> List[str]:
         """
-        Downloads All files in the s3 Bucket
+        Syncs the bucket's files into `directory`, several at a time,
+        returning the names the downloaded ones were saved under.
+
+        Only the `datasets` given are listed, and only their partitions
+        overlapping [start, end) when a range is given; otherwise the
+        whole bucket is. With a `manifest`, objects whose ETag and
+        LastModified it already holds are skipped and those downloaded
+        are recorded in it, for the caller to save once they are used.
         """
-        for file in self.s3_client.list_objects(Bucket=self.bucket)['Contents']:
+        backend = self.get_backend()
+        datasets = None if datasets is None else list(datasets)
+        if datasets is None:
+            items = list(backend.list())
+        elif start is None or end is None:
+            items = [item for dataset in datasets
+                     for item in backend.list(f"dataset={dataset}/")]
+        else:
+            items = [item for dataset in datasets
+                     for item in list_partition_objects(backend, dataset, start, end)]
+        changed = [item for item in items
+                   if manifest is None or not manifest.is_current(item)]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(backend.download, item['Key'],
+                                       # Partition keys have '/'s in them
+                                       os.path.join(directory, item['Key'].replace('/', '_')),
+                                       item.get('Size'))
+                       for item in changed]
+            names = [future.result() for future in futures]
+        if manifest is not None:
+            for item in changed:
+                manifest.record(item)
+            # Partitions before the range won't be listed again
+            hours = partition_hours(start, end) if datasets and start and end else []
+            for dataset in datasets if hours else []:
+                manifest.prune(f"dataset={dataset}/", partition_prefix(dataset, hours[0]))
 
-            self.s3_client.download_file(self.bucket, file['Key'], f'''{
-                file['Key']} {file['LastModified']}''')
-            self.logger.info(f"""Downloaded file: '{file['Key']} {
-                             file['LastModified']}'""")
+        self.logger.info("Downloaded %s of %s files in %.3f seconds, skipping %s unchanged.",
+                         len(names), len(items), time.perf_counter() - started,
+                         len(items) - len(changed))
+        return names
@@ -0,0 +1,149 @@
+"""
+Merges each dataset's per-run extract files for a day into one sorted,
+de-duplicated file, then deletes the files it merged, so downstream reads
+touch one object per dataset per day instead of one per run.
+
+Only days that are complete and older than the transform's lookback are
+compacted, so the transform never sees the same rows again under a new
+key. A compaction that was interrupted, or a day that gained late files,
+is merged again by the next run.
+
+Usage:
+    python -m pipeline.compact
+    python -m pipeline.compact --datasets generation --days 30
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import pyarrow as pa
+from dotenv import load_dotenv
+
+from pipeline.common import DataProcessor, compacted_key, read_partitions
+from pipeline.formats import write_frame
+from pipeline.schemas import apply_schema
+from pipeline.storage import StorageBackend
+import config as cg
+from constants import Constants as ct
+
+load_dotenv('.env')
+
+SCRIPT_NAME = (os.path.basename(__file__)).split(".")[0]
+LOGGING_LEVEL = logging.DEBUG
+logger = cg.setup_logging(SCRIPT_NAME, LOGGING_LEVEL)
+
+
+def compactable_days(count: int = ct.COMPACTION_DAYS,
+                     now: Optional[datetime] = None) -> List[date]:
+    """
+    Gets the latest `count` days that ended before the transform's
+    lookback window began, oldest first.
+    """
+    now = now or datetime.now(timezone.utc)
+    latest = (now - timedelta(hours=ct.TRANSFORM_LOOKBACK_HOURS + 1)).date() - timedelta(days=1)
+    return [latest - timedelta(days=offset) for offset in reversed(range(count))]
+
+
+class Compactor:
+    """
+    Compacts a storage backend's partitions a dataset and day at a time.
+    """
+
+    def __init__(self, storage: StorageBackend,
+                 logger: logging.Logger = logger,
+                 storage_format: Optional[str] = None,
+                 max_workers: int = ct.TRANSFER_MAX_WORKERS) -> None:
+        """
+        Initialize class variables. `storage_format` defaults to the
+        STORAGE_FORMAT environment variable.
+        """
+        self.storage = storage
+        self.logger = logger
+        self.storage_format = storage_format or os.getenv('STORAGE_FORMAT',
+                                                          ct.DEFAULT_STORAGE_FORMAT)
+        self.max_workers = max_workers
+
+    def compact_day(self, dataset: str, day: date) -> Dict[str, Any]:
+        """
+        Merges a day of a dataset's files into its compacted file, keeping
+        the latest run's copy of each row, and deletes the rest. Returns
+        how many objects and bytes that reclaimed.
+        """
+        target = compacted_key(dataset, day, self.storage_format)
+        items = list(self.storage.list(f"dataset={dataset}/date={day:%Y-%m-%d}/"))
+        report = {"dataset": dataset, "day": day.isoformat(), "objects": len(items),
+                  "reclaimed_objects": 0, "reclaimed_bytes": 0}
+        if not items or [item["Key"] for item in items] == [target]:
+            self.logger.debug("Nothing to compact for %s on %s.", dataset, day)
+            return report
+
+        # An earlier compacted file goes first, so any run file's rows win
+        keys = sorted((item["Key"] for item in items),
+                      key=lambda key: not key.rsplit("/", 1)[1].startswith(ct.COMPACTED_FILE_NAME))
+        # Categories differing between files are merged back into one
+        df = apply_schema(read_partitions(self.storage, keys, self.max_workers), dataset)
+        key_columns = [column for column in ct.COMPACTION_KEYS.get(dataset, ()) if column in df]
+        if key_columns:
+            df = df.drop_duplicates(subset=key_columns, keep="last")
+            df = df.sort_values(key_columns, kind="stable", ignore_index=True)
+
+        sink = pa.BufferOutputStream()
+        write_frame(df, sink, self.storage_format)
+        buffer = sink.getvalue()
+        # Written before anything is deleted, so the rows are never missing
+        self.storage.put(target, buffer)
+        retired = [key for key in keys if key != target]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(self.storage.delete, retired))
+
+        report["reclaimed_objects"] = len(items) - 1
+        report["reclaimed_bytes"] = sum(item.get("Size", 0) for item in items) - buffer.size
+        self.logger.info("Compacted %s files of %s on %s into %s rows, reclaiming %s bytes.",
+                         len(items), dataset, day, len(df), report["reclaimed_bytes"])
+        return report
+
+    def run(self, datasets: Iterable[str] = ct.RAW_DATASETS,
+            days: Optional[List[date]] = None) -> List[Dict[str, Any]]:
+        """
+        Compacts every day given (by default, the compactable ones) of
+        every dataset, logging the total reclaimed.
+        """
+        started = time.perf_counter()
+        reports = [self.compact_day(dataset, day)
+                   for dataset in datasets for day in days or compactable_days()]
+        self.logger.info("Compaction reclaimed %s objects and %s bytes in %.3f seconds.",
+                         sum(report["reclaimed_objects"] for report in reports),
+                         sum(report["reclaimed_bytes"] for report in reports),
+                         time.perf_counter() - started)
+        return reports
+
+
+def main() -> None:
+    """
+    Compacts the chosen datasets from the command line.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--datasets", nargs="+", choices=ct.RAW_DATASETS,
+                        default=list(ct.RAW_DATASETS))
+    parser.add_argument("--days", type=int, default=ct.COMPACTION_DAYS,
+                        help="complete days to look back over")
+    args = parser.parse_args()
+
+    processor = DataProcessor(save_location=ct.DATA,
+                              aws_access_key=os.getenv('AWS_ACCESS_KEY'),
+                              aws_secret_key=os.getenv('AWS_SECRET_KEY'),
+                              region=os.getenv('AWS_REGION'),
+                              s3_file_name="",
+                              bucket=ct.S3_BUCKET,
+                              logger=logger)
+    if processor.storage is None:
+        processor.get_s3_client()
+    Compactor(processor.get_backend()).run(args.datasets, compactable_days(args.days))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Remembers a hash of the data each source last uploaded, so a run that
+fetched exactly the same data can skip uploading it, and the transform
+then has nothing new to load.
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Iterable, Optional
+
+import pyarrow as pa
+from botocore.exceptions import BotoCoreError, ClientError
+
+from pipeline.storage import StorageBackend
+from constants import Constants as ct
+
+
+def hash_buffers(buffers: Iterable[pa.Buffer]) -> str:
+    """
+    Gets the SHA-256 of serialized data, reading the buffers in place.
+    """
+    digest = hashlib.sha256()
+    for buffer in buffers:
+        digest.update(buffer)
+    return digest.hexdigest()
+
+
+class ContentHash:
+    """
+    Loads and saves the hash of a source's last successful upload either
+    to a local JSON file or, when given a storage backend, to a JSON
+    object in it, so it outlives the machine a run was on.
+    """
+
+    def __init__(self, source: str,
+                 logger: logging.Logger,
+                 directory: str = ct.CONTENT_HASH_DIR,
+                 storage: Optional[StorageBackend] = None) -> None:
+        """
+        Initialize class variables.
+        """
+        self.source = source
+        self.logger = logger
+        self.path = os.path.join(directory, f"{source}.json")
+        self.key = f"{ct.CONTENT_HASH_PREFIX}{source}.json"
+        self.storage = storage
+
+    def load(self) -> Optional[str]:
+        """
+        Returns the stored hash, or None if this source has never stored one
+        (or it can't be read, so the data is uploaded).
+        """
+        try:
+            if self.storage is not None:
+                return json.loads(bytes(self.storage.get(self.key)))["hash"]
+            with open(self.path, "r") as file_data:
+                return json.load(file_data)["hash"]
+        # Local and in-memory backends raise the first two, S3 the others
+        except (FileNotFoundError, KeyError, ClientError, BotoCoreError):
+            return None
+
+    def save(self, content_hash: str) -> None:
+        """
+        Stores the hash of the data just uploaded.
+        """
+        body = json.dumps({"source": self.source, "hash": content_hash})
+        if self.storage is not None:
+            self.storage.put(self.key, body.encode())
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as file_data:
+            file_data.write(body)
@@ -0,0 +1,99 @@
+"""
+Cheap summaries of extracted data for the logs, and opt-in sampled dumps
+of raw API payloads, so the extract scripts never render whole
+DataFrames or responses as strings.
+"""
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from constants import Constants as ct
+
+
+class Diagnostics:
+    """
+    Summarises a source's processed DataFrame and, when enabled, writes a
+    sample of its raw payload to a gzipped JSON file.
+    """
+
+    def __init__(self, source: str,
+                 logger: logging.Logger,
+                 time_column: Optional[str] = None,
+                 group_column: Optional[str] = None,
+                 dump_payloads: bool = False,
+                 sample_size: int = ct.DIAGNOSTICS_SAMPLE_SIZE,
+                 directory: str = ct.DIAGNOSTICS_DIR) -> None:
+        """
+        Initialize class variables. `group_column` is counted per value,
+        e.g. rows per fuel type.
+        """
+        self.source = source
+        self.logger = logger
+        self.time_column = time_column
+        self.group_column = group_column
+        self.dump_payloads = dump_payloads
+        self.sample_size = sample_size
+        self.directory = directory
+
+    def summarise(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Gets the row count, dtypes, time range, null counts and group
+        counts of a DataFrame, without touching it row by row.
+        """
+        nulls = df.isna().sum()
+        summary = {
+            "rows": len(df),
+            "dtypes": df.dtypes.astype(str).to_dict(),
+            "nulls": nulls[nulls > 0].to_dict(),
+        }
+        if self.time_column in df and len(df):
+            # Typed timestamps, or ISO 8601 strings, which order correctly too
+            summary["time_range"] = (df[self.time_column].min(),
+                                     df[self.time_column].max())
+        if self.group_column in df:
+            summary["counts"] = df[self.group_column].value_counts().to_dict()
+        return summary
+
+    def log_summary(self, df: pd.DataFrame) -> None:
+        """
+        Logs the summary at DEBUG, only building it when DEBUG is enabled.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Summary of %s data: %s", self.source, self.summarise(df))
+
+    def sample(self, data: Any) -> Any:
+        """
+        Picks at most `sample_size` evenly spaced records from a payload's
+        `data` list, a list of records or a DataFrame.
+        """
+        if isinstance(data, pd.DataFrame):
+            step = max(1, -(-len(data) // self.sample_size))
+            return data.iloc[::step].to_dict("records")
+        if isinstance(data, dict) and isinstance(data.get("data"), list):
+            return {**data, "data": self.sample(data["data"])}
+        if isinstance(data, list):
+            step = max(1, -(-len(data) // self.sample_size))
+            return data[::step]
+        return data
+
+    def dump_payload(self, data: Any) -> Optional[str]:
+        """
+        Writes a sample of the raw payload to a gzipped JSON file when
+        payload dumps are enabled, returning its path.
+        """
+        if not self.dump_payloads:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        path = os.path.join(self.directory, f"{self.source}_{stamp}.json.gz")
+        with gzip.open(path, "wt") as file_data:
+            json.dump(self.sample(data), file_data, default=str)
+
+        self.logger.info("Wrote a sample of the %s payload to `%s`.", self.source, path)
+        return path
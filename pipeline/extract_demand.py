@@ -1,13 +1,20 @@
 import logging
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
 
+import boto3
 import pandas as pd
 import requests
 from dotenv import load_dotenv
 
 from pipeline.common import DataProcessor
+from pipeline.diagnostics import Diagnostics
+from pipeline.schemas import apply_schema
+from pipeline.sessions import HTTPSession, get_session
+from pipeline.streaming import decode_data_frame
+from pipeline.watermark import Watermark
+from pipeline.windows import fetch_windows, split_range
 import config as cg
 from constants import Constants as ct
 
@@ -16,12 +23,28 @@ ENDPOINT = ct.DEMAND_ENDPOINT
 SAVE_NAME = ct.RAW_DEMAND_DATA_NAME
 SAVE_LOCATION = ct.RAW_DEMAND_DATA_PATH
 S3_BUCKET = ct.S3_BUCKET
+# Raw data is partitioned in S3 by the hour of this column
+DATASET = "demand"
+TIME_COLUMN = ct.PARTITION_TIME_COLUMNS[DATASET]
 
 load_dotenv('.env')
 AWS_ACCESS_KEY = os.getenv('AWS_ACCESS_KEY')
 AWS_SECRET_KEY = os.getenv('AWS_SECRET_KEY')
 AWS_REGION = os.getenv('AWS_REGION')
 
+# Set DUMP_PAYLOADS=1 to write a gzipped sample of each raw payload to tmp/diagnostics/
+DUMP_PAYLOADS = os.getenv('DUMP_PAYLOADS', '0') == '1'
+
+# "incremental" fetches from the stored watermark, "full" always fetches
+# the whole window
+EXTRACT_MODE = os.getenv('EXTRACT_MODE', ct.DEFAULT_EXTRACT_MODE)
+WATERMARK_STORE = os.getenv('WATERMARK_STORE', ct.DEFAULT_WATERMARK_STORE)
+
+# Set STREAM_DECODE=1 to decode responses straight into column buffers
+STREAM_DECODE = os.getenv('STREAM_DECODE', '0') == '1'
+# Typed buffers for the numeric columns of the streamed response
+COLUMN_TYPES = {"settlementPeriod": "q", "demand": "q"}
+
 # Logging
 SCRIPT_NAME = os.path.basename(__file__).split(".")[0]
 LOGGING_LEVEL = logging.DEBUG
@@ -35,38 +58,108 @@ class APIClient:
 
     def __init__(self,
                  base_url: str = ENDPOINT,
-                 logger: logging.Logger = logger) -> None:
+                 logger: logging.Logger = logger,
+                 session: Optional[HTTPSession] = None,
+                 watermark: Optional[Watermark] = None,
+                 streaming: bool = STREAM_DECODE) -> None:
         """
         Initialize class variables.
         """
         self.base_url = base_url
         self.logger = logger
+        self.session = session or get_session()
+        self.watermark = watermark
+        self.streaming = streaming
+
+    def construct_range_params(self, start: datetime, end: datetime) -> Dict[str, str]:
+        """
+        Get the request parameters for data starting between two times.
+        """
+        return {
+            'From': start.isoformat(),  # ISO 8601 format, already UTC-aware
+            'To': end.isoformat(),
+            'format': 'json'
+        }
 
     def construct_default_params(self) -> Dict[str, str]:
         """
         Get a time range. Currently fetches data from 12 hours ago to present.
         """
-        twelve_hours_ago = datetime.now(timezone.utc) - timedelta(hours=12)
+        twelve_hours_ago = datetime.now(timezone.utc) - timedelta(hours=ct.EXTRACT_WINDOW_HOURS)
         now = datetime.now(timezone.utc)
 
-        return {
-            'From': twelve_hours_ago.isoformat(),  # ISO 8601 format, already UTC-aware
-            'To': now.isoformat(),
-            'format': 'json'
-        }
+        return self.construct_range_params(twelve_hours_ago, now)
+
+    def construct_incremental_params(self) -> Dict[str, str]:
+        """
+        Get a time range from the watermark (less a small overlap) to present,
+        falling back to the full 12-hour window when there is no watermark.
+        """
+        now = datetime.now(timezone.utc)
+        start = self.watermark.window_start(now - timedelta(hours=ct.EXTRACT_WINDOW_HOURS))
+
+        return self.construct_range_params(start, now)
+
+    def construct_params(self) -> Dict[str, str]:
+        """
+        Get the parameters for this run's mode: incremental when a watermark
+        is tracked, otherwise the full window.
+        """
+        if self.watermark:
+            return self.construct_incremental_params()
+        return self.construct_default_params()
 
     def fetch_data(self) -> Optional[Dict[str, Any]]:
         """
         Uses the above-created time range to make an API request, returning data.
         """
+        return self.fetch(self.construct_params())
+
+    def fetch_window(self, start: datetime, end: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Makes an API request for a single window of time, returning data.
+        """
+        return self.fetch(self.construct_range_params(start, end))
+
+    def fetch_range(self, start: datetime, end: datetime,
+                    window: timedelta = timedelta(hours=ct.BACKFILL_WINDOW_HOURS),
+                    max_workers: int = ct.BACKFILL_MAX_WORKERS)\
+            -> Iterator[Tuple[datetime, datetime, Optional[Dict[str, Any]]]]:
+        """
+        Splits a long range into API-sized windows and fetches them in
+        parallel, yielding `(start, end, data)` as each window arrives.
+        """
+        return fetch_windows(self.fetch_window,
+                             split_range(start, end, window),
+                             max_workers)
+
+    def fetch(self, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Makes an API request with the given parameters, returning data.
+        """
         try:
-            response = requests.get(self.base_url, params=self.construct_default_params())
+            response = self.session.get(self.base_url, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             self.logger.error("An error occurred: %s", e)
             return None
 
+    def fetch_frame(self) -> Optional[pd.DataFrame]:
+        """
+        Makes the same request as `fetch_data`, but streams the response's
+        data array straight into a DataFrame instead of decoding it whole.
+        """
+        try:
+            with self.session.get(self.base_url, params=self.construct_params(),
+                                  stream=True) as response:
+                response.raise_for_status()
+                return decode_data_frame(response.iter_content(ct.STREAM_CHUNK_SIZE),
+                                         COLUMN_TYPES)
+        except requests.exceptions.RequestException as e:
+            self.logger.error("An error occurred: %s", e)
+            return None
+
 
 class CustomDataProcessor(DataProcessor):
     """
@@ -90,9 +183,11 @@ class CustomDataProcessor(DataProcessor):
                          region,
                          s3_file_name,
                          bucket,
-                         logger)
+                         logger,
+                         dataset=DATASET,
+                         time_column=TIME_COLUMN)
 
-    def process_data(self, data: Dict[str, Any],
+    def process_data(self, data: Union[Dict[str, Any], pd.DataFrame],
                      logger: logging.Logger = logger)\
                     -> Optional[Tuple[pd.DataFrame, Dict[str, datetime]]]:
         """
@@ -101,16 +196,21 @@ class CustomDataProcessor(DataProcessor):
         time window over which the data was fetched.
         """
 
-        if not data or "data" not in data:
+        if isinstance(data, pd.DataFrame):
+            df = data
+        elif data and data.get("data"):
+            df = pd.DataFrame(data["data"])
+        else:
+            df = None
+
+        if df is None or df.empty:
             logger.warning("No data found in response.")
             return None
 
-        df = pd.DataFrame(data["data"])
-
-        start_times = pd.to_datetime(df["startTime"])
+        df = apply_schema(df, DATASET, logger)
         time_period = {
-            "From": start_times.min(),
-            "To": start_times.max()
+            "From": df["startTime"].min(),
+            "To": df["startTime"].max()
         }
 
         return df, time_period
@@ -128,7 +228,8 @@ class Main:
                  s3_region: str = AWS_REGION,
                  s3_bucket: str = S3_BUCKET,
                  s3_file_name: str = SAVE_NAME,
-                 logger: logging.Logger = logger) -> None:
+                 logger: logging.Logger = logger,
+                 diagnostics: Optional[Diagnostics] = None) -> None:
         """
         Initialize class variables.
         """
@@ -140,6 +241,9 @@ class Main:
         self.s3_bucket = s3_bucket
         self.s3_file_name = s3_file_name
         self.logger = logger
+        self.diagnostics = diagnostics or Diagnostics('demand', logger,
+                                                      time_column='startTime',
+                                                      dump_payloads=DUMP_PAYLOADS)
 
     def execute(self) -> Optional[Tuple[pd.DataFrame, Dict[str, datetime]]]:
         """
@@ -149,18 +253,19 @@ class Main:
         self.logger.info("Starting the execution of the workflow.")
 
         try:
-            data = self.api_client.fetch_data()
-            if data:
+            if self.api_client.streaming:
+                data = self.api_client.fetch_frame()
+            else:
+                data = self.api_client.fetch_data()
+            if data is not None:
                 self.logger.info("Data successfully fetched from the API.")
+                self.diagnostics.dump_payload(data)
 
                 result = self.data_processor.process_data(data)
                 if result is not None:
                     df, time_period = result
 
-                    self.logger.debug("DataFrame of Demand Data:")
-                    self.logger.debug("%s", df.to_string())  # Log the entire DataFrame as a string
-                    self.logger.info("Head of the DataFrame:")
-                    self.logger.info("\n%s", df.head().to_string())
+                    self.diagnostics.log_summary(df)
                     self.logger.info("Time Period of Data:")
                     self.logger.info("%s", time_period)
 
@@ -175,8 +280,10 @@ class Main:
 
                     if s3_client:
                         self.logger.info("S3 client initialized successfully.")
-                        self.data_processor.save_data_to_s3()
-                        self.logger.info("Data successfully uploaded to S3 at `%s`.", self.s3_file_name)
+                        if self.data_processor.save_data_to_s3():
+                            self.logger.info("Data successfully uploaded to S3 at `%s`.", self.s3_file_name)
+                            if self.api_client.watermark:
+                                self.api_client.watermark.save(time_period["To"])
                     else:
                         self.logger.error("Failed to initialize S3 client.")
 
@@ -191,6 +298,26 @@ class Main:
         self.logger.info("Execution of the workflow completed.")
         return None
 
+def build_main(s3_client: Optional[boto3.client] = None) -> Main:
+    """
+    Builds the workflow with default clients, reusing `s3_client` when
+    given. In incremental mode the APIClient tracks a watermark, stored
+    in the storage backend the data goes to, or locally.
+    """
+    data_processor = CustomDataProcessor()
+    data_processor.s3_client = s3_client
+
+    watermark = None
+    if EXTRACT_MODE == "incremental":
+        storage = None
+        if WATERMARK_STORE == "s3":
+            if data_processor.storage is None:
+                data_processor.get_s3_client()
+            storage = data_processor.get_backend()
+        watermark = Watermark("demand", logger, storage=storage)
+
+    return Main(APIClient(watermark=watermark), data_processor)
+
 def main() -> None:
     """
     Runs everything
@@ -204,15 +331,12 @@ def main() -> None:
     profiler = cg.start_monitor()
     logger.info("---> Logging initiated.")
 
-    # Instantiate APIClient and DataProcessor
-    api_client = APIClient() 
-    data_processor = CustomDataProcessor() 
-
-    # Instantiate Main class using default values for S3 credentials and logger
-    main_class = Main(api_client, data_processor)
+    # Build the workflow from its default parts
+    main_class = build_main()
 
     # Run the main execution workflow
     main_class.execute()
+    main_class.api_client.session.log_stats()
 
     # Winds down, stores performance log.
     logger.info("---> Operation completed. Stopping performance monitor.")
@@ -2,11 +2,18 @@ import logging
 import os
 from typing import Any, Dict, Optional
 
+import boto3
 import pandas as pd
+import pyarrow as pa
 import requests
 from dotenv import load_dotenv
 
+from pipeline.cache import ResponseCache
 from pipeline.common import DataProcessor
+from pipeline.diagnostics import Diagnostics
+from pipeline.flatten import flatten_records
+from pipeline.schemas import apply_schema
+from pipeline.sessions import HTTPSession, get_session
 import config as cg
 from constants import Constants as ct
 
@@ -14,14 +21,37 @@ from constants import Constants as ct
 # Global constants
 ENDPOINT = ct.PIECHART_ENDPOINT
 SAVE_NAME = ct.RAW_PIECHART_DATA_NAME
-SAVE_LOCATION = ct.RAW_CARBON_DATA_PATH
+SAVE_LOCATION = ct.RAW_PIECHART_DATA_PATH
 S3_BUCKET = ct.S3_BUCKET
+# Raw data is partitioned in S3 by the hour of this column
+DATASET = "piechart"
+TIME_COLUMN = ct.PARTITION_TIME_COLUMNS[DATASET]
+# Output columns and where each is found in a record, one row per fuel
+COLUMNS = {
+    'from': 'from',
+    'to': 'to',
+    'fuel_type': 'generationmix.fuel',
+    'percentage': 'generationmix.perc',
+}
+# Arrow types of the output columns, so decoding skips type inference
+TYPES = {
+    'from': pa.string(),
+    'to': pa.string(),
+    'fuel_type': pa.string(),
+    'percentage': pa.float64(),
+}
 
 load_dotenv('.env')
 AWS_ACCESS_KEY = os.getenv('AWS_ACCESS_KEY')
 AWS_SECRET_KEY = os.getenv('AWS_SECRET_KEY')
 AWS_REGION = os.getenv('AWS_REGION')
 
+# Set DUMP_PAYLOADS=1 to write a gzipped sample of each raw payload to tmp/diagnostics/
+DUMP_PAYLOADS = os.getenv('DUMP_PAYLOADS', '0') == '1'
+
+# Set HTTP_CACHE=1 to serve repeat requests from the on-disk response cache
+USE_CACHE = os.getenv('HTTP_CACHE', '0') == '1'
+
 # Logging
 SCRIPT_NAME = os.path.basename(__file__).split(".")[0]
 LOGGING_LEVEL = logging.DEBUG
@@ -36,12 +66,16 @@ class APIClient:
 
     def __init__(self,
                  base_url: str = ENDPOINT,
-                 logger: logging.Logger = logger) -> None:
+                 logger: logging.Logger = logger,
+                 session: Optional[HTTPSession] = None,
+                 cache: Optional[ResponseCache] = None) -> None:
         """
         Initialise class variables.
         """
         self.base_url = base_url
         self.logger = logger
+        self.session = session or get_session()
+        self.cache = cache
 
     def fetch_data(self) -> Optional[Dict[str, Any]]:
         """
@@ -49,7 +83,9 @@ class APIClient:
         """
         headers = {'Accept': 'application/json'}
         try:
-            response = requests.get(self.base_url, headers=headers)
+            if self.cache:
+                return self.cache.fetch(self.session, self.base_url, headers=headers)
+            response = self.session.get(self.base_url, headers=headers)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -79,7 +115,9 @@ class CustomDataProcessor(DataProcessor):
                          region,
                          s3_file_name,
                          bucket,
-                         logger)
+                         logger,
+                         dataset=DATASET,
+                         time_column=TIME_COLUMN)
 
     def process_data(self, data: Dict[str, Any],
                      logger: logging.Logger = logger) -> Optional[pd.DataFrame]:
@@ -91,10 +129,9 @@ class CustomDataProcessor(DataProcessor):
         if not data or "data" not in data:
             logger.warning("No data found in response.")
             return None
-        df = pd.DataFrame(data["data"])
-        df["fuel_type"] = df['generationmix'].apply(lambda x: x['fuel'])
-        df["percentage"] = df['generationmix'].apply(lambda x: x['perc'])
-        return df
+        df = flatten_records(data["data"], COLUMNS,
+                             explode='generationmix', types=TYPES)
+        return apply_schema(df, DATASET, logger)
 
 
 class Main:
@@ -110,7 +147,8 @@ class Main:
                  s3_region: str = AWS_REGION,
                  s3_bucket: str = S3_BUCKET,
                  s3_file_name: str = SAVE_NAME,
-                 logger: logging.Logger = logger) -> None:
+                 logger: logging.Logger = logger,
+                 diagnostics: Optional[Diagnostics] = None) -> None:
         """
         Initialize class variables.
         """
@@ -122,6 +160,10 @@ class Main:
         self.s3_region = s3_region
         self.s3_bucket = s3_bucket
         self.s3_file_name = s3_file_name
+        self.diagnostics = diagnostics or Diagnostics('piechart', logger,
+                                                      time_column='from',
+                                                      group_column='fuel_type',
+                                                      dump_payloads=DUMP_PAYLOADS)
 
     def execute(self) -> Optional[pd.DataFrame]:
         """
@@ -133,15 +175,14 @@ class Main:
 
         if data:
             self.logger.info("Data fetched successfully from API.")
-            self.logger.debug(f"Fetched Data: {data}")
+            self.diagnostics.dump_payload(data)
 
             self.logger.info("Processing the fetched data.")
             df = self.data_processor.process_data(data)
 
             if df is not None:
                 self.logger.info("Data processed successfully into DataFrame.")
-                self.logger.debug("DataFrame of Carbon Forecast Data:")
-                self.logger.debug(df.to_string())
+                self.diagnostics.log_summary(df)
 
                 self.logger.info("Saving the processed data locally.")
                 self.data_processor.save_data_locally(df)
@@ -170,6 +211,17 @@ class Main:
         return None
 
 
+def build_main(s3_client: Optional[boto3.client] = None) -> Main:
+    """
+    Builds the workflow with default clients, reusing `s3_client` when
+    given and caching responses on disk when HTTP_CACHE is set.
+    """
+    cache = ResponseCache(logger) if USE_CACHE else None
+    data_processor = CustomDataProcessor()
+    data_processor.s3_client = s3_client
+    return Main(APIClient(cache=cache), data_processor)
+
+
 def main() -> None:
     """
     Runs everything
@@ -177,22 +229,18 @@ def main() -> None:
 
     # Setup Variables
     script_name = SCRIPT_NAME
-    save_location = SAVE_LOCATION
 
     # Setup logging and performance tracking
     performance_logger = cg.setup_subtle_logging(script_name)
     profiler = cg.start_monitor()
     logger.info("---> Logging initiated.")
 
-    # Instantiate APIClient and DataProcessor using their default values
-    api_client = APIClient()
-    data_processor = CustomDataProcessor(save_location)
-
-    # Instantiate Main class with default arguments
-    main_class = Main(api_client, data_processor)
+    # Build the workflow from its default parts
+    main_class = build_main()
 
     # Run the main execution workflow
     main_class.execute()
+    main_class.api_client.session.log_stats()
 
     # Winds down, stores performance log
     logger.info("---> Operation completed. Stopping performance monitor.")
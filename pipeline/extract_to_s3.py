@@ -1,10 +1,19 @@
+"""
+Runs every extract script's workflow at the same time on a bounded pool
+of worker threads, so a run takes about as long as its slowest source.
+"""
 import os
 import logging
+import time
 import timeit
-from extract_generation import main as extract_generation
-from extract_demand import main as extract_demand
-from extract_piechart import main as extract_piechart
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import ModuleType
+from typing import Any, Dict, List, Optional
 
+import boto3
+
+from pipeline import extract_carbon, extract_demand, extract_generation, extract_piechart
+from pipeline.sessions import get_session
 from constants import Constants as ct
 import config as cg
 
@@ -17,35 +26,79 @@ LOGGING_LEVEL = logging.DEBUG
 
 logger = cg.setup_logging(SCRIPT_NAME, LOGGING_LEVEL)
 
+# Each source is an extract module exposing `build_main()`
+EXTRACT_SOURCES = {
+    "generation": extract_generation,
+    "demand": extract_demand,
+    "carbon": extract_carbon,
+    "piechart": extract_piechart,
+}
+MAX_WORKERS = ct.EXTRACT_MAX_WORKERS
+
+
+def run_source(name: str, module: ModuleType,
+               logger: logging.Logger = logger,
+               s3_client: Optional[boto3.client] = None) -> Dict[str, Any]:
+    """
+    Runs a single source's `Main.execute()` and reports how it went.
+    Never raises, so one failing source cannot take the others down.
+    """
+    logger.info("==> Executing extract_%s..", name)
+    start = time.perf_counter()
+    succeeded = False
+    unchanged = False
+
+    try:
+        main = module.build_main(s3_client=s3_client)
+        succeeded = main.execute() is not None
+        unchanged = main.data_processor.skipped_upload is True
+    except Exception as e:
+        logger.error("extract_%s raised an error: %s", name, e)
+
+    seconds = time.perf_counter() - start
+    if succeeded:
+        logger.info("extract_%s completed in %.3f seconds", name, seconds)
+    else:
+        logger.error("extract_%s failed after %.3f seconds", name, seconds)
 
-def pipeline():
+    return {"source": name, "succeeded": succeeded, "unchanged": unchanged,
+            "seconds": seconds}
+
+
+def pipeline(sources: Dict[str, ModuleType] = EXTRACT_SOURCES,
+             max_workers: int = MAX_WORKERS,
+             s3_client: Optional[boto3.client] = None) -> List[Dict[str, Any]]:
+    """
+    Starts every source together and collects their reports as they finish.
+    Every source shares `s3_client` when one is given.
+    """
     logger.info("|===============")
-    logger.info("==> Running Extract Scripts..")
+    logger.info("==> Running Extract Scripts concurrently (%s workers)..",
+                max_workers)
     logger.info("=======================================")
-    logger.info(" ")
-
-    logger.info("===========")
-    logger.info("==> Executing extract_production..")
-    logger.info("===========")
-    extract_time = timeit.timeit(extract_generation, number=1)
-    logger.info("Extract script completed in %s seconds", extract_time)
-
-    logger.info("===========")
-    logger.info("==> Executing extract_demand..")
-    logger.info("===========")
-    extract_time = timeit.timeit(extract_demand, number=1)
-    logger.info("Extract script completed in %s seconds", extract_time)
-
-    logger.info("===========")
-    logger.info("==> Executing extract_piechart..")
-    logger.info("===========")
-    extract_time = timeit.timeit(extract_piechart, number=1)
-    logger.info("Extract script completed in %s seconds", extract_time)
 
+    reports = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_source, name, module,
+                                   s3_client=s3_client)
+                   for name, module in sources.items()]
+        for future in as_completed(futures):
+            reports.append(future.result())
+
+    get_session().log_stats()
+    failed = [report["source"] for report in reports if not report["succeeded"]]
+    unchanged = [report["source"] for report in reports if report.get("unchanged")]
+    logger.info("==> Skipped uploading %s of %s sources with unchanged data: %s",
+                len(unchanged), len(reports), unchanged)
     logger.info("===============")
-    logger.info("==> Extract Scripts Complete!")
+    if failed:
+        logger.warning("==> Extract Scripts Complete, failed: %s", failed)
+    else:
+        logger.info("==> Extract Scripts Complete!")
     logger.info("=======================================|")
 
+    return reports
+
 
 def main():
     pipeline_time = timeit.timeit(pipeline, number=1)
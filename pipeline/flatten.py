@@ -0,0 +1,97 @@
+"""
+Flattens nested API records into flat, typed DataFrame columns in one
+vectorized pass, using Arrow struct and list arrays rather than applying
+Python functions row by row.
+"""
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+Records = Union[List[Dict[str, Any]], Dict[str, Any]]
+
+
+def field(array: pa.Array, path: str) -> pa.Array:
+    """
+    Gets a nested field of a struct array by its dotted path, e.g.
+    `intensity.forecast`. Missing fields come back as nulls.
+    """
+    for name in path.split("."):
+        if not pa.types.is_struct(array.type) or array.type.get_field_index(name) < 0:
+            return pa.nulls(len(array))
+        array = pc.struct_field(array, name)
+    return array
+
+
+def record_type(columns: Dict[str, str], types: Dict[str, pa.DataType],
+                explode: Optional[str] = None) -> pa.StructType:
+    """
+    Builds the Arrow type of a record holding just the typed columns'
+    paths, with the `explode` path as a list of structs.
+    """
+    tree: Dict[str, Any] = {}
+    for name, dtype in types.items():
+        parts = columns[name].split(".")
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = dtype
+
+    def build(node: Dict[str, Any], prefix: str) -> pa.StructType:
+        fields = []
+        for name, child in node.items():
+            path = f"{prefix}{name}"
+            child_type = build(child, f"{path}.") if isinstance(child, dict) else child
+            if path == explode:
+                child_type = pa.list_(child_type)
+            fields.append(pa.field(name, child_type))
+        return pa.struct(fields)
+
+    return build(tree, "")
+
+
+def flatten_records(records: Records, columns: Dict[str, str],
+                    explode: Optional[str] = None,
+                    types: Optional[Dict[str, pa.DataType]] = None) -> pd.DataFrame:
+    """
+    Builds a DataFrame with one column per entry of `columns`, which maps
+    output column names to dotted paths into each record.
+
+    With `explode`, the list at that path is unnested so each of its items
+    becomes a row, and paths starting with `explode` are read from the
+    item rather than the record; records with an empty list give no rows.
+
+    `types` gives every column's Arrow type up front, which skips type
+    inference and ignores any fields that aren't asked for. A single
+    record (rather than a list of them) is accepted as-is.
+    """
+    if isinstance(records, dict):
+        records = [records]
+    if types:
+        array = pa.array(records, type=record_type(columns, types, explode))
+    else:
+        array = pa.array(records)
+
+    parents = None
+    if explode:
+        lists = field(array, explode)
+        if not pa.types.is_list(lists.type):
+            raise ValueError(f"`{explode}` is not a list in these records")
+        items = pc.list_flatten(lists)
+        parents = pc.list_parent_indices(lists).to_numpy()
+
+    flattened = {}
+    for name, path in columns.items():
+        if explode and (path == explode or path.startswith(f"{explode}.")):
+            item_path = path[len(explode) + 1:]
+            flattened[name] = (field(items, item_path) if item_path else items).to_pandas()
+        else:
+            column = field(array, path).to_pandas()
+            # Repeat record-level values once per item after converting,
+            # so each Python object is built once per record, not per row
+            if parents is not None:
+                column = column.take(parents).reset_index(drop=True)
+            flattened[name] = column
+
+    return pd.DataFrame(flattened)
@@ -0,0 +1,162 @@
+"""
+Writes and reads the raw extract files in either of the supported
+storage formats:
+
+- feather: fast to write and read whole, with no statistics to skip by.
+- parquet: zstd-compressed and dictionary-encoded, sorted by time with
+  min/max statistics per row group, so filtered reads skip row groups.
+"""
+import os
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from constants import Constants as ct
+
+STORAGE_FORMATS = ("feather", "parquet")
+
+
+def format_of(name: str) -> str:
+    """
+    Gets a file's storage format from its extension, assuming feather.
+    """
+    return "parquet" if os.path.splitext(name)[1] == ".parquet" else "feather"
+
+
+def with_format(name: str, storage_format: str) -> str:
+    """
+    Swaps a feather or parquet file name's extension for the storage
+    format's. Other names are left as they are.
+    """
+    stem, extension = os.path.splitext(name)
+    if extension[1:] not in STORAGE_FORMATS:
+        return name
+    return f"{stem}.{storage_format}"
+
+
+def write_frame(dataframe: pd.DataFrame, sink: Any,
+                storage_format: str = "feather",
+                time_column: Optional[str] = None) -> None:
+    """
+    Writes a DataFrame to a path or Arrow output stream. Parquet rows are
+    sorted on `time_column` first, so each row group covers a narrow
+    time range and its statistics are useful for skipping.
+    """
+    if storage_format not in STORAGE_FORMATS:
+        raise ValueError(f"Unknown storage format `{storage_format}`")
+
+    if storage_format == "feather":
+        feather.write_feather(dataframe, sink)
+        return
+
+    if time_column in dataframe:
+        dataframe = dataframe.sort_values(time_column, kind="stable")
+    table = pa.Table.from_pandas(dataframe, preserve_index=False)
+    # Strings, and the categoricals the schemas make of them, repeat a lot
+    string_columns = [field.name for field in table.schema
+                      if pa.types.is_string(field.type) or pa.types.is_dictionary(field.type)]
+    pq.write_table(table, sink,
+                   compression=ct.PARQUET_COMPRESSION,
+                   use_dictionary=string_columns,
+                   write_statistics=True,
+                   row_group_size=ct.PARQUET_ROW_GROUP_ROWS)
+
+
+def time_bound(value: datetime, column_type: pa.DataType) -> pa.Scalar:
+    """
+    Gets a time bound in a column's own type. Times kept as ISO 8601
+    strings are compared at minute precision, which every source's
+    timestamps fall on, since the sources differ in whether they print
+    seconds (`23:00:00Z` and `23:00Z`).
+    """
+    if pa.types.is_timestamp(column_type):
+        return pa.scalar(value, type=column_type)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return pa.scalar(value.strftime("%Y-%m-%dT%H:%M"))
+
+
+def read_table(source: Any,
+               storage_format: Optional[str] = None,
+               columns: Optional[List[str]] = None,
+               time_column: Optional[str] = None,
+               start: Optional[datetime] = None,
+               end: Optional[datetime] = None,
+               fuel_types: Optional[Iterable[str]] = None,
+               fuel_column: str = "fuelType",
+               memory_map: bool = False) -> pa.Table:
+    """
+    Reads a file (a path or Arrow buffer) into an Arrow table, keeping only
+    rows in [start, end) of `time_column` and of the given fuel types.
+
+    For parquet the filter is pushed down into the scan, skipping row
+    groups whose statistics rule them out; feather is read whole and
+    filtered afterwards. `storage_format` defaults to the extension's.
+    With `memory_map`, a path is mapped rather than read into memory, and
+    of a feather file only the `columns` asked for are ever touched.
+    """
+    if storage_format is None:
+        storage_format = format_of(source) if isinstance(source, str) else "feather"
+    if storage_format not in STORAGE_FORMATS:
+        raise ValueError(f"Unknown storage format `{storage_format}`")
+
+    def open_source() -> Any:
+        return pa.BufferReader(source) if isinstance(source, pa.Buffer) else source
+
+    mapped = memory_map and isinstance(source, str)
+    if storage_format == "parquet":
+        schema = pq.read_schema(open_source(), memory_map=mapped)
+    else:
+        # Filtering needs the filtered columns, which are dropped afterwards
+        wanted = None
+        if columns is not None:
+            filtered = []
+            if time_column and (start is not None or end is not None):
+                filtered.append(time_column)
+            if fuel_types is not None:
+                filtered.append(fuel_column)
+            wanted = columns + [column for column in filtered if column not in columns]
+        table = feather.read_table(open_source(), columns=wanted, memory_map=mapped)
+        schema = table.schema
+
+    expression = None
+    conditions = []
+    if time_column and start is not None:
+        bound = time_bound(start, schema.field(time_column).type)
+        conditions.append(pc.field(time_column) >= bound)
+    if time_column and end is not None:
+        bound = time_bound(end, schema.field(time_column).type)
+        conditions.append(pc.field(time_column) < bound)
+    if fuel_types is not None:
+        conditions.append(pc.field(fuel_column).isin(list(fuel_types)))
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    if storage_format == "parquet":
+        return pq.read_table(open_source(), columns=columns, filters=expression,
+                             memory_map=mapped)
+    if expression is not None:
+        table = table.filter(expression)
+    if columns is not None:
+        table = table.select(columns)
+    return table
+
+
+def read_frame(source: Any,
+               storage_format: Optional[str] = None,
+               columns: Optional[List[str]] = None,
+               time_column: Optional[str] = None,
+               start: Optional[datetime] = None,
+               end: Optional[datetime] = None,
+               fuel_types: Optional[Iterable[str]] = None,
+               fuel_column: str = "fuelType") -> pd.DataFrame:
+    """
+    Reads a file into a DataFrame, as `read_table` does.
+    """
+    return read_table(source, storage_format, columns, time_column, start, end,
+                      fuel_types, fuel_column).to_pandas()
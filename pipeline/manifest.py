@@ -0,0 +1,98 @@
+"""
+Remembers the ETag and LastModified of every object already synced from
+the bucket, so the next sync only downloads objects that are new or have
+changed since.
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from pipeline.storage import StorageBackend
+from constants import Constants as ct
+
+
+class SyncManifest:
+    """
+    A JSON file mapping object keys to the version of each that was last
+    downloaded, kept locally or, when given a storage backend, as an
+    object in it, so it outlives the container a run was in. Changes are
+    kept in memory until `save` is called, so a caller can hold off
+    recording objects until it has used them.
+    """
+
+    def __init__(self, logger: logging.Logger,
+                 path: str = ct.SYNC_MANIFEST,
+                 storage: Optional[StorageBackend] = None,
+                 key: str = ct.SYNC_MANIFEST_KEY) -> None:
+        """
+        Initialize class variables.
+        """
+        self.logger = logger
+        self.path = path
+        self.storage = storage
+        self.key = key
+        self.entries = self.load()
+
+    def load(self) -> Dict[str, Dict[str, str]]:
+        """
+        Returns the stored entries, or none if nothing has been synced.
+        """
+        try:
+            if self.storage is not None:
+                return json.loads(bytes(self.storage.get(self.key)))
+            with open(self.path, "r") as file_data:
+                return json.load(file_data)
+        # Local and in-memory backends raise the first two, S3 the others
+        except (FileNotFoundError, KeyError, ClientError, BotoCoreError):
+            self.logger.info("No sync manifest at `%s`.",
+                             self.path if self.storage is None else self.key)
+            return {}
+
+    @staticmethod
+    def version(item: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Gets the parts of a listed object that change when it is rewritten.
+        """
+        return {"etag": item["ETag"], "last_modified": str(item["LastModified"])}
+
+    def is_current(self, item: Dict[str, Any]) -> bool:
+        """
+        Whether this version of a listed object has already been synced.
+        """
+        return self.entries.get(item["Key"]) == self.version(item)
+
+    def record(self, item: Dict[str, Any]) -> None:
+        """
+        Marks a listed object as synced.
+        """
+        self.entries[item["Key"]] = self.version(item)
+
+    def prune(self, prefix: str, before: str) -> None:
+        """
+        Forgets keys under `prefix` that sort before `before`, such as
+        partitions older than any sync will list again.
+        """
+        for key in [key for key in self.entries
+                    if key.startswith(prefix) and key < before]:
+            del self.entries[key]
+
+    def save(self) -> None:
+        """
+        Writes the entries out, replacing the old file (or object) in one
+        step so an interrupted save never leaves it half written.
+        """
+        if self.storage is not None:
+            self.storage.put(self.key, json.dumps(self.entries).encode())
+            self.logger.info("Saved the sync manifest with %s objects.", len(self.entries))
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file_data:
+            json.dump(self.entries, file_data)
+        os.replace(temporary, self.path)
+        self.logger.info("Saved the sync manifest with %s objects.", len(self.entries))
@@ -0,0 +1,97 @@
+"""
+Runs any chosen set of extract sources, and optionally the transform and
+load, in a single process. Configuration, logging, the HTTP session and
+the S3 client are set up once per task rather than once per script.
+
+Usage:
+    python -m pipeline.runner
+    python -m pipeline.runner --sources carbon piechart
+    python -m pipeline.runner --transform
+"""
+import argparse
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import boto3
+from dotenv import load_dotenv
+
+from pipeline.common import DataProcessor
+from pipeline.extract_to_s3 import EXTRACT_SOURCES, MAX_WORKERS, pipeline
+from pipeline.sessions import get_session
+import config as cg
+from constants import Constants as ct
+
+load_dotenv('.env')
+
+SCRIPT_NAME = (os.path.basename(__file__)).split(".")[0]
+LOGGING_LEVEL = logging.DEBUG
+logger = cg.setup_logging(SCRIPT_NAME, LOGGING_LEVEL)
+
+
+def get_shared_s3_client(logger: logging.Logger = logger) -> Optional[boto3.client]:
+    """
+    Creates the one S3 client every source and the transform will share.
+    """
+    processor = DataProcessor(save_location=ct.DATA,
+                              aws_access_key=os.getenv('AWS_ACCESS_KEY'),
+                              aws_secret_key=os.getenv('AWS_SECRET_KEY'),
+                              region=os.getenv('AWS_REGION'),
+                              s3_file_name="",
+                              bucket=ct.S3_BUCKET,
+                              logger=logger)
+    return processor.get_s3_client()
+
+
+def run(sources: List[str],
+        transform: bool = False,
+        max_workers: int = MAX_WORKERS,
+        logger: logging.Logger = logger) -> Dict[str, Any]:
+    """
+    Extracts the chosen sources concurrently, then transforms and loads
+    if asked to, logging how long each stage took.
+    """
+    started = time.perf_counter()
+    os.makedirs(ct.DATA, exist_ok=True)
+    get_session()
+    s3_client = get_shared_s3_client(logger)
+    timings = {"startup": time.perf_counter() - started}
+
+    stage_started = time.perf_counter()
+    reports = pipeline({name: EXTRACT_SOURCES[name] for name in sources},
+                       max_workers=max_workers, s3_client=s3_client)
+    timings["extract"] = time.perf_counter() - stage_started
+
+    if transform:
+        # Imported here so extract-only tasks never load the database driver
+        from pipeline import transform as transform_module
+
+        stage_started = time.perf_counter()
+        transform_module.main(s3_client=s3_client)
+        timings["transform"] = time.perf_counter() - stage_started
+
+    timings["total"] = time.perf_counter() - started
+    logger.info("Run timings: %s", ", ".join(f"{stage} {seconds:.2f}s"
+                                             for stage, seconds in timings.items()))
+    return {"reports": reports, "timings": timings}
+
+
+def main() -> None:
+    """
+    Runs the chosen sources from the command line.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sources", nargs="+", choices=sorted(EXTRACT_SOURCES),
+                        default=list(EXTRACT_SOURCES),
+                        help="sources to extract (default: all of them)")
+    parser.add_argument("--transform", action="store_true",
+                        help="transform and load into the database afterwards")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    run(args.sources, transform=args.transform, max_workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Declares compact types for each dataset's columns, applied once when a
+response is decoded (and to older string-typed files when they are
+read), so timestamps are parsed once and repeated strings are stored
+once.
+"""
+import logging
+from typing import Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+TIMESTAMP = "datetime64[ms, UTC]"
+
+# Columns a dataset's frames are typed with; others are left as decoded
+SCHEMAS = {
+    "generation": {
+        "dataset": "category",
+        "publishTime": TIMESTAMP,
+        "startTime": TIMESTAMP,
+        "settlementPeriod": "int8",
+        "fuelType": "category",
+        "generation": "float32",
+    },
+    "demand": {
+        "dataset": "category",
+        "publishTime": TIMESTAMP,
+        "startTime": TIMESTAMP,
+        "settlementPeriod": "int8",
+        "demand": "int32",
+    },
+    "carbon": {
+        "from": TIMESTAMP,
+        "to": TIMESTAMP,
+        "forecast": "int32",
+        "carbon level": "category",
+    },
+    "piechart": {
+        "from": TIMESTAMP,
+        "to": TIMESTAMP,
+        "fuel_type": "category",
+    },
+}
+
+# The Arrow type each pandas type is stored as
+ARROW_TYPES = {
+    TIMESTAMP: pa.timestamp("ms", "UTC"),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+    "int8": pa.int8(),
+    "int32": pa.int32(),
+    "float32": pa.float32(),
+}
+
+
+def to_timestamps(column: pd.Series) -> pd.Series:
+    """
+    Parses a column of ISO 8601 strings (or converts one of datetimes) to
+    UTC timestamps. Arrow parses the strings, at millisecond precision, so
+    dates before 1677 are kept too.
+    """
+    if isinstance(column.dtype, pd.DatetimeTZDtype):
+        return column.dt.tz_convert("UTC").astype(TIMESTAMP)
+    if pd.api.types.is_datetime64_dtype(column.dtype):
+        return column.dt.tz_localize("UTC").astype(TIMESTAMP)
+    parsed = pa.array(column, pa.string(), from_pandas=True).cast(ARROW_TYPES[TIMESTAMP])
+    return pd.Series(parsed.to_pandas(), index=column.index, name=column.name)
+
+
+def apply_schema(df: pd.DataFrame, dataset: str,
+                 logger: Optional[logging.Logger] = None) -> pd.DataFrame:
+    """
+    Gets the DataFrame with its dataset's columns in their declared types,
+    logging how much memory that saved when given a logger. Integer
+    columns with missing values get the nullable integer types.
+    """
+    columns = {}
+    for name, dtype in SCHEMAS.get(dataset, {}).items():
+        if name not in df or df[name].dtype == dtype:
+            continue
+        column = df[name]
+        if dtype == TIMESTAMP:
+            columns[name] = to_timestamps(column)
+        elif dtype.startswith("int") and column.isna().any():
+            columns[name] = column.astype(dtype.capitalize())
+        else:
+            columns[name] = column.astype(dtype)
+    if not columns:
+        return df
+
+    typed = df.assign(**columns)
+    if logger is not None:
+        report = memory_report(df, typed)
+        logger.info("Typed %s data: %s bytes down to %s (%.0f%% smaller).", dataset,
+                    report["before"], report["after"], 100 * report["saved"])
+    return typed
+
+
+def cast_table(table: pa.Table, dataset: str) -> pa.Table:
+    """
+    Casts an Arrow table's columns to its dataset's declared types, so
+    files written before (or after) the schema was applied agree.
+    """
+    for name, dtype in SCHEMAS.get(dataset, {}).items():
+        if name not in table.column_names:
+            continue
+        index = table.column_names.index(name)
+        if table.schema.field(index).type != ARROW_TYPES[dtype]:
+            table = table.set_column(index, name, table[name].cast(ARROW_TYPES[dtype]))
+    return table
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> Dict[str, float]:
+    """
+    Gets the bytes two versions of a DataFrame take, strings included,
+    and the share of them saved.
+    """
+    old = int(before.memory_usage(deep=True, index=False).sum())
+    new = int(after.memory_usage(deep=True, index=False).sum())
+    return {"before": old, "after": new, "saved": 1 - new / old if old else 0.0}
@@ -0,0 +1,133 @@
+"""
+Holds the HTTP session shared by every APIClient, so requests to the
+same host reuse pooled keep-alive connections and retry with backoff.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config as cg
+from constants import Constants as ct
+
+# Logging
+SCRIPT_NAME = os.path.basename(__file__).split(".")[0]
+LOGGING_LEVEL = logging.DEBUG
+logger = cg.setup_logging(SCRIPT_NAME, LOGGING_LEVEL)
+
+
+class HTTPSession:
+    """
+    Wraps a `requests.Session` with per-host connection pools, default
+    timeouts and exponential-backoff retries, and keeps request statistics.
+    """
+
+    def __init__(self,
+                 timeout: Tuple[float, float] = ct.HTTP_TIMEOUT,
+                 retries: int = ct.HTTP_RETRIES,
+                 backoff_factor: float = ct.HTTP_BACKOFF_FACTOR,
+                 pool_size: int = ct.HTTP_POOL_SIZE,
+                 logger: logging.Logger = logger) -> None:
+        """
+        Initialize class variables and mount the pooled adapter.
+        """
+        self.timeout = timeout
+        self.logger = logger
+
+        retry = Retry(total=retries,
+                      backoff_factor=backoff_factor,
+                      status_forcelist=ct.HTTP_RETRY_STATUSES,
+                      respect_retry_after_header=True,
+                      raise_on_status=False)
+        self.adapter = HTTPAdapter(pool_connections=pool_size,
+                                   pool_maxsize=pool_size,
+                                   max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.total_latency = 0.0
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Makes a request through the pooled session, logging its latency.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        start = time.perf_counter()
+        response = self.session.request(method, url, **kwargs)
+        latency = time.perf_counter() - start
+
+        with self._lock:
+            self.request_count += 1
+            self.total_latency += latency
+
+        self.logger.debug("%s %s -> %s in %.3f seconds",
+                          method, url, response.status_code, latency)
+        return response
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Makes a GET request.
+        """
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Makes a POST request.
+        """
+        return self.request("POST", url, **kwargs)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        Counts connections opened and reused across every host's pool.
+        """
+        opened = 0
+        sent = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            sent += pool.num_requests
+
+        return {"opened": opened, "reused": max(sent - opened, 0)}
+
+    def log_stats(self) -> None:
+        """
+        Logs request count, mean latency and connection reuse.
+        """
+        with self._lock:
+            count = self.request_count
+            total_latency = self.total_latency
+        mean_latency = total_latency / count if count else 0.0
+        connections = self.connection_stats()
+
+        self.logger.info(
+            "HTTP: %s requests, mean latency %.3f seconds, "
+            "%s connections opened, %s reused",
+            count, mean_latency, connections["opened"], connections["reused"])
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def get_session() -> HTTPSession:
+    """
+    Returns the process-wide HTTPSession, creating it on first use.
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = HTTPSession()
+    return _shared_session
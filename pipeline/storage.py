@@ -0,0 +1,314 @@
+"""
+Stores the pipeline's files behind one interface, so the same extract and
+transform code can run against S3, a local directory or memory. Which one
+is used is set by the STORAGE_BACKEND environment variable.
+
+- s3: the bucket, through boto3's managed (multipart) transfers.
+- local: a directory standing in for the bucket, keys as relative paths.
+- memory: a dict shared by the whole process, for tests and benchmarks.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Union
+
+import boto3
+import pyarrow as pa
+from boto3.s3.transfer import TransferConfig
+
+from constants import Constants as ct
+
+STORAGE_BACKENDS = ("s3", "local", "memory")
+
+Data = Union[bytes, pa.Buffer]
+
+
+def get_transfer_config() -> TransferConfig:
+    """
+    Gets the multipart settings used for S3 uploads and downloads.
+    """
+    return TransferConfig(multipart_threshold=ct.TRANSFER_MULTIPART_THRESHOLD,
+                          multipart_chunksize=ct.TRANSFER_CHUNK_SIZE,
+                          max_concurrency=ct.TRANSFER_MAX_CONCURRENCY)
+
+
+class TransferProgress:
+    """
+    A boto3 transfer callback that logs how far a transfer has got and,
+    once it is finished, how many bytes per second it managed.
+    """
+
+    def __init__(self, description: str, size: Optional[int],
+                 logger: logging.Logger,
+                 step: int = ct.TRANSFER_PROGRESS_STEP) -> None:
+        """
+        Initialize class variables. `size` may be None when unknown.
+        """
+        self.description = description
+        self.size = size
+        self.logger = logger
+        self.step = step
+        self.transferred = 0
+        self.next_report = step
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount: int) -> None:
+        """
+        Called by boto3, possibly from several threads, as parts move.
+        """
+        with self._lock:
+            self.transferred += bytes_amount
+            if not self.size:
+                return
+            percent = 100 * self.transferred / self.size
+            if self.next_report <= percent < 100:
+                self.logger.debug("%s: %.0f%% (%s of %s bytes)", self.description,
+                                  percent, self.transferred, self.size)
+                self.next_report = (percent // self.step + 1) * self.step
+
+    def finish(self) -> float:
+        """
+        Logs the transfer's throughput and returns it in bytes per second.
+        """
+        elapsed = time.perf_counter() - self.started
+        rate = self.transferred / elapsed if elapsed else 0.0
+        self.logger.info("%s: %s bytes in %.3f seconds (%.2f MB/s)", self.description,
+                         self.transferred, elapsed, rate / 1024 ** 2)
+        return rate
+
+
+class StorageBackend(ABC):
+    """
+    Puts, gets, lists and deletes objects by key. Listed objects are dicts
+    shaped like S3's: `Key`, `ETag`, `LastModified` and `Size`.
+    """
+
+    @abstractmethod
+    def put(self, key: str, data: Data) -> None:
+        """
+        Stores data under a key, replacing anything already there.
+        """
+
+    @abstractmethod
+    def get(self, key: str) -> Data:
+        """
+        Gets the data stored under a key, as bytes or an Arrow buffer.
+        """
+
+    @abstractmethod
+    def list(self, prefix: str = "") -> Iterator[Dict[str, Any]]:
+        """
+        Yields every object whose key starts with `prefix`, in key order.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Removes the object stored under a key.
+        """
+
+    def put_file(self, key: str, path: str) -> None:
+        """
+        Stores a local file's contents under a key.
+        """
+        with open(path, "rb") as file_data:
+            self.put(key, file_data.read())
+
+    def download(self, key: str, path: str, size: Optional[int] = None) -> str:
+        """
+        Writes an object to a local file, returning its path.
+        """
+        with open(path, "wb") as file_data:
+            file_data.write(self.get(key))
+        return path
+
+
+class S3Storage(StorageBackend):
+    """
+    Objects in an S3 bucket. Large objects are moved in parallel parts.
+    """
+
+    def __init__(self, s3_client: boto3.client, bucket: str,
+                 logger: logging.Logger,
+                 transfer_config: Optional[TransferConfig] = None) -> None:
+        """
+        Initialize class variables.
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.logger = logger
+        self.transfer_config = transfer_config or get_transfer_config()
+
+    def put(self, key: str, data: Data) -> None:
+        buffer = pa.py_buffer(data)
+        progress = TransferProgress(f"Uploaded `{key}` from memory", buffer.size, self.logger)
+        # Reads straight out of the Arrow buffer, without copying it
+        self.s3_client.upload_fileobj(pa.BufferReader(buffer), self.bucket, key,
+                                      Config=self.transfer_config, Callback=progress)
+        progress.finish()
+
+    def put_file(self, key: str, path: str) -> None:
+        progress = TransferProgress(f"Uploaded `{key}` from file",
+                                    os.path.getsize(path), self.logger)
+        self.s3_client.upload_file(path, self.bucket, key,
+                                   Config=self.transfer_config, Callback=progress)
+        progress.finish()
+
+    def get(self, key: str) -> Data:
+        return self.s3_client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def list(self, prefix: str = "") -> Iterator[Dict[str, Any]]:
+        # Paged, so listings of more than 1000 keys aren't cut short
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            yield from page.get("Contents", [])
+
+    def delete(self, key: str) -> None:
+        self.s3_client.delete_object(Bucket=self.bucket, Key=key)
+
+    def download(self, key: str, path: str, size: Optional[int] = None) -> str:
+        progress = TransferProgress(f"Downloaded `{path}`", size, self.logger)
+        self.s3_client.download_file(self.bucket, key, path,
+                                     Config=self.transfer_config, Callback=progress)
+        progress.finish()
+        return path
+
+
+class LocalStorage(StorageBackend):
+    """
+    Objects as files under a root directory, keys as paths relative to it.
+    """
+
+    def __init__(self, root: str = ct.LOCAL_STORAGE_DIR) -> None:
+        """
+        Initialize class variables.
+        """
+        self.root = root
+
+    def path(self, key: str) -> str:
+        """
+        Gets the file a key is stored in.
+        """
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, key: str, data: Data) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and moved into place, so readers never see half a file
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file_data:
+            file_data.write(data)
+        os.replace(temporary, path)
+
+    def get(self, key: str) -> Data:
+        with open(self.path(key), "rb") as file_data:
+            return file_data.read()
+
+    def list(self, prefix: str = "") -> Iterator[Dict[str, Any]]:
+        keys = []
+        # Only walk the directory the prefix's complete path parts lead to
+        top = self.path(prefix.rsplit("/", 1)[0]) if "/" in prefix else self.root
+        for directory, _, names in os.walk(top):
+            relative = os.path.relpath(directory, self.root).replace(os.sep, "/")
+            for name in names:
+                key = name if relative == "." else f"{relative}/{name}"
+                if key.startswith(prefix) and not name.endswith(".tmp"):
+                    keys.append(key)
+
+        for key in sorted(keys):
+            try:
+                stat = os.stat(self.path(key))
+            except FileNotFoundError:
+                continue
+            # The size and modification time change whenever a file is rewritten
+            yield {"Key": key,
+                   "ETag": f"{stat.st_size}-{stat.st_mtime_ns}",
+                   "LastModified": datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                   "Size": stat.st_size}
+
+    def delete(self, key: str) -> None:
+        os.remove(self.path(key))
+
+    def download(self, key: str, path: str, size: Optional[int] = None) -> str:
+        shutil.copyfile(self.path(key), path)
+        return path
+
+
+class MemoryStorage(StorageBackend):
+    """
+    Objects held in memory as Arrow buffers, which are handed out without
+    being copied.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize class variables.
+        """
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: str, data: Data) -> None:
+        buffer = data if isinstance(data, pa.Buffer) else pa.py_buffer(bytes(data))
+        item = {"Key": key,
+                "ETag": hashlib.md5(buffer).hexdigest(),
+                "LastModified": datetime.now(timezone.utc),
+                "Size": buffer.size}
+        with self._lock:
+            self.objects[key] = {**item, "Body": buffer}
+
+    def get(self, key: str) -> Data:
+        with self._lock:
+            return self.objects[key]["Body"]
+
+    def list(self, prefix: str = "") -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            items = [{name: value for name, value in item.items() if name != "Body"}
+                     for key, item in sorted(self.objects.items()) if key.startswith(prefix)]
+        yield from items
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            del self.objects[key]
+
+
+_memory_stores: Dict[str, MemoryStorage] = {}
+_memory_stores_lock = threading.Lock()
+
+
+def get_storage(backend: Optional[str] = None,
+                bucket: str = ct.S3_BUCKET,
+                s3_client: Optional[boto3.client] = None,
+                logger: Optional[logging.Logger] = None,
+                transfer_config: Optional[TransferConfig] = None) -> StorageBackend:
+    """
+    Gets the storage for a bucket on a backend, which defaults to the
+    STORAGE_BACKEND environment variable. Each bucket has one in-memory
+    store per process, so an extract and a transform run in the same
+    process see the same objects.
+    """
+    if backend is None:
+        backend = os.getenv('STORAGE_BACKEND', ct.DEFAULT_STORAGE_BACKEND)
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend `{backend}`")
+
+    if backend == "s3":
+        return S3Storage(s3_client, bucket, logger or logging.getLogger(__name__),
+                         transfer_config)
+    if backend == "local":
+        return LocalStorage(os.path.join(ct.LOCAL_STORAGE_DIR, bucket))
+    with _memory_stores_lock:
+        return _memory_stores.setdefault(bucket, MemoryStorage())
+
+
+def clear_memory_stores() -> None:
+    """
+    Empties every in-memory store.
+    """
+    with _memory_stores_lock:
+        _memory_stores.clear()
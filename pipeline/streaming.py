@@ -0,0 +1,191 @@
+"""
+Decodes the `data` array of an API response incrementally, appending each
+record straight into per-column buffers, so the full list of dicts never
+exists in memory and the DataFrame is built once at the end.
+"""
+import codecs
+import json
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# Drop the consumed part of the text buffer once it grows past this
+_COMPACT_AT = 1 << 16
+
+
+class _TextStream:
+    """
+    A growing text buffer over an iterable of byte chunks.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self.chunks = iter(chunks)
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def refill(self) -> bool:
+        """
+        Appends the next chunk, returning False once the stream has ended.
+        """
+        if self.exhausted:
+            return False
+        for chunk in self.chunks:
+            if chunk:
+                if self.pos > _COMPACT_AT:
+                    self.buffer = self.buffer[self.pos:]
+                    self.pos = 0
+                self.buffer += self.utf8.decode(chunk)
+                return True
+        self.buffer += self.utf8.decode(b"", final=True)
+        self.exhausted = True
+        return False
+
+    def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character ('' at the end).
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.refill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, character: str) -> None:
+        """
+        Consumes `character`, raising if something else comes next.
+        """
+        found = self.peek()
+        if found != character:
+            raise ValueError(f"Expected {character!r} at offset {self.pos}, found {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """
+        Decodes the next complete JSON value, reading more chunks until the
+        value and the delimiter after it are both in the buffer.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A number cut off at the end of a chunk still decodes, so
+                # only trust a value once something follows it
+                following = end
+                while following < len(self.buffer) and self.buffer[following] in _WHITESPACE:
+                    following += 1
+                if following < len(self.buffer) or self.exhausted:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self.refill()
+
+
+def iter_array_items(chunks: Iterable[bytes], key: str = "data") -> Iterator[Any]:
+    """
+    Yields the items of the top-level object's `key` array one at a time.
+    Other top-level values are decoded and discarded.
+    """
+    stream = _TextStream(chunks)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+
+    while True:
+        name = stream.value()
+        stream.expect(":")
+        if name == key and stream.peek() == "[":
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.pos += 1
+            else:
+                while True:
+                    yield stream.value()
+                    if stream.peek() == ",":
+                        stream.pos += 1
+                        continue
+                    stream.expect("]")
+                    break
+        else:
+            stream.value()
+
+        if stream.peek() == ",":
+            stream.pos += 1
+            continue
+        stream.expect("}")
+        return
+
+
+class ColumnBuffers:
+    """
+    Collects records column by column. Columns named in `column_types` are
+    held in typed arrays ('q' for int64, 'd' for float64); the rest in
+    lists. A typed column that meets a value it can't hold falls back to
+    a list.
+    """
+
+    def __init__(self, column_types: Optional[Dict[str, str]] = None) -> None:
+        self.column_types = column_types or {}
+        self.columns: Dict[str, Union[array, List[Any]]] = {}
+        self.rows = 0
+
+    def _new_column(self, name: str) -> Union[array, List[Any]]:
+        typecode = self.column_types.get(name)
+        if typecode and not self.rows:
+            return array(typecode)
+        # Earlier records didn't have this column
+        return [np.nan] * self.rows
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Adds one record, padding columns it doesn't have with NaN, as
+        `pd.DataFrame(records)` would.
+        """
+        for name, value in record.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = self._new_column(name)
+            try:
+                column.append(value)
+            except (TypeError, OverflowError):
+                self.columns[name] = column = list(column)
+                column.append(value)
+
+        if len(record) != len(self.columns):
+            for name, column in self.columns.items():
+                if len(column) == self.rows:
+                    if isinstance(column, array):
+                        self.columns[name] = column = list(column)
+                    column.append(np.nan)
+        self.rows += 1
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Builds the DataFrame, viewing typed arrays without copying them.
+        """
+        data = {}
+        for name, column in self.columns.items():
+            if isinstance(column, array):
+                data[name] = np.frombuffer(column, dtype=column.typecode)
+            else:
+                data[name] = column
+        return pd.DataFrame(data)
+
+
+def decode_data_frame(chunks: Iterable[bytes],
+                      column_types: Optional[Dict[str, str]] = None,
+                      key: str = "data") -> pd.DataFrame:
+    """
+    Streams a response's `key` array into a DataFrame.
+    """
+    buffers = ColumnBuffers(column_types)
+    for record in iter_array_items(chunks, key):
+        buffers.append(record)
+    return buffers.to_frame()
@@ -5,16 +5,28 @@ database
 import os
 import logging
 import glob
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from dotenv import load_dotenv
 import boto3
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from psycopg2.extensions import connection
 from psycopg2 import connect
 from psycopg2.extras import RealDictCursor, execute_values
 import datetime
 
-from pipeline.common import DataProcessor
+from pipeline.common import DataProcessor, dataset_of
+from pipeline.formats import read_table
+from pipeline.manifest import SyncManifest
+from pipeline.schemas import cast_table
 import config as cg
 from constants import Constants as ct
 
@@ -24,6 +36,266 @@ SCRIPT_NAME = (os.path.basename(__file__)).split(".")[0]
 LOGGING_LEVEL = logging.DEBUG
 logger = cg.setup_logging(SCRIPT_NAME, LOGGING_LEVEL)
 
+Frame = Union[pa.Table, pd.DataFrame]
+# A column readied for batching: Arrow values, or each chunk's dictionary
+# indices and its distinct values as Python objects
+Values = Union[pa.ChunkedArray, List[Tuple[pa.Array, np.ndarray]]]
+
+
+def as_table(df: Frame, columns: List[str], dataset: str) -> pa.Table:
+    """
+    Gets just the given columns as an Arrow table, converting only those
+    columns when handed a DataFrame, in the dataset's declared types.
+    """
+    if isinstance(df, pd.DataFrame):
+        return cast_table(pa.Table.from_pandas(df[columns], preserve_index=False), dataset)
+    return cast_table(df.select(columns), dataset)
+
+
+def wall_clock(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """
+    Gets UTC timestamps as the UTC wall-clock times the database's
+    TIMESTAMP columns hold, so the session's time zone never shifts them.
+    """
+    return column.cast(pa.timestamp(column.type.unit))
+
+
+def python_values(array: Union[pa.Array, pa.ChunkedArray]) -> list:
+    """
+    Gets an array's Python values, through NumPy where it converts them
+    much faster than Arrow: numbers, dates and times without a zone.
+    """
+    if not array.null_count:
+        if pa.types.is_integer(array.type) or pa.types.is_floating(array.type):
+            return array.to_numpy(zero_copy_only=False).tolist()
+        if pa.types.is_timestamp(array.type) and array.type.tz is None:
+            return array.to_numpy(zero_copy_only=False).astype('datetime64[us]').tolist()
+        if pa.types.is_date32(array.type):
+            return array.to_numpy(zero_copy_only=False).astype('datetime64[D]').tolist()
+    return array.to_pylist()
+
+
+def to_values(column: Union[pa.Array, pa.ChunkedArray]) -> Values:
+    """
+    Readies a column to be sliced into Python values. Strings and
+    dictionary-encoded columns become each chunk's indices, with its
+    distinct values decoded once into Python objects that its rows then
+    share; other columns stay in Arrow until their batch is taken.
+    """
+    if not (pa.types.is_string(column.type) or pa.types.is_dictionary(column.type)):
+        return column if isinstance(column, pa.ChunkedArray) else pa.chunked_array([column])
+
+    chunks = column.chunks if isinstance(column, pa.ChunkedArray) else [column]
+    decoded = []
+    for chunk in chunks:
+        if not pa.types.is_dictionary(chunk.type):
+            chunk = pc.dictionary_encode(chunk)
+        # Nulls point one past the dictionary, at a None
+        # (np.array is slow to take in a list of datetimes, np.fromiter isn't)
+        values = np.fromiter(chain(python_values(chunk.dictionary), [None]),
+                             dtype=object, count=len(chunk.dictionary) + 1)
+        decoded.append((chunk.indices, values))
+    return decoded
+
+
+def batch_values(values: Values, start: int, length: int) -> Sequence:
+    """
+    Gets one batch of a readied column's Python values, looking up only
+    that batch's indices in the dictionaries.
+    """
+    if isinstance(values, pa.ChunkedArray):
+        return python_values(values.slice(start, length))
+
+    parts = []
+    offset = 0
+    for indices, decoded in values:
+        low, high = max(start - offset, 0), min(start + length - offset, len(indices))
+        if low < high:
+            wanted = pc.fill_null(indices.slice(low, high - low), len(decoded) - 1)
+            parts.append(decoded[wanted.to_numpy()])
+        offset += len(indices)
+    return np.concatenate(parts) if parts else np.array([], dtype=object)
+
+
+def to_batches(columns: Sequence[Union[pa.Array, pa.ChunkedArray]],
+               batch_size: int) -> Iterator[list]:
+    """
+    Zips Arrow columns into lists of at most `batch_size` tuples of Python
+    values, building each list only when it is asked for.
+    """
+    values = [to_values(column) for column in columns]
+    length = len(columns[0]) if columns else 0
+    for start in range(0, length, batch_size):
+        yield list(zip(*(batch_values(column, start, batch_size) for column in values)))
+
+
+def generation_table(df: Frame) -> pa.Table:
+    """
+    Derives generation's columns in the order they are loaded.
+    """
+    table = as_table(df, ['publishTime', 'fuelType', 'generation', 'settlementPeriod'],
+                     'generation')
+    # Each of the few distinct publish times is converted once, not every row
+    publish_time = pc.dictionary_encode(wall_clock(table['publishTime']))
+    dates = distinct(publish_time).cast(pa.date32())
+    publish_date = pa.chunked_array(
+        [pa.DictionaryArray.from_arrays(chunk.indices, dates)
+         for chunk in publish_time.chunks],
+        type=pa.dictionary(pa.int32(), pa.date32()))
+    positive = pc.fill_null(pc.greater(table['generation'], 0), False)
+    gain_loss = pa.DictionaryArray.from_arrays(
+        np.where(positive.to_numpy(), 0, 1).astype(np.int8), pa.array(['+', '-']))
+    return pa.table({'publishTime': publish_time, 'publish_date': publish_date,
+                     'fuelType': table['fuelType'], 'gain_loss': gain_loss,
+                     'generation': table['generation'],
+                     'settlementPeriod': table['settlementPeriod']})
+
+
+def demand_table(df: Frame) -> pa.Table:
+    """
+    Derives demand's columns in the order they are loaded.
+    """
+    table = as_table(df, ['startTime', 'demand'], 'demand')
+    return table.set_column(0, 'startTime', wall_clock(table['startTime']))
+
+
+def carbon_table(df: Frame) -> pa.Table:
+    """
+    Derives carbon's columns, with each forecast's level, in the order
+    they are loaded.
+    """
+    table = as_table(df, ['from', 'forecast'], 'carbon')
+    bins = [0, 34, 109, 189, 270, 1000]
+    labels = ["very low", "low", "moderate", "high", "very high"]
+    # Each forecast's bin, right-inclusive; those outside them get no level
+    forecast = table['forecast'].to_numpy()
+    index = np.searchsorted(bins, forecast, side='left') - 1
+    outside = (index < 0) | (index >= len(labels)) | np.isnan(forecast)
+    levels = pa.DictionaryArray.from_arrays(
+        pa.array(np.clip(index, 0, len(labels) - 1).astype(np.int8), mask=outside),
+        pa.array(labels))
+    return pa.table({'from': wall_clock(table['from']), 'forecast': table['forecast'],
+                     'carbon_level': levels})
+
+
+def piechart_table(df: Frame) -> pa.Table:
+    """
+    Derives piechart's columns in the order they are loaded.
+    """
+    table = as_table(df, ['fuel_type', 'from', 'percentage'], 'piechart')
+    return table.set_column(1, 'from', wall_clock(table['from']))
+
+
+# Each dataset's transform, by the name its files are partitioned under
+TRANSFORMS = {
+    'generation': generation_table,
+    'demand': demand_table,
+    'carbon': carbon_table,
+    'piechart': piechart_table,
+}
+
+
+def distinct(column: pa.ChunkedArray) -> pa.Array:
+    """
+    Gets a dictionary-encoded column's distinct values, which its chunks
+    all share.
+    """
+    if not column.num_chunks:
+        return pa.array([], column.type.value_type)
+    return column.chunk(0).dictionary
+
+
+def dataset_for(file: str) -> Optional[str]:
+    """
+    Gets the dataset an input file holds: the one it is partitioned under,
+    or else the one its name has as a word, as in raw_generation_data.feather.
+    Files of no (or more than one) known dataset get None.
+    """
+    dataset = dataset_of(file)
+    if dataset is None:
+        named = set(re.split(r"[^a-z]+", os.path.basename(file).lower())) & set(TRANSFORMS)
+        dataset = named.pop() if len(named) == 1 else None
+    return dataset if dataset in TRANSFORMS else None
+
+
+def merge_tables(parts: List[pa.Table]) -> pa.Table:
+    """
+    Concatenates a dataset's tables, dropping rows that more than one of
+    them has.
+    """
+    table = pa.concat_tables(parts, promote_options="default")
+    if len(parts) > 1:
+        # Grouping needs the files' dictionaries made one
+        table = table.unify_dictionaries().group_by(table.column_names, use_threads=False).aggregate([])
+    return table
+
+
+def transform_window(dataset: str, now: datetime.datetime
+                     ) -> Tuple[datetime.datetime, datetime.datetime]:
+    """
+    Gets the [start, end) of a dataset's partitions a run reads: those
+    the latest extracts can have written to, up to the hour after `now`,
+    or for forecasts, whose rows run ahead, up to the end of the next day.
+    """
+    start = now - datetime.timedelta(hours=ct.TRANSFORM_LOOKBACK_HOURS)
+    if dataset in ct.FORECAST_DATASETS:
+        tomorrow = now.astimezone(datetime.timezone.utc).date() + datetime.timedelta(days=1)
+        end = datetime.datetime.combine(tomorrow + datetime.timedelta(days=1),
+                                        datetime.time(), datetime.timezone.utc)
+        return start, end
+    return start, now + datetime.timedelta(hours=1)
+
+
+def transform_dataset(dataset: str, files: List[str],
+                      start: Optional[datetime.datetime] = None,
+                      end: Optional[datetime.datetime] = None) -> Tuple[pa.Table, float]:
+    """
+    Reads a dataset's files, memory-mapped and keeping only rows in
+    [start, end) when given, merges them and derives its columns,
+    returning them with the seconds it took. Run in a worker process when
+    there is more than one dataset.
+    """
+    started = time.perf_counter()
+    window = {}
+    if start is not None or end is not None:
+        window = {"time_column": ct.PARTITION_TIME_COLUMNS[dataset],
+                  "start": start, "end": end}
+    parts = [cast_table(table, dataset) for table in (
+        read_table(file, memory_map=True, **window) for file in files) if len(table)]
+    table = TRANSFORMS[dataset](merge_tables(parts)) if parts else pa.table({})
+    return table, time.perf_counter() - started
+
+
+def transform_to_file(dataset: str, files: List[str], path: str,
+                      start: Optional[datetime.datetime] = None,
+                      end: Optional[datetime.datetime] = None) -> float:
+    """
+    Transforms a dataset in a worker process and writes its table to an
+    Arrow stream file at `path`, for the parent to map rather than have
+    the whole table pickled back, returning the seconds it took.
+    """
+    table, seconds = transform_dataset(dataset, files, start, end)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return seconds
+
+
+def map_stream(path: str) -> pa.Table:
+    """
+    Reads an Arrow stream file memory-mapped, its columns left in the file.
+    """
+    return pa.ipc.open_stream(pa.memory_map(path)).read_all()
+
+
+def available_cores() -> int:
+    """
+    Gets the cores this process may run on, which in a container can be
+    fewer than the machine has.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
 
 class Transform:
     """
@@ -31,105 +303,159 @@ class Transform:
 
     """
 
-    def __init__(self) -> None:
+    def __init__(self, batch_size: Optional[int] = None,
+                 max_workers: Optional[int] = None) -> None:
         """
-        Initialize class variables.
+        Initialize class variables. `batch_size` defaults to the
+        LOAD_BATCH_SIZE environment variable, or ct.LOAD_BATCH_SIZE, and
+        `max_workers` to the TRANSFORM_MAX_WORKERS environment variable (or
+        ct.TRANSFORM_MAX_WORKERS) or the cores available, whichever is
+        fewer, so with one core datasets are transformed in this process.
         """
         self.logger = logger
+        if batch_size is None:
+            batch_size = int(os.getenv('LOAD_BATCH_SIZE', ct.LOAD_BATCH_SIZE))
+        if max_workers is None:
+            max_workers = min(int(os.getenv('TRANSFORM_MAX_WORKERS', ct.TRANSFORM_MAX_WORKERS)),
+                              available_cores())
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.timings = {}
 
-    def get_data(self) -> dict[tuple]:
+    def get_data(self, frames: Optional[Dict[str, Frame]] = None,
+                 files: Optional[List[str]] = None,
+                 now: Optional[datetime.datetime] = None) -> Dict[str, Iterator[list]]:
         """
-        Turns downloaded files into an pandas dataframe, then Transforms the 
-        dataframe into a list of tuples
+        Transforms each dataset into batches of tuples, built as they are
+        loaded. `frames` maps dataset names to tables (or DataFrames)
+        already read; otherwise `files` (by default the feather files in
+        the working directory, which are then removed) are dispatched to
+        their datasets and each dataset's files are read and transformed,
+        in a process of its own when there are cores to spare. Given `now`, only the rows in each
+        dataset's transform window are read from its files.
         """
-        files = [file for file in glob.glob(
-            "*.feather*") if os.path.isfile(file)]
+        globbed = frames is None and files is None
+        if frames is not None:
+            results = {}
+            for dataset, df in frames.items():
+                if len(df) and dataset in TRANSFORMS:
+                    started = time.perf_counter()
+                    results[dataset] = (TRANSFORMS[dataset](df),
+                                        time.perf_counter() - started)
+        else:
+            if globbed:
+                files = [file for file in glob.glob(
+                    "*.feather*") if os.path.isfile(file)]
+            results = self.transform_files(files, now)
+
         data = {}
-        for file in files:
-            df = pd.read_feather(file)
-            if "generation" in file:
-                formatted_data = self.generation_transform(df)
-                data['generation'] = formatted_data
-                self.logger.info(
-                    """Transformed generation data""")
-            if "demand" in file:
-                formatted_data = self.demand_transform(df)
-                data['demand'] = formatted_data
-                self.logger.info("""Transformed demand data""")
-            if "carbon" in file:
-                formatted_data = self.carbon_transform(df)
-                data['carbon'] = formatted_data
-                self.logger.info("""Transformed carbon data""")
-            if "piechart" in file:
-                formatted_data = self.piechart_transform(df)
-                data['piechart'] = formatted_data
-                self.logger.info("""Transformed piechart data""")
-
-        print(data['piechart'])
-
-        data = self.difference_of_dates(data)
-        self.delete_read_files(files)
+        for dataset, (table, seconds) in results.items():
+            self.timings[dataset] = seconds
+            if not table.num_rows:
+                continue
+            data[dataset] = self.batches(dataset, table)
+            self.logger.info("Transformed %s rows of %s data in %.3fs.",
+                             table.num_rows, dataset, seconds)
+
+        if 'generation' in data:
+            data = self.difference_of_dates(data)
+        if globbed:
+            # Tables still being batched stay mapped once their files are gone
+            self.delete_read_files(files)
         return data
 
+    def transform_files(self, files: List[str], now: Optional[datetime.datetime] = None
+                        ) -> Dict[str, Tuple[pa.Table, float]]:
+        """
+        Groups files by dataset, so none overwrites another of its dataset,
+        and transforms the datasets in parallel, each within its transform
+        window of `now` when given.
+        """
+        grouped = {}
+        for file in files:
+            dataset = dataset_for(file)
+            if dataset is None:
+                self.logger.warning("Skipping %s, which is of no known dataset.", file)
+                continue
+            grouped.setdefault(dataset, []).append(file)
+
+        windows = {dataset: transform_window(dataset, now) if now else (None, None)
+                   for dataset in grouped}
+        workers = min(self.max_workers, len(grouped))
+        if workers <= 1:
+            return {dataset: transform_dataset(dataset, group, *windows[dataset])
+                    for dataset, group in grouped.items()}
+        # Each worker leaves its table in a file, mapped here and removed at
+        # once, as the mapping outlives it
+        with tempfile.TemporaryDirectory() as directory, \
+                ProcessPoolExecutor(max_workers=workers) as executor:
+            paths = {dataset: os.path.join(directory, f"{dataset}.arrows")
+                     for dataset in grouped}
+            futures = {dataset: executor.submit(transform_to_file, dataset, group,
+                                                paths[dataset], *windows[dataset])
+                       for dataset, group in grouped.items()}
+            results = {}
+            for dataset, future in futures.items():
+                seconds = future.result()
+                results[dataset] = (map_stream(paths[dataset]), seconds)
+            return results
+
+    def batches(self, dataset: str, table: pa.Table) -> Iterator[list]:
+        """
+        Notes what difference_of_dates needs of a transformed dataset and
+        returns its batches of tuples.
+        """
+        if dataset == 'generation':
+            self.period_g = pc.unique(table['settlementPeriod']).to_pylist()
+            self.time_g = distinct(table['publishTime'])
+        elif dataset == 'demand':
+            self.time_d = pc.unique(table['startTime'])
+        return to_batches(table.columns, self.batch_size)
+
     def difference_of_dates(self, data_conflict: dict):
         """
         Works out the difference of dates between the time column of generation
-        and the time column of demand, adds the missing dates to demand and
+        and the time column of demand, adds the missing dates as demand gaps and
         returns it
-        Mainly to fix foreign key errors
-        """
-        diff = list(set(self.time_g) - set(self.time_d))
-        for time in diff:
-            for values in data_conflict['generation']:
-                if values[0] == time:
-                    data_conflict['demand'].append((values[0], 0))
-                    break
+        Mainly to fix foreign key errors. The gaps are only inserted where the
+        table has no row yet, as an earlier run may have loaded those times
+        """
+        demand_times = self.time_d if 'demand' in data_conflict else pa.array([])
+        # An anti-join: generation's distinct times that demand hasn't got
+        missing = pc.filter(self.time_g, pc.invert(pc.is_in(
+            self.time_g, value_set=demand_times.cast(self.time_g.type))))
+        placeholders = list(zip(missing.to_pylist(), repeat(0)))
+        if placeholders:
+            data_conflict['demand_gaps'] = [placeholders]
         return data_conflict
 
-    def generation_transform(self, df: pd.DataFrame) -> tuple:
+    def generation_transform(self, df: Frame) -> Iterator[list]:
         """
         Filters and transforms the generation dataframe passed into it and returns
-        a list of tuples
+        batches of tuples
         """
-        df['publish_date'] = df['publishTime'].apply(lambda x: x.split('T')[0])
-        df['gain_loss'] = df['generation'].apply(
-            lambda x: '+' if x > 0 else '-')
-
-        self.period_g = df['settlementPeriod'].unique()
-        self.time_g = df['publishTime'].unique()
-        df = df.get(['publishTime', 'publish_date', 'fuelType', 'gain_loss',
-                     'generation', 'settlementPeriod'])
-        return list(df.itertuples(index=False, name=None))
+        return self.batches('generation', generation_table(df))
 
-    def demand_transform(self, df: pd.DataFrame) -> tuple:
+    def demand_transform(self, df: Frame) -> Iterator[list]:
         """
         Filters and transforms the demand dataframe passed into it and returns
-        a list of tuples
+        batches of tuples
         """
-        df = df.get(['startTime', 'demand'])
-        self.time_d = df['startTime'].unique()
-        return list(df.itertuples(index=False, name=None))
+        return self.batches('demand', demand_table(df))
 
-    def carbon_transform(self, df: pd.DataFrame) -> tuple:
+    def carbon_transform(self, df: Frame) -> Iterator[list]:
         """
         Filters and transforms the carbon dataframe passed into it and returns
-        a list of tuples
+        batches of tuples
         """
-        df = df.get(['from', 'forecast', 'carbon level'])
-        bins = [0, 34, 109, 189, 270, 1000]
-        labels = ["very low", "low", "moderate", "high", "very high"]
-        df['carbon level'] = pd.cut(
-            df['forecast'], bins=bins, labels=labels, right=True)
-        return list(df.itertuples(index=False, name=None))
+        return self.batches('carbon', carbon_table(df))
 
-    def piechart_transform(self, df: pd.DataFrame) -> tuple:
+    def piechart_transform(self, df: Frame) -> Iterator[list]:
         """
         Filters and transforms the carbon dataframe passed into it and returns
-        a list of tuples
+        batches of tuples
         """
-        print(df)
-        df = df[['fuel_type', 'from', 'percentage']]
-        return list(df.itertuples(index=False, name=None))
+        return self.batches('piechart', piechart_table(df))
 
     def delete_read_files(self, files):
         """
@@ -139,6 +465,29 @@ class Transform:
             os.remove(file)
 
 
+LOAD_QUERIES = {
+    'demand': """INSERT INTO Demand (publish_time, Demand_amt)
+                        VALUES %s
+                        ON CONFLICT (publish_time) DO UPDATE
+                        SET Demand_amt=EXCLUDED.Demand_amt""",
+    # Placeholders for generation's times, which must not overwrite real demand
+    'demand_gaps': """INSERT INTO Demand (publish_time, Demand_amt)
+                        VALUES %s
+                        ON CONFLICT (publish_time) DO NOTHING""",
+    'carbon': """INSERT INTO Carbon (publish_time, forecast, carbon_level)
+                        VALUES %s
+                        ON CONFLICT DO NOTHING""",
+    'generation': """INSERT INTO Generation (publish_time, publish_date,
+                         fuel_type, gain_loss, generated, settlement_period)
+                        VALUES %s
+                        ON CONFLICT DO NOTHING""",
+    'piechart': """INSERT INTO generation_percent (fuel_type, date_time,
+                         slice_percentage)
+                        VALUES %s
+                        ON CONFLICT DO NOTHING""",
+}
+
+
 class DatabaseConnection:
     """
     gets database connection
@@ -167,47 +516,48 @@ class Load:
         """
         self.logger = logger
 
-    def load_values(self, conn, data):
+    def load_values(self, conn, data: Dict[str, Iterable[list]]) -> None:
         """
-        Loads the data into an RDS database
+        Loads the data into an RDS database a batch at a time, so only one
+        batch of each dataset is ever held as Python tuples
         """
         curr = conn.cursor(cursor_factory=RealDictCursor)
-        if data.get('demand'):
-            sql_query = """INSERT INTO Demand (publish_time, Demand_amt)
-                        VALUES %s
-                        ON CONFLICT (publish_time) DO UPDATE
-                        SET Demand_amt=EXCLUDED.Demand_amt"""
-            execute_values(curr, sql_query, data['demand'])
-            self.logger.info(
-                """Loaded demand data into the database""")
-        if data.get('demand'):
-            sql_query = """INSERT INTO Carbon (publish_time, forecast, carbon_level)
-                        VALUES %s
-                        ON CONFLICT DO NOTHING"""
-            execute_values(curr, sql_query, data['carbon'])
-            self.logger.info(
-                """Loaded carbon data into the database""")
-        if data.get('generation'):
-            sql_query = """INSERT INTO Generation (publish_time, publish_date,
-                         fuel_type, gain_loss, generated, settlement_period)
-                        VALUES %s
-                        ON CONFLICT DO NOTHING"""
-            execute_values(curr, sql_query, data['generation'])
-            self.logger.info(
-                """Loaded generation data into the database""")
-        if data.get('piechart'):
-            sql_query = """INSERT INTO generation_percent (fuel_type, date_time,
-                         slice_percentage)
-                        VALUES %s
-                        ON CONFLICT DO NOTHING"""
-            execute_values(curr, sql_query, data['piechart'])
+        # Demand first, as generation's publish times reference it
+        for dataset, sql_query in LOAD_QUERIES.items():
+            if not data.get(dataset):
+                continue
+            rows = 0
+            for batch in data[dataset]:
+                execute_values(curr, sql_query, batch, page_size=len(batch))
+                rows += len(batch)
             self.logger.info(
-                """Loaded piechart data into the database""")
+                """Loaded %s rows of %s data into the database""", rows, dataset)
         curr.close()
         conn.close()
 
 
-if __name__ == "__main__":
+def sync_files(s3_bucket: DataProcessor, now: datetime.datetime,
+               manifest: Optional[SyncManifest] = None) -> List[str]:
+    """
+    Downloads the partitions in each dataset's transform window into
+    ct.SYNC_DIR, listing datasets that share a window together.
+    """
+    windows = {}
+    for dataset in ct.RAW_DATASETS:
+        windows.setdefault(transform_window(dataset, now), []).append(dataset)
+    os.makedirs(ct.SYNC_DIR, exist_ok=True)
+    return [file for (start, end), datasets in windows.items()
+            for file in s3_bucket.get_files_from_bucket(directory=ct.SYNC_DIR,
+                                                        datasets=datasets,
+                                                        start=start, end=end,
+                                                        manifest=manifest)]
+
+
+def main(s3_client: Optional[boto3.client] = None) -> None:
+    """
+    Downloads the extracted files from the storage backend, transforms
+    them and loads them into the database, reusing `s3_client` when given.
+    """
     db_conn = DatabaseConnection()
     s3_bucket = DataProcessor(save_location="your_save_location",
                               aws_access_key=os.getenv('AWS_ACCESS_KEY'),
@@ -216,9 +566,24 @@ if __name__ == "__main__":
                               s3_file_name="your_s3_file_name",
                               bucket=ct.S3_BUCKET,
                               logger=logger)
-    s3_bucket.get_s3_client()
-    s3_bucket.get_files_from_bucket()
+    s3_bucket.s3_client = s3_client
+    if s3_bucket.storage is None:
+        s3_bucket.get_s3_client()
+
+    # Only download the partitions written since the last sync, within
+    # the window the latest extracts can have written to
+    now = datetime.datetime.now(datetime.timezone.utc)
+    # Kept in the bucket, as each run is in a fresh container
+    manifest = SyncManifest(logger, storage=s3_bucket.get_backend())
+    files = sync_files(s3_bucket, now, manifest)
     tf = Transform()
-    values = tf.get_data()
+    values = tf.get_data(files=files, now=now)
     load = Load()
     load.load_values(db_conn.get_connection(), values)
+    # Only recorded once loaded, so a failed run's files are synced again
+    manifest.save()
+    tf.delete_read_files(files)
+
+
+if __name__ == "__main__":
+    main()
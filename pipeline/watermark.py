@@ -0,0 +1,86 @@
+"""
+Persists the latest timestamp each extract source has seen, so the next
+run only has to ask the API for data published after it.
+"""
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from pipeline.storage import StorageBackend
+from constants import Constants as ct
+
+
+class Watermark:
+    """
+    Loads and saves a source's high-watermark either to a local JSON file
+    or, when given a storage backend, to a JSON object in it.
+    """
+
+    def __init__(self, source: str,
+                 logger: logging.Logger,
+                 overlap: timedelta = timedelta(minutes=ct.WATERMARK_OVERLAP_MINUTES),
+                 directory: str = ct.WATERMARK_DIR,
+                 storage: Optional[StorageBackend] = None) -> None:
+        """
+        Initialize class variables.
+        """
+        self.source = source
+        self.logger = logger
+        self.overlap = overlap
+        self.path = os.path.join(directory, f"{source}.json")
+        self.key = f"{ct.WATERMARK_PREFIX}{source}.json"
+        self.storage = storage
+
+    def load(self) -> Optional[datetime]:
+        """
+        Returns the stored watermark as a UTC datetime, or None if this
+        source has never recorded one.
+        """
+        try:
+            if self.storage is not None:
+                stored = json.loads(bytes(self.storage.get(self.key)))
+            else:
+                with open(self.path, "r") as file_data:
+                    stored = json.load(file_data)
+        # Local and in-memory backends raise the first two, S3 the others
+        except (FileNotFoundError, KeyError, ClientError, BotoCoreError):
+            self.logger.info("No watermark stored for `%s`.", self.source)
+            return None
+
+        watermark = datetime.fromisoformat(stored["watermark"])
+        if watermark.tzinfo is None:
+            watermark = watermark.replace(tzinfo=timezone.utc)
+        self.logger.info("Loaded watermark for `%s`: %s", self.source, watermark)
+        return watermark
+
+    def save(self, watermark: datetime) -> None:
+        """
+        Stores a new watermark for this source.
+        """
+        if watermark.tzinfo is None:
+            watermark = watermark.replace(tzinfo=timezone.utc)
+        body = json.dumps({"source": self.source,
+                           "watermark": watermark.isoformat()})
+
+        if self.storage is not None:
+            self.storage.put(self.key, body.encode())
+        else:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as file_data:
+                file_data.write(body)
+        self.logger.info("Saved watermark for `%s`: %s", self.source, watermark)
+
+    def window_start(self, full_window_start: datetime) -> datetime:
+        """
+        Gets where an incremental fetch should start: the watermark less
+        the overlap, but never earlier than the full window would start.
+        Falls back to the full window when there is no watermark.
+        """
+        watermark = self.load()
+        if watermark is None:
+            return full_window_start
+        return max(watermark - self.overlap, full_window_start)
@@ -0,0 +1,54 @@
+"""
+Splits long time ranges into API-sized windows and fetches them in
+parallel, for use by the extract scripts' APIClients.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Window = Tuple[datetime, datetime]
+
+
+def split_range(start: datetime, end: datetime, window: timedelta) -> List[Window]:
+    """
+    Splits [start, end) into consecutive windows no longer than `window`.
+    The last window is cut short at `end`.
+    """
+    if window <= timedelta(0):
+        raise ValueError("Window must be a positive length of time")
+
+    windows = []
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + window, end)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+
+def fetch_windows(fetch_window: Callable[[datetime, datetime], Optional[Dict[str, Any]]],
+                  windows: Iterable[Window],
+                  max_workers: int) -> Iterator[Tuple[datetime, datetime, Optional[Dict[str, Any]]]]:
+    """
+    Fetches every window on a pool of at most `max_workers` threads and
+    yields `(start, end, data)` as each one arrives, in completion order.
+    Only a couple of windows per worker are in flight at once, so results
+    are streamed rather than piling up in memory.
+    """
+    windows = iter(windows)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def submit(batch: Iterable[Window]) -> None:
+            for window_start, window_end in batch:
+                future = executor.submit(fetch_window, window_start, window_end)
+                pending[future] = (window_start, window_end)
+
+        submit(islice(windows, max_workers * 2))
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                window_start, window_end = pending.pop(future)
+                yield window_start, window_end, future.result()
+            submit(islice(windows, len(done)))
@@ -2,17 +2,43 @@
 Test script for common.py
 """
 
+import io
+import os
+import threading
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
-def test_save_data_locally(data_processor, simple_mock_dataframe, mock_logger):
-    with patch("pandas.DataFrame.to_feather") as mock_to_feather:
+import pandas as pd
+import pyarrow as pa
+
+from constants import Constants as ct
+from pipeline.common import (DataProcessor, dataset_of, list_partitions,
+                             partition_hours, partition_key, read_partitions)
+from pipeline.manifest import SyncManifest
+from pipeline.storage import MemoryStorage, S3Storage, TransferProgress
+
+def test_save_data_locally(data_processor, simple_mock_dataframe, mock_logger, tmp_path):
+    data_processor.save_location = str(tmp_path / "mock.feather")
+
+    data_processor.save_data_locally(simple_mock_dataframe)
+
+    # The local copy is the same Feather file that is kept in memory for upload
+    pd.testing.assert_frame_equal(pd.read_feather(data_processor.save_location),
+                                  simple_mock_dataframe)
+    with open(data_processor.save_location, 'rb') as file_data:
+        assert file_data.read() == data_processor.buffers["mock_file"].to_pybytes()
+
+    # Check if logger.info was called correctly
+    mock_logger.info.assert_called_with(f"Raw data saved to `{data_processor.save_location}`")
+
+def test_save_data_locally_without_local_copy(data_processor, simple_mock_dataframe):
+    data_processor.keep_local_copy = False
+
+    with patch("builtins.open") as mock_open:
         data_processor.save_data_locally(simple_mock_dataframe)
-        
-        # Check if to_feather was called with the correct path
-        mock_to_feather.assert_called_once_with("mock_path")
-        
-        # Check if logger.info was called correctly
-        mock_logger.info.assert_called_with("Raw data saved to `mock_path`")
+
+    mock_open.assert_not_called()
+    assert data_processor.buffers["mock_file"].size > 0
 
 def test_get_s3_client(data_processor, mock_logger):
     with patch("boto3.client") as mock_boto_client:
@@ -37,23 +63,250 @@ def test_get_s3_client(data_processor, mock_logger):
         mock_logger.info.assert_any_call("Retrieved client successfully.")
 
 def test_save_data_to_s3(data_processor, mock_logger):
-    with patch("builtins.open", new_callable=MagicMock) as mock_open, \
+    with patch("os.path.getsize", return_value=10), \
          patch.object(data_processor, 's3_client', new_callable=MagicMock) as mock_s3_client:
-        
-        mock_file_data = MagicMock()
-        mock_open.return_value.__enter__.return_value = mock_file_data
-        
-        data_processor.save_data_to_s3()
-        
-        # Verify that the file was opened with the correct path and mode
-        mock_open.assert_called_once_with("mock_path", 'rb')
-        
-        # Verify that s3_client.put_object was called with the correct parameters
-        mock_s3_client.put_object.assert_called_once_with(
-            Bucket="mock_bucket",
-            Key="mock_file",
-            Body=mock_file_data
-        )
-        
+
+        assert data_processor.save_data_to_s3() is True
+
+        # Verify that the file was uploaded with the multipart transfer config
+        mock_s3_client.upload_file.assert_called_once()
+        args, kwargs = mock_s3_client.upload_file.call_args
+        assert args == ("mock_path", "mock_bucket", "mock_file")
+        assert kwargs["Config"] is data_processor.transfer_config
+        assert isinstance(kwargs["Callback"], TransferProgress)
+
         # Check logger call
-        mock_logger.info.assert_called_with("Data successfully saved to S3 as `mock_file`.")
\ No newline at end of file
+        mock_logger.info.assert_called_with("Data successfully saved to S3 as `mock_file`.")
+
+def test_save_data_to_s3_from_buffer(data_processor, simple_mock_dataframe):
+    data_processor.keep_local_copy = False
+    data_processor.save_data_locally(simple_mock_dataframe)
+    data_processor.s3_client = MagicMock()
+
+    with patch("builtins.open") as mock_open:
+        assert data_processor.save_data_to_s3() is True
+
+    mock_open.assert_not_called()
+    body, bucket, key = data_processor.s3_client.upload_fileobj.call_args[0]
+    assert (bucket, key) == ("mock_bucket", "mock_file")
+    assert body.read() == data_processor.buffers["mock_file"].to_pybytes()
+
+def list_pages(data_processor, *pages):
+    """
+    Makes the S3 client list the given pages of objects.
+    """
+    data_processor.s3_client = MagicMock()
+    data_processor.s3_client.get_paginator.return_value.paginate.return_value = [
+        {"Contents": page} for page in pages]
+
+def test_get_files_from_bucket_downloads_concurrently(data_processor):
+    list_pages(data_processor, [
+        {"Key": f"file_{i}.feather", "ETag": "e", "LastModified": "today", "Size": 10}
+        for i in range(4)])
+    barrier = threading.Barrier(4, timeout=5)
+    # Every download waits for the others, so this only passes if all four overlap
+    data_processor.s3_client.download_file.side_effect = lambda *args, **kwargs: barrier.wait()
+
+    names = data_processor.get_files_from_bucket(directory="sync", max_workers=4)
+
+    assert names == [os.path.join("sync", f"file_{i}.feather") for i in range(4)]
+
+def test_get_files_from_empty_bucket(data_processor):
+    list_pages(data_processor, [])
+
+    assert data_processor.get_files_from_bucket() == []
+
+def test_get_files_from_bucket_reads_every_page(data_processor):
+    list_pages(data_processor,
+               [{"Key": f"a_{i}", "ETag": "e", "LastModified": "today"} for i in range(1000)],
+               [{"Key": "b", "ETag": "e", "LastModified": "today"}])
+
+    assert len(data_processor.get_files_from_bucket()) == 1001
+
+def test_get_files_from_bucket_only_downloads_changes(data_processor, mock_logger, tmp_path):
+    manifest = SyncManifest(mock_logger, str(tmp_path / "manifest.json"))
+    items = [{"Key": "dataset=demand/date=2024-01-01/hour=00/run.feather",
+              "ETag": "one", "LastModified": "today"},
+             {"Key": "dataset=demand/date=2024-01-01/hour=01/run.feather",
+              "ETag": "one", "LastModified": "today"}]
+    list_pages(data_processor, items)
+    data_processor.get_files_from_bucket(datasets=["demand"], manifest=manifest)
+    manifest.save()
+
+    changed = {**items[1], "ETag": "two"}
+    new = {**items[0], "Key": "dataset=demand/date=2024-01-01/hour=02/run.feather"}
+    list_pages(data_processor, [items[0], changed, new])
+    names = data_processor.get_files_from_bucket(
+        datasets=["demand"], manifest=SyncManifest(mock_logger, manifest.path))
+
+    assert names == ["./dataset=demand_date=2024-01-01_hour=01_run.feather",
+                     "./dataset=demand_date=2024-01-01_hour=02_run.feather"]
+
+def test_sync_manifest_is_kept_in_the_storage_backend(data_processor, mock_logger, tmp_path):
+    storage = data_processor.storage = MemoryStorage()
+    storage.put("dataset=demand/date=2024-01-01/hour=00/run.feather", b"data")
+
+    # Each run as a fresh container would make it, sharing only the bucket
+    def sync():
+        manifest = SyncManifest(mock_logger, storage=storage)
+        names = data_processor.get_files_from_bucket(directory=str(tmp_path),
+                                                     datasets=["demand"], manifest=manifest)
+        manifest.save()
+        return names
+
+    assert len(sync()) == 1
+    assert ct.SYNC_MANIFEST_KEY in [item["Key"] for item in storage.list()]
+    assert sync() == []
+
+def test_get_files_from_bucket_lists_only_the_range(data_processor, mock_logger):
+    data_processor.s3_client = MagicMock()
+    data_processor.s3_client.get_paginator.return_value.paginate.side_effect = \
+        lambda Bucket, Prefix: [{"Contents": [
+            {"Key": f"{Prefix}hour={hour:02}/run.feather", "ETag": "e", "LastModified": "t"}
+            for hour in range(24)]}]
+    manifest = SyncManifest(mock_logger, "unused.json")
+    manifest.entries = {"dataset=carbon/date=2023-12-31/hour=23/old.feather": {},
+                        "dataset=demand/date=2023-12-31/hour=23/old.feather": {}}
+    start = datetime(2024, 1, 1, 22, tzinfo=timezone.utc)
+
+    names = data_processor.get_files_from_bucket(datasets=["carbon"], start=start,
+                                                 end=start + timedelta(hours=2),
+                                                 manifest=manifest)
+
+    assert [name.rsplit("_", 2)[1] for name in names] == ["hour=22", "hour=23"]
+    # Carbon's partitions before the range are forgotten, other datasets' kept
+    assert sorted(manifest.entries) == [
+        "dataset=carbon/date=2024-01-01/hour=22/run.feather",
+        "dataset=carbon/date=2024-01-01/hour=23/run.feather",
+        "dataset=demand/date=2023-12-31/hour=23/old.feather"]
+
+def test_dataset_of_keys_and_file_names():
+    assert dataset_of("dataset=demand/date=2024-01-01/hour=00/run.feather") == "demand"
+    assert dataset_of("tmp/data/sync/dataset=carbon_date=2024-01-01_hour=00_run.feather") == "carbon"
+    assert dataset_of("generation.feather") is None
+
+def test_transfer_progress_reports_steps_and_rate(mock_logger):
+    progress = TransferProgress("Uploaded `mock_file`", 100, mock_logger, step=25)
+
+    for _ in range(10):
+        progress(10)
+    rate = progress.finish()
+
+    assert progress.transferred == 100
+    # 25%, 50% and 75%; 100% is reported by finish
+    assert mock_logger.debug.call_count == 3
+    assert rate > 0
+def test_partition_key_and_hours():
+    start = datetime(2024, 1, 1, 22, 30, tzinfo=timezone.utc)
+
+    hours = partition_hours(start, start + timedelta(hours=2))
+
+    assert hours == [datetime(2024, 1, 1, 22, tzinfo=timezone.utc),
+                     datetime(2024, 1, 1, 23, tzinfo=timezone.utc),
+                     datetime(2024, 1, 2, 0, tzinfo=timezone.utc)]
+    assert partition_key("generation", hours[-1], "run") == \
+        "dataset=generation/date=2024-01-02/hour=00/run.feather"
+
+def test_save_data_locally_partitions_by_hour(data_processor):
+    data_processor.keep_local_copy = False
+    data_processor.dataset = "generation"
+    data_processor.time_column = "startTime"
+    data_processor.run_id = "run"
+    df = pd.DataFrame({"startTime": ["2024-01-01T00:05:00Z", "2024-01-01T01:00:00Z",
+                                     "2024-01-01T00:55:00Z"],
+                       "generation": [1, 2, 3]})
+
+    data_processor.save_data_locally(df)
+
+    assert list(data_processor.buffers) == [
+        "dataset=generation/date=2024-01-01/hour=00/run.feather",
+        "dataset=generation/date=2024-01-01/hour=01/run.feather"]
+    first = pd.read_feather(pa.BufferReader(next(iter(data_processor.buffers.values()))))
+    assert first["generation"].tolist() == [1, 3]
+
+def test_list_partitions_keeps_overlapping_hours():
+    s3_client = MagicMock()
+    s3_client.get_paginator.return_value.paginate.side_effect = lambda Bucket, Prefix: [
+        {"Contents": [{"Key": f"{Prefix}hour={hour:02}/run.feather"} for hour in range(24)]}]
+    start = datetime(2024, 1, 1, 22, tzinfo=timezone.utc)
+
+    keys = list_partitions(S3Storage(s3_client, "mock_bucket", MagicMock()), "demand",
+                           start, start + timedelta(hours=3))
+
+    assert keys == ["dataset=demand/date=2024-01-01/hour=22/run.feather",
+                    "dataset=demand/date=2024-01-01/hour=23/run.feather",
+                    "dataset=demand/date=2024-01-02/hour=00/run.feather"]
+
+def test_read_partitions_concatenates_and_deduplicates():
+    storage = MemoryStorage()
+    for key, values in {"a": [1, 2], "b": [2, 3]}.items():
+        sink = io.BytesIO()
+        pd.DataFrame({"demand": values}).to_feather(sink)
+        storage.put(key, sink.getvalue())
+
+    df = read_partitions(storage, ["a", "b"])
+
+    assert df["demand"].tolist() == [1, 2, 3]
+    assert read_partitions(storage, []).empty
+
+def test_unchanged_data_is_not_uploaded_again(data_processor, simple_mock_dataframe):
+    data_processor.keep_local_copy = False
+    data_processor.skip_unchanged = True
+    storage = data_processor.storage = MemoryStorage()
+
+    def uploads(mock_put) -> int:
+        return [call[0][0] for call in mock_put.call_args_list].count(data_processor.s3_file_name)
+
+    with patch.object(storage, "put", wraps=storage.put) as mock_put:
+        data_processor.save_data_locally(simple_mock_dataframe)
+        assert data_processor.save_data_to_s3() is True
+        data_processor.save_data_locally(simple_mock_dataframe.copy())
+        assert data_processor.save_data_to_s3() is True
+
+        assert data_processor.skipped_upload is True
+        assert uploads(mock_put) == 1
+
+        data_processor.save_data_locally(simple_mock_dataframe.head(2))
+        data_processor.save_data_to_s3()
+
+    assert data_processor.skipped_upload is False
+    assert uploads(mock_put) == 2
+
+
+def test_content_hash_is_kept_in_the_storage_backend(mock_logger, simple_mock_dataframe):
+    storage = MemoryStorage()
+
+    def run() -> DataProcessor:
+        # Each run as a fresh Lambda would make it, sharing only the bucket
+        processor = DataProcessor(save_location="mock_path", aws_access_key=None,
+                                  aws_secret_key=None, region=None, s3_file_name="mock_file",
+                                  bucket="mock_bucket", logger=mock_logger,
+                                  keep_local_copy=False, storage=storage,
+                                  skip_unchanged=True)
+        processor.save_data_locally(simple_mock_dataframe)
+        assert processor.save_data_to_s3() is True
+        return processor
+
+    assert run().skipped_upload is False
+    assert f"{ct.CONTENT_HASH_PREFIX}mock_file.json" in [item["Key"] for item in storage.list()]
+    assert run().skipped_upload is True
+
+
+def test_failing_to_save_the_content_hash_keeps_the_upload(data_processor, simple_mock_dataframe):
+    data_processor.keep_local_copy = False
+    data_processor.skip_unchanged = True
+    storage = data_processor.storage = MemoryStorage()
+    put = storage.put
+
+    def put_data_only(key, data):
+        if key.startswith(ct.CONTENT_HASH_PREFIX):
+            raise OSError("disk full")
+        put(key, data)
+
+    data_processor.save_data_locally(simple_mock_dataframe)
+    with patch.object(storage, "put", side_effect=put_data_only):
+        assert data_processor.save_data_to_s3() is True
+
+    assert [item["Key"] for item in storage.list()] == [data_processor.s3_file_name]
+    data_processor.logger.error.assert_not_called()
+    assert "disk full" in data_processor.logger.warning.call_args[0][0]
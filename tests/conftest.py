@@ -5,6 +5,7 @@ import logging
 from unittest.mock import MagicMock
 import pytest
 
+from pipeline.clients import clear_clients
 from pipeline.common import DataProcessor
 from pipeline.extract_generation import APIClient as APIClientGeneration
 from pipeline.extract_demand import APIClient as APIClientDemand
@@ -13,11 +14,34 @@ from pipeline.extract_carbon import APIClient as APIClientCarbon
 from mock_data.mock_dataframes import get_simple_mock_dataframe, get_carbon_mock_dataframe, get_cost_mock_dataframe, get_demand_mock_dataframe, get_generation_mock_dataframe
 
 
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    """
+    Stops boto3 clients cached by one test leaking into the next.
+    """
+    clear_clients()
+    yield
+    clear_clients()
+
+
+@pytest.fixture(autouse=True)
+def upload_unchanged(monkeypatch):
+    """
+    Stops hashes of one test's uploads making another skip its upload.
+    """
+    monkeypatch.setenv("SKIP_UNCHANGED", "0")
+
+
 @pytest.fixture
 def mock_logger():
     return MagicMock(spec=logging.Logger)
 
 
+@pytest.fixture
+def mock_session():
+    return MagicMock()
+
+
 @pytest.fixture
 def simple_mock_dataframe():
     return get_simple_mock_dataframe()
@@ -37,35 +61,39 @@ def data_processor(mock_logger):
 
 
 @pytest.fixture
-def api_client_generation(mock_logger):
+def api_client_generation(mock_logger, mock_session):
     """
     Fixture for APIClient from extract_generation
     """
-    return APIClientGeneration(base_url="mock_url", logger=mock_logger)
+    return APIClientGeneration(base_url="mock_url", logger=mock_logger,
+                               session=mock_session)
 
 
 @pytest.fixture
-def api_client_demand(mock_logger):
+def api_client_demand(mock_logger, mock_session):
     """
     Fixture for APIClient from extract_demand
     """
-    return APIClientDemand(base_url="mock_url", logger=mock_logger)
+    return APIClientDemand(base_url="mock_url", logger=mock_logger,
+                           session=mock_session)
 
 
 @pytest.fixture
-def api_client_price(mock_logger):
+def api_client_price(mock_logger, mock_session):
     """
     Fixture for APIClient from extract_demand
     """
-    return APIClientPrice(base_url="mock_url", logger=mock_logger)
+    return APIClientPrice(base_url="mock_url", logger=mock_logger,
+                          session=mock_session)
 
 
 @pytest.fixture
-def api_client_carbon(mock_logger):
+def api_client_carbon(mock_logger, mock_session):
     """
     Fixture for APIClient from extract_demand
     """
-    return APIClientCarbon(base_url="mock_url", logger=mock_logger)
+    return APIClientCarbon(base_url="mock_url", logger=mock_logger,
+                           session=mock_session)
 
 
 @pytest.fixture
@@ -2,9 +2,18 @@
 Mock dataframes for testing
 """
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
 
+def utc(times) -> pd.Series:
+    """
+    Naive ISO 8601 times (or datetimes) as the UTC timestamps frames are
+    typed with.
+    """
+    return pd.Series(np.array(times, dtype="datetime64[ms]")).dt.tz_localize("UTC")
+
+
 def get_generation_mock_dataframe():
     data = {
         'publishTime': ['2024-08-19T11:40:00Z', '2024-08-18T23:00:00Z', '2024-08-19T11:40:00Z'],
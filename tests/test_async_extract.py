@@ -0,0 +1,158 @@
+"""
+Test script for async_extract.py
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from unittest.mock import patch
+
+import httpx
+
+from pipeline import extract_generation
+from pipeline.async_extract import AsyncExtractor, Job, build_jobs, save_result
+
+START = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def test_build_jobs_for_a_range():
+    jobs = build_jobs(["generation", "carbon"], START, START + timedelta(days=2),
+                      timedelta(days=1))
+
+    generation = [job for job in jobs if job.source == "generation"]
+    carbon = [job for job in jobs if job.source == "carbon"]
+    assert len(generation) == 2
+    assert generation[0].params["publishDateTimeFrom"] == START.isoformat()
+    assert generation[1].start == START + timedelta(days=1)
+    assert len(carbon) == 1
+    assert carbon[0].headers == {'Accept': 'application/json'}
+
+
+def test_run_returns_json_in_job_order(mock_logger):
+    def handler(request):
+        return httpx.Response(200, json={"data": [request.url.params["n"]]})
+
+    jobs = [Job("generation", "https://mock_url", params={"n": str(n)}) for n in range(5)]
+    extractor = AsyncExtractor(logger=mock_logger,
+                               transport=httpx.MockTransport(handler))
+
+    results = extractor.run(jobs)
+
+    assert [data for _, data in results] == [{"data": [str(n)]} for n in range(5)]
+
+
+def test_run_retries_server_errors(mock_logger):
+    responses = iter([httpx.Response(503), httpx.Response(200, json={"data": []})])
+    extractor = AsyncExtractor(backoff_factor=0, logger=mock_logger,
+                               transport=httpx.MockTransport(lambda _: next(responses)))
+
+    [(_, data)] = extractor.run([Job("carbon", "https://mock_url")])
+
+    assert data == {"data": []}
+
+
+def test_run_gives_up_with_none(mock_logger):
+    extractor = AsyncExtractor(retries=1, backoff_factor=0, logger=mock_logger,
+                               transport=httpx.MockTransport(lambda _: httpx.Response(500)))
+
+    [(_, data)] = extractor.run([Job("carbon", "https://mock_url")])
+
+    assert data is None
+    assert mock_logger.error.called
+
+
+def test_concurrency_limit(mock_logger):
+    running = []
+    peak = []
+
+    async def handler(request):
+        running.append(request)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(request)
+        return httpx.Response(200, json={})
+
+    extractor = AsyncExtractor(max_concurrency=3, logger=mock_logger,
+                               transport=httpx.MockTransport(handler))
+    extractor.run([Job("carbon", "https://mock_url")] * 12)
+
+    assert max(peak) <= 3
+
+
+def test_run_retries_transport_errors(mock_logger):
+    responses = iter([httpx.ConnectError("refused"), httpx.Response(200, json={"data": []})])
+
+    def handler(request):
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    extractor = AsyncExtractor(backoff_factor=0, logger=mock_logger,
+                               transport=httpx.MockTransport(handler))
+
+    [(_, data)] = extractor.run([Job("carbon", "https://mock_url")])
+
+    assert data == {"data": []}
+
+
+def test_run_survives_a_body_that_is_not_json(mock_logger):
+    def handler(request):
+        if request.url.params["n"] == "0":
+            return httpx.Response(200, text="<html>")
+        return httpx.Response(200, json={"data": []})
+
+    jobs = [Job("carbon", "https://mock_url", params={"n": str(n)}) for n in range(2)]
+    extractor = AsyncExtractor(logger=mock_logger, transport=httpx.MockTransport(handler))
+
+    assert [data for _, data in extractor.run(jobs)] == [None, {"data": []}]
+
+
+def test_backoff_gives_up_its_slot(mock_logger):
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.params["n"])
+        if requests == ["0"]:
+            return httpx.Response(503)
+        return httpx.Response(200, json={})
+
+    jobs = [Job("carbon", "https://mock_url", params={"n": str(n)}) for n in range(2)]
+    extractor = AsyncExtractor(max_concurrency=1, backoff_factor=0.05, logger=mock_logger,
+                               transport=httpx.MockTransport(handler))
+    extractor.run(jobs)
+
+    # The second job is served while the first backs off
+    assert requests == ["0", "1", "0"]
+
+
+def test_run_each_handles_payloads_as_they_arrive(mock_logger):
+    unhandled = []
+    peak = []
+
+    def handler(request):
+        unhandled.append(request)
+        peak.append(len(unhandled))
+        return httpx.Response(200, json={"data": [1, 2]})
+
+    def handle(job, data):
+        unhandled.pop()
+        return len(data["data"])
+
+    extractor = AsyncExtractor(max_concurrency=2, logger=mock_logger,
+                               transport=httpx.MockTransport(handler))
+
+    rows = extractor.run_each([Job("carbon", "https://mock_url")] * 10, handle)
+
+    assert rows == 20
+    assert max(peak) <= 2
+
+
+def test_save_result_uploads_every_window(mock_logger):
+    job = Job("generation", "https://mock_url", start=START, end=START + timedelta(days=1))
+
+    with patch.object(extract_generation, "CustomDataProcessor") as mock_processor:
+        mock_processor.return_value.process_data.return_value = None
+        save_result(job, {"data": []}, mock_logger)
+
+    # Not compared with, or stored over, the scheduled extract's hash
+    assert mock_processor.return_value.skip_unchanged is False
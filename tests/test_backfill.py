@@ -0,0 +1,67 @@
+"""
+Test script for backfill.py
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from pipeline.backfill import Backfill, parse_time
+
+START = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def test_parse_time_defaults_to_utc():
+    assert parse_time("2000-01-01") == START
+    assert parse_time("2000-01-01T01:00:00+01:00") == START
+
+
+def test_window_processor_names_each_window(mock_logger):
+    backfill = Backfill("generation", logger=mock_logger)
+
+    processor = backfill.window_processor(START, START + timedelta(days=1))
+
+    assert processor.s3_file_name == \
+        "raw_generation_data_20000101T0000_20000102T0000.feather"
+    assert processor.save_location.endswith(processor.s3_file_name)
+    # Not compared with, or stored over, the scheduled extract's hash
+    assert processor.skip_unchanged is False
+
+
+def test_run_streams_windows_and_reports_throughput(mock_logger):
+    backfill = Backfill("demand", logger=mock_logger)
+    windows = [(START, START + timedelta(days=1), {"data": [{}, {}]}),
+               (START + timedelta(days=1), START + timedelta(days=2), None)]
+
+    with patch.object(backfill.api_client, "fetch_range", return_value=iter(windows)), \
+         patch.object(backfill, "save_window", side_effect=[2, 0]) as mock_save, \
+         patch("pipeline.extract_demand.CustomDataProcessor.get_s3_client",
+               return_value=MagicMock()):
+        report = backfill.run(START, START + timedelta(days=2))
+
+    assert mock_save.call_count == 2
+    assert report["rows"] == 2
+    assert report["windows"] == 2
+    assert report["rows_per_second"] > 0
+
+
+def test_save_window_without_data(mock_logger):
+    backfill = Backfill("demand", logger=mock_logger)
+
+    assert backfill.save_window(START, START + timedelta(days=1), None) == 0
+
+
+def test_save_windows_uploads_concurrently(mock_logger):
+    backfill = Backfill("demand", logger=mock_logger)
+    windows = [(START + timedelta(days=i), START + timedelta(days=i + 1), {"data": []})
+               for i in range(3)]
+    barrier = threading.Barrier(3, timeout=5)
+
+    def save_window(start, end, data):
+        # Only passes if all three windows are being saved at once
+        barrier.wait()
+        return 1
+
+    with patch.object(backfill, "save_window", side_effect=save_window):
+        results = list(backfill.save_windows(iter(windows)))
+
+    assert sorted(results) == [(start, end, 1) for start, end, _ in windows]
@@ -0,0 +1,85 @@
+"""
+Test script for cache.py
+"""
+from unittest.mock import MagicMock
+
+import pytest
+from requests.exceptions import HTTPError
+
+from pipeline.cache import ResponseCache
+
+
+def make_response(status_code=200, data=None, headers=None):
+    response = MagicMock(status_code=status_code, headers=headers or {})
+    response.json.return_value = data
+    if status_code >= 400:
+        response.raise_for_status.side_effect = HTTPError(str(status_code))
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path, mock_logger):
+    return ResponseCache(mock_logger, directory=str(tmp_path),
+                         ttls={"https://fresh": 60, "https://stale": 0})
+
+
+def test_key_depends_on_url_and_params(cache):
+    assert cache.key("https://fresh", {"a": 1, "b": 2}) == \
+        cache.key("https://fresh", {"b": 2, "a": 1})
+    assert cache.key("https://fresh", {"a": 1}) != cache.key("https://fresh", {"a": 2})
+    assert cache.key("https://fresh") != cache.key("https://stale")
+
+
+def test_fresh_entry_skips_network(cache, mock_session):
+    mock_session.get.return_value = make_response(data={"data": "Battle of Agincourt"})
+
+    first = cache.fetch(mock_session, "https://fresh")
+    second = cache.fetch(mock_session, "https://fresh")
+
+    assert first == second == {"data": "Battle of Agincourt"}
+    assert mock_session.get.call_count == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_stale_entry_revalidates(cache, mock_session):
+    mock_session.get.return_value = make_response(
+        data={"data": "Battle of Agincourt"},
+        headers={"ETag": '"v1"', "Last-Modified": "Fri, 25 Oct 1415 09:00:00 GMT"})
+    cache.fetch(mock_session, "https://stale")
+
+    mock_session.get.return_value = make_response(status_code=304)
+    data = cache.fetch(mock_session, "https://stale")
+
+    _, kwargs = mock_session.get.call_args
+    assert kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert kwargs["headers"]["If-Modified-Since"] == "Fri, 25 Oct 1415 09:00:00 GMT"
+    assert data == {"data": "Battle of Agincourt"}
+    assert cache.revalidated == 1
+
+
+def test_errors_are_raised_and_not_cached(cache, mock_session):
+    mock_session.get.return_value = make_response(status_code=503)
+
+    with pytest.raises(HTTPError):
+        cache.fetch(mock_session, "https://fresh")
+
+    assert cache.read(cache.key("https://fresh")) is None
+
+
+def test_unreadable_entry_is_a_miss(cache, mock_session, tmp_path):
+    (tmp_path / f"{cache.key('https://fresh')}.pickle").write_bytes(b"not a pickle")
+    mock_session.get.return_value = make_response(data={"data": []})
+
+    assert cache.fetch(mock_session, "https://fresh") == {"data": []}
+    assert cache.misses == 1
+
+
+def test_api_client_uses_cache(api_client_carbon, cache):
+    api_client_carbon.cache = cache
+    api_client_carbon.base_url = "https://fresh"
+    api_client_carbon.session.get.return_value = make_response(data={"data": []})
+
+    api_client_carbon.fetch_data()
+    api_client_carbon.fetch_data()
+
+    assert api_client_carbon.session.get.call_count == 1
@@ -0,0 +1,53 @@
+"""
+Test script for clients.py
+"""
+from unittest.mock import MagicMock, patch
+
+from pipeline.clients import clear_clients, construction_times, get_client
+
+
+@patch("pipeline.clients.boto3.client")
+def test_get_client_builds_each_client_once(mock_boto_client):
+    mock_boto_client.side_effect = lambda *args, **kwargs: MagicMock()
+
+    first = get_client("s3", "eu-west-2", "key", "secret")
+    second = get_client("s3", "eu-west-2", "key", "secret")
+
+    assert first is second
+    mock_boto_client.assert_called_once_with("s3", aws_access_key_id="key",
+                                             aws_secret_access_key="secret",
+                                             region_name="eu-west-2")
+    assert list(construction_times()) == ["s3 (eu-west-2)"]
+
+
+@patch("pipeline.clients.boto3.client")
+def test_get_client_keys_on_service_region_and_credentials(mock_boto_client):
+    mock_boto_client.side_effect = lambda *args, **kwargs: MagicMock()
+
+    clients = {get_client("s3", "eu-west-2", "key", "secret"),
+               get_client("ses", "eu-west-2", "key", "secret"),
+               get_client("s3", "us-east-1", "key", "secret"),
+               get_client("s3", "eu-west-2", "other", "secret")}
+
+    assert len(clients) == 4
+
+
+@patch("pipeline.clients.boto3.client")
+def test_clear_clients(mock_boto_client):
+    mock_boto_client.side_effect = lambda *args, **kwargs: MagicMock()
+    first = get_client("s3")
+
+    clear_clients()
+
+    assert get_client("s3") is not first
+    assert mock_boto_client.call_count == 2
+
+
+@patch("pipeline.clients.boto3.client")
+def test_processors_share_a_client(mock_boto_client, data_processor):
+    data_processor.get_s3_client()
+    data_processor.s3_client = None
+
+    data_processor.get_s3_client()
+
+    mock_boto_client.assert_called_once()
@@ -0,0 +1,110 @@
+"""
+Test script for compact.py
+"""
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+
+from pipeline.common import DataProcessor, compacted_key, list_partitions
+from pipeline.compact import Compactor, compactable_days
+from pipeline.schemas import TIMESTAMP, apply_schema
+from pipeline.storage import MemoryStorage
+
+DAY = date(2024, 1, 1)
+
+
+def save_run(storage, mock_logger, run_id, rows):
+    processor = DataProcessor("unused", None, None, None, "", "mock_bucket", mock_logger,
+                              keep_local_copy=False, dataset="generation",
+                              time_column="startTime", storage=storage)
+    processor.run_id = run_id
+    processor.save_data_locally(pd.DataFrame(rows, columns=["startTime", "publishTime",
+                                                            "fuelType", "generation"]))
+    processor.save_data_to_s3()
+
+
+def serialize(df):
+    sink = pa.BufferOutputStream()
+    df.to_feather(sink)
+    return sink.getvalue()
+
+
+def read(storage, key):
+    return pd.read_feather(pa.BufferReader(storage.get(key)))
+
+
+def test_compact_day_merges_and_retires_run_files(mock_logger):
+    storage = MemoryStorage()
+    save_run(storage, mock_logger, "run-1", [
+        ("2024-01-01T00:00:00Z", "2024-01-01T00:00:00Z", "WIND", 1),
+        ("2024-01-01T05:00:00Z", "2024-01-01T05:00:00Z", "WIND", 2)])
+    save_run(storage, mock_logger, "run-2", [
+        ("2024-01-01T05:00:00Z", "2024-01-01T05:00:00Z", "WIND", 3),
+        ("2024-01-01T00:00:00Z", "2024-01-01T00:00:00Z", "CCGT", 4)])
+    save_run(storage, mock_logger, "run-3", [
+        ("2024-01-02T00:00:00Z", "2024-01-02T00:00:00Z", "WIND", 5)])
+
+    report = Compactor(storage, mock_logger).compact_day("generation", DAY)
+
+    target = compacted_key("generation", DAY)
+    assert [item["Key"] for item in storage.list("dataset=generation/date=2024-01-01/")] == [target]
+    df = read(storage, target)
+    assert list(zip(df["fuelType"], df["generation"])) == [("CCGT", 4), ("WIND", 1), ("WIND", 3)]
+    assert report["reclaimed_objects"] == 3
+    # The other day is left alone
+    assert len(list(storage.list("dataset=generation/date=2024-01-02/"))) == 1
+
+
+def test_compact_day_is_safe_to_rerun(mock_logger):
+    storage = MemoryStorage()
+    save_run(storage, mock_logger, "run-1", [
+        ("2024-01-01T00:00:00Z", "2024-01-01T00:00:00Z", "WIND", 1)])
+    compactor = Compactor(storage, mock_logger)
+    compactor.compact_day("generation", DAY)
+
+    assert compactor.compact_day("generation", DAY)["reclaimed_objects"] == 0
+
+    # Late run files are merged with the compacted one, and win
+    save_run(storage, mock_logger, "run-2", [
+        ("2024-01-01T00:00:00Z", "2024-01-01T00:00:00Z", "WIND", 9),
+        ("2024-01-01T01:00:00Z", "2024-01-01T01:00:00Z", "WIND", 2)])
+    report = compactor.compact_day("generation", DAY)
+
+    assert report["reclaimed_objects"] == 2
+    assert read(storage, compacted_key("generation", DAY))["generation"].tolist() == [9, 2]
+
+
+def test_compact_day_merges_files_from_before_and_after_typing(mock_logger):
+    storage = MemoryStorage()
+    rows = [("2024-01-01T00:00:00Z", "2024-01-01T00:00:00Z", "WIND", 1)]
+    save_run(storage, mock_logger, "run-1", rows)
+    typed = apply_schema(pd.DataFrame(rows, columns=["startTime", "publishTime",
+                                                     "fuelType", "generation"]), "generation")
+    storage.put("dataset=generation/date=2024-01-01/hour=00/run-2.feather",
+                serialize(typed))
+
+    Compactor(storage, mock_logger).compact_day("generation", DAY)
+
+    df = read(storage, compacted_key("generation", DAY))
+    assert len(df) == 1
+    assert str(df["startTime"].dtype) == TIMESTAMP
+
+
+def test_compacted_files_are_listed_with_their_day(mock_logger):
+    storage = MemoryStorage()
+    storage.put(compacted_key("demand", DAY), b"")
+    storage.put("dataset=demand/date=2024-01-02/hour=00/run.feather", b"")
+    start = datetime(2024, 1, 1, 23, tzinfo=timezone.utc)
+
+    keys = list_partitions(storage, "demand", start, start + timedelta(hours=2))
+
+    assert keys == ["dataset=demand/date=2024-01-01/compacted.feather",
+                    "dataset=demand/date=2024-01-02/hour=00/run.feather"]
+
+
+def test_compactable_days_skip_the_transform_lookback():
+    now = datetime(2024, 1, 10, 6, tzinfo=timezone.utc)
+
+    # The lookback reaches back into the 9th, so the 8th is the latest
+    assert compactable_days(3, now) == [date(2024, 1, 6), date(2024, 1, 7), date(2024, 1, 8)]
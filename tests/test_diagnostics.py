@@ -0,0 +1,62 @@
+"""
+Test script for diagnostics.py
+"""
+import gzip
+import json
+import logging
+
+import pandas as pd
+
+from pipeline.diagnostics import Diagnostics
+
+FRAME = pd.DataFrame({
+    "startTime": ["2024-01-01T00:30:00Z", "2024-01-01T00:00:00Z", "2024-01-01T01:00:00Z"],
+    "fuelType": ["WIND", "CCGT", "WIND"],
+    "generation": [100, None, 300],
+})
+
+
+def test_summarise(mock_logger):
+    diagnostics = Diagnostics("generation", mock_logger,
+                              time_column="startTime", group_column="fuelType")
+
+    summary = diagnostics.summarise(FRAME)
+
+    assert summary["rows"] == 3
+    assert summary["dtypes"]["generation"] == "float64"
+    assert summary["nulls"] == {"generation": 1}
+    assert summary["time_range"] == ("2024-01-01T00:00:00Z", "2024-01-01T01:00:00Z")
+    assert summary["counts"] == {"WIND": 2, "CCGT": 1}
+
+
+def test_log_summary_skipped_without_debug(mock_logger):
+    mock_logger.isEnabledFor.return_value = False
+    diagnostics = Diagnostics("generation", mock_logger)
+
+    diagnostics.log_summary(FRAME)
+
+    mock_logger.isEnabledFor.assert_called_once_with(logging.DEBUG)
+    mock_logger.debug.assert_not_called()
+
+
+def test_dump_payload_disabled_by_default(mock_logger, tmp_path):
+    diagnostics = Diagnostics("generation", mock_logger, directory=str(tmp_path))
+
+    assert diagnostics.dump_payload({"data": [1, 2, 3]}) is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_dump_payload_writes_gzipped_sample(mock_logger, tmp_path):
+    diagnostics = Diagnostics("generation", mock_logger, dump_payloads=True,
+                              sample_size=10, directory=str(tmp_path))
+
+    path = diagnostics.dump_payload({"total": 100, "data": list(range(100))})
+
+    with gzip.open(path, "rt") as file_data:
+        assert json.load(file_data) == {"total": 100, "data": list(range(0, 100, 10))}
+
+
+def test_sample_frame(mock_logger):
+    diagnostics = Diagnostics("generation", mock_logger, sample_size=2)
+
+    assert len(diagnostics.sample(FRAME)) == 2
@@ -2,13 +2,13 @@
 Test script for extract_production.py
 """
 import pandas as pd
+from mock_data.mock_dataframes import utc
 from pipeline.extract_carbon import CustomDataProcessor
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 from requests.exceptions import RequestException
 
 
-@patch('pipeline.extract_carbon.requests.get')
-def test_fetch_data_success(mock_get, api_client_carbon):
+def test_fetch_data_success(api_client_carbon):
     """
     Test the fetch_data method with a successful API response.
     """
@@ -16,6 +16,7 @@ def test_fetch_data_success(mock_get, api_client_carbon):
     mock_response = MagicMock()
     mock_response.json.return_value = {'data': 'Battle of Orléans'}
     mock_response.raise_for_status.return_value = None
+    mock_get = api_client_carbon.session.get
     mock_get.return_value = mock_response
 
     result = api_client_carbon.fetch_data()
@@ -25,11 +26,11 @@ def test_fetch_data_success(mock_get, api_client_carbon):
     assert result == {'data': 'Battle of Orléans'}
 
 
-@patch('pipeline.extract_carbon.requests.get')
-def test_fetch_data_failure(mock_get, api_client_carbon):
+def test_fetch_data_failure(api_client_carbon):
     """
     Test the fetch_data method when the API request fails.
     """
+    mock_get = api_client_carbon.session.get
     mock_get.side_effect = RequestException("API request failed")
 
     result = api_client_carbon.fetch_data()
@@ -52,10 +53,10 @@ def test_process_data_with_valid_data():
     }
 
     expected_df = pd.DataFrame({
-        'from': ["1066-09-14T00:00Z", "1066-09-14T00:30Z"],
-        'to': ["1066-09-14T00:30Z", "1066-09-14T01:00Z"],
-        'forecast': [0, 1000000],
-        'carbon level': ["very low", "very high"]
+        'from': utc(["1066-09-14T00:00", "1066-09-14T00:30"]),
+        'to': utc(["1066-09-14T00:30", "1066-09-14T01:00"]),
+        'forecast': pd.Series([0, 1000000], dtype="int32"),
+        'carbon level': pd.Categorical(["very low", "very high"])
     })
 
     processor = CustomDataProcessor()
@@ -6,7 +6,7 @@ from pipeline.extract_demand import CustomDataProcessor
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timezone, timedelta
 from requests.exceptions import RequestException
-from mock_data.mock_dataframes import get_dated_mock_dataframe
+from mock_data.mock_dataframes import get_dated_mock_dataframe, utc
 
 
 def test_construct_default_params_manual(api_client_demand):
@@ -52,8 +52,7 @@ def test_construct_default_params_dynamic(api_client_demand):
 
         
 @patch('pipeline.extract_demand.APIClient.construct_default_params')
-@patch('pipeline.extract_demand.requests.get')
-def test_fetch_data_success(mock_get, mock_construct_default_params, api_client_demand):
+def test_fetch_data_success(mock_construct_default_params, api_client_demand):
     """
     Test the fetch_data method with a successful API response, using mocked construct_default_params.
     """
@@ -68,6 +67,7 @@ def test_fetch_data_success(mock_get, mock_construct_default_params, api_client_
     mock_response = MagicMock()
     mock_response.json.return_value = {'data': 'some_data'}
     mock_response.raise_for_status.return_value = None
+    mock_get = api_client_demand.session.get
     mock_get.return_value = mock_response
 
     result = api_client_demand.fetch_data()
@@ -77,11 +77,11 @@ def test_fetch_data_success(mock_get, mock_construct_default_params, api_client_
     # Assert the result returned by fetch_data is as expected
     assert result == {'data': 'some_data'}
 
-@patch('pipeline.extract_demand.requests.get')
-def test_fetch_data_failure(mock_get, api_client_demand):
+def test_fetch_data_failure(api_client_demand):
     """
     Test the fetch_data method when the API request fails.
     """
+    mock_get = api_client_demand.session.get
     mock_get.side_effect = RequestException("API request failed")
 
     result = api_client_demand.fetch_data()
@@ -102,11 +102,14 @@ def test_process_data_with_valid_data():
     df, time_period = processor.process_data(sample_data)
 
     expected_time_period = {
-        "From": pd.Timestamp("1969-12-31T23:00:00"),
-        "To": pd.Timestamp("1999-12-31T23:00:00")
+        "From": pd.Timestamp("1969-12-31T23:00:00", tz="UTC"),
+        "To": pd.Timestamp("1999-12-31T23:00:00", tz="UTC")
     }
 
-    pd.testing.assert_frame_equal(df, mock_df)
+    pd.testing.assert_frame_equal(df, mock_df.assign(
+        publishTime=utc(mock_df["publishTime"]),
+        startTime=utc(mock_df["startTime"]),
+        settlementPeriod=mock_df["settlementPeriod"].astype("int8")))
     
     assert time_period == expected_time_period
 
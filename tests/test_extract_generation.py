@@ -1,12 +1,13 @@
 """
 Test script for extract_production.py
 """
+import json
 import pandas as pd
 from pipeline.extract_generation import CustomDataProcessor
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timezone, timedelta
 from requests.exceptions import RequestException
-from mock_data.mock_dataframes import get_dated_mock_dataframe
+from mock_data.mock_dataframes import get_dated_mock_dataframe, utc
 
 
 def test_construct_default_params_manual(api_client_generation):
@@ -52,8 +53,7 @@ def test_construct_default_params_dynamic(api_client_generation):
 
 
 @patch('pipeline.extract_generation.APIClient.construct_default_params')
-@patch('pipeline.extract_generation.requests.get')
-def test_fetch_data_success(mock_get, mock_construct_default_params, api_client_generation):
+def test_fetch_data_success(mock_construct_default_params, api_client_generation):
     """
     Test the fetch_data method with a successful API response, using mocked construct_default_params.
     """
@@ -68,6 +68,7 @@ def test_fetch_data_success(mock_get, mock_construct_default_params, api_client_
     mock_response = MagicMock()
     mock_response.json.return_value = {'data': 'some_data'}
     mock_response.raise_for_status.return_value = None
+    mock_get = api_client_generation.session.get
     mock_get.return_value = mock_response
 
     result = api_client_generation.fetch_data()
@@ -77,11 +78,11 @@ def test_fetch_data_success(mock_get, mock_construct_default_params, api_client_
     # Assert the result returned by fetch_data is as expected
     assert result == {'data': 'some_data'}
 
-@patch('pipeline.extract_generation.requests.get')
-def test_fetch_data_failure(mock_get, api_client_generation):
+def test_fetch_data_failure(api_client_generation):
     """
     Test the fetch_data method when the API request fails.
     """
+    mock_get = api_client_generation.session.get
     mock_get.side_effect = RequestException("API request failed")
 
     result = api_client_generation.fetch_data()
@@ -99,15 +100,18 @@ def test_process_data_with_valid_data():
     sample_data = {"data": mock_df.to_dict(orient='records')}
 
     expected_time_period = {
-        "publishTimeStart": pd.Timestamp("1970-01-01T00:00:00"),
-        "publishTimeEnd": pd.Timestamp("2000-01-01T00:00:00")
+        "publishTimeStart": pd.Timestamp("1970-01-01T00:00:00", tz="UTC"),
+        "publishTimeEnd": pd.Timestamp("2000-01-01T00:00:00", tz="UTC")
     }
 
     processor = CustomDataProcessor()
 
     df, time_period = processor.process_data(sample_data)
 
-    pd.testing.assert_frame_equal(df, mock_df)
+    pd.testing.assert_frame_equal(df, mock_df.assign(
+        publishTime=utc(mock_df["publishTime"]),
+        startTime=utc(mock_df["startTime"]),
+        settlementPeriod=mock_df["settlementPeriod"].astype("int8")))
     assert time_period == expected_time_period
 
 def test_process_data_with_no_data(caplog):
@@ -133,4 +137,65 @@ def test_process_data_with_missing_data_key(caplog):
 
     assert result is None
 
-    assert "No data found in response." in caplog.text
\ No newline at end of file
+    assert "No data found in response." in caplog.text
+def test_construct_incremental_params(api_client_generation):
+    """
+    With a watermark, the window starts at the watermark less the overlap.
+    """
+    fixed_now = datetime(2000, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+    watermark = MagicMock()
+    watermark.window_start.return_value = datetime(1999, 12, 31, 23, 0, 0, tzinfo=timezone.utc)
+    api_client_generation.watermark = watermark
+
+    with patch('pipeline.extract_generation.datetime') as mock_datetime:
+        mock_datetime.now.return_value = fixed_now
+
+        params = api_client_generation.construct_params()
+
+    watermark.window_start.assert_called_once_with(fixed_now - timedelta(hours=12))
+    assert params == {
+        'publishDateTimeFrom': '1999-12-31T23:00:00+00:00',
+        'publishDateTimeTo': fixed_now.isoformat(),
+        'format': 'json'
+    }
+
+def test_construct_params_without_watermark(api_client_generation):
+    """
+    Without a watermark, the full 12-hour window is used.
+    """
+    with patch.object(api_client_generation, 'construct_default_params') as mock_default:
+        assert api_client_generation.construct_params() == mock_default.return_value
+
+def test_fetch_frame_streams_response(api_client_generation):
+    """
+    fetch_frame decodes the streamed body into the same frame as fetch_data.
+    """
+    records = [{"startTime": "2000-01-01T00:00:00Z", "fuelType": "WIND",
+                "settlementPeriod": 1, "generation": 100}]
+    response = api_client_generation.session.get.return_value.__enter__.return_value
+    response.iter_content.return_value = [json.dumps({"data": records}).encode()]
+
+    with patch.object(api_client_generation, 'construct_params', return_value={}):
+        df = api_client_generation.fetch_frame()
+
+    pd.testing.assert_frame_equal(df, pd.DataFrame(records))
+    api_client_generation.session.get.assert_called_once_with(
+        api_client_generation.base_url, params={}, stream=True)
+
+def test_process_data_with_empty_frame(caplog):
+    """
+    An empty streamed frame is treated like a response with no data.
+    """
+    assert CustomDataProcessor().process_data(pd.DataFrame()) is None
+    assert "No data found in response." in caplog.text
+
+@patch("pipeline.extract_generation.EXTRACT_MODE", "incremental")
+def test_build_main_keeps_the_watermark_in_the_storage_backend():
+    from pipeline import extract_generation
+
+    s3_client = MagicMock()
+    main = extract_generation.build_main(s3_client=s3_client)
+
+    storage = main.api_client.watermark.storage
+    assert storage.s3_client is s3_client
+    assert storage.bucket == main.data_processor.bucket
@@ -0,0 +1,81 @@
+"""
+Test script for extract_to_s3.py
+"""
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from pipeline.extract_to_s3 import pipeline, run_source
+
+
+def make_source(execute):
+    """
+    Builds a stand-in extract module whose workflow runs `execute`.
+    """
+    build_main = MagicMock()
+    build_main.return_value.execute.side_effect = execute
+    return SimpleNamespace(build_main=build_main)
+
+
+def test_run_source_success(mock_logger):
+    source = make_source(lambda: "data")
+
+    report = run_source("sweets", source, mock_logger)
+
+    assert report["source"] == "sweets"
+    assert report["succeeded"] is True
+    assert report["unchanged"] is False
+    assert report["seconds"] >= 0
+
+
+def test_run_source_reports_unchanged_data(mock_logger):
+    source = make_source(lambda: "data")
+    source.build_main.return_value.data_processor.skipped_upload = True
+
+    assert run_source("sweets", source, mock_logger)["unchanged"] is True
+
+
+def test_run_source_handles_exception(mock_logger):
+    def explode():
+        raise RuntimeError("Battle of Hastings")
+
+    report = run_source("sweets", make_source(explode), mock_logger)
+
+    assert report["succeeded"] is False
+    message, name, error = mock_logger.error.call_args_list[0][0]
+    assert message == "extract_%s raised an error: %s"
+    assert name == "sweets"
+    assert str(error) == "Battle of Hastings"
+
+
+def test_pipeline_runs_sources_concurrently():
+    """
+    Two sources that each sleep should take about as long as one of them.
+    """
+    def slow():
+        time.sleep(0.2)
+        return "data"
+
+    sources = {"sherbet": make_source(slow), "liquorice": make_source(slow)}
+
+    start = time.perf_counter()
+    reports = pipeline(sources, max_workers=2)
+    elapsed = time.perf_counter() - start
+
+    assert {report["source"] for report in reports} == {"sherbet", "liquorice"}
+    assert all(report["succeeded"] for report in reports)
+    assert elapsed < 0.35
+
+
+def test_pipeline_failure_does_not_block_others():
+    def fail():
+        raise RuntimeError("API down")
+
+    sources = {"sherbet": make_source(fail), "liquorice": make_source(lambda: None),
+               "bon-bon": make_source(lambda: "data")}
+
+    reports = {report["source"]: report for report in pipeline(sources)}
+
+    assert reports["sherbet"]["succeeded"] is False
+    assert reports["liquorice"]["succeeded"] is False
+    assert reports["bon-bon"]["succeeded"] is True
@@ -0,0 +1,78 @@
+"""
+Test script for flatten.py
+"""
+import pandas as pd
+import pyarrow as pa
+import pytest
+from mock_data.mock_dataframes import utc
+
+from pipeline.extract_piechart import CustomDataProcessor
+from pipeline.flatten import flatten_records
+
+MIX = {
+    "from": "2024-08-18T23:00Z",
+    "to": "2024-08-18T23:30Z",
+    "generationmix": [{"fuel": "gas", "perc": 20.5}, {"fuel": "wind", "perc": 40}],
+}
+
+
+def test_flatten_records_nested_fields():
+    records = [{"from": "a", "intensity": {"forecast": 10, "index": "low"}},
+               {"from": "b", "intensity": {"forecast": 300, "index": "high"}}]
+
+    df = flatten_records(records, {"from": "from",
+                                   "forecast": "intensity.forecast",
+                                   "level": "intensity.index"})
+
+    pd.testing.assert_frame_equal(df, pd.DataFrame({"from": ["a", "b"],
+                                                    "forecast": [10, 300],
+                                                    "level": ["low", "high"]}))
+
+
+def test_flatten_records_missing_field_is_null():
+    df = flatten_records([{"a": 1}], {"a": "a", "b": "b.c"})
+
+    assert df["b"].isna().all()
+
+
+def test_flatten_records_explodes_lists():
+    second = {**MIX, "from": "2024-08-18T23:30Z", "generationmix": [{"fuel": "coal", "perc": 1}]}
+    empty = {**MIX, "generationmix": []}
+
+    df = flatten_records([MIX, empty, second],
+                         {"from": "from", "fuel": "generationmix.fuel"},
+                         explode="generationmix")
+
+    assert df.values.tolist() == [["2024-08-18T23:00Z", "gas"],
+                                  ["2024-08-18T23:00Z", "wind"],
+                                  ["2024-08-18T23:30Z", "coal"]]
+
+
+def test_flatten_records_explode_requires_list():
+    with pytest.raises(ValueError):
+        flatten_records([MIX], {"from": "from"}, explode="from")
+
+
+def test_piechart_process_data_one_row_per_fuel():
+    df = CustomDataProcessor().process_data({"data": MIX})
+
+    pd.testing.assert_frame_equal(df, pd.DataFrame({
+        "from": utc(["2024-08-18T23:00"] * 2),
+        "to": utc(["2024-08-18T23:30"] * 2),
+        "fuel_type": pd.Categorical(["gas", "wind"]),
+        "percentage": [20.5, 40.0],
+    }))
+
+
+def test_flatten_records_with_types_skips_inference():
+    records = [{"from": "a", "extra": [1], "generationmix": [{"fuel": "gas", "perc": 1}]},
+               {"from": "b", "generationmix": [{"fuel": "wind", "perc": 2.5}]}]
+    columns = {"from": "from", "fuel": "generationmix.fuel", "perc": "generationmix.perc"}
+
+    df = flatten_records(records, columns, explode="generationmix",
+                         types={"from": pa.string(), "fuel": pa.string(),
+                                "perc": pa.float64()})
+
+    pd.testing.assert_frame_equal(df, pd.DataFrame({"from": ["a", "b"],
+                                                    "fuel": ["gas", "wind"],
+                                                    "perc": [1.0, 2.5]}))
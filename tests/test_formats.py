@@ -0,0 +1,77 @@
+"""
+Test script for formats.py
+"""
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from pipeline.formats import format_of, read_frame, with_format, write_frame
+from pipeline.schemas import apply_schema
+
+FRAME = pd.DataFrame({
+    "startTime": [f"2024-01-01T{hour:02}:00:00Z" for hour in reversed(range(24))],
+    "fuelType": ["WIND", "CCGT"] * 12,
+    "generation": range(24),
+})
+START = datetime(2024, 1, 1, 3, tzinfo=timezone.utc)
+END = datetime(2024, 1, 1, 6, tzinfo=timezone.utc)
+
+
+def serialize(storage_format):
+    sink = pa.BufferOutputStream()
+    write_frame(FRAME, sink, storage_format, time_column="startTime")
+    return sink.getvalue()
+
+
+def test_format_names():
+    assert format_of("dataset=demand/date=2024-01-01/hour=00/run.parquet") == "parquet"
+    assert format_of("raw_demand_data.feather") == "feather"
+    assert with_format("raw_demand_data.feather", "parquet") == "raw_demand_data.parquet"
+    assert with_format("mock_path", "parquet") == "mock_path"
+
+
+def test_parquet_is_sorted_compressed_and_has_statistics():
+    metadata = pq.ParquetFile(pa.BufferReader(serialize("parquet"))).metadata
+    column = metadata.row_group(0).column(0)
+
+    assert column.compression == "ZSTD"
+    assert column.statistics.min == "2024-01-01T00:00:00Z"
+    assert column.statistics.max == "2024-01-01T23:00:00Z"
+    assert "RLE_DICTIONARY" in metadata.row_group(0).column(1).encodings
+
+
+def test_parquet_dictionary_encodes_typed_categoricals():
+    sink = pa.BufferOutputStream()
+    write_frame(apply_schema(FRAME, "generation"), sink, "parquet", time_column="startTime")
+
+    metadata = pq.ParquetFile(pa.BufferReader(sink.getvalue())).metadata
+    assert "RLE_DICTIONARY" in metadata.row_group(0).column(1).encodings
+
+
+@pytest.mark.parametrize("storage_format", ["feather", "parquet"])
+def test_read_frame_filters_time_and_fuel(storage_format):
+    df = read_frame(serialize(storage_format), storage_format,
+                    columns=["startTime", "generation"], time_column="startTime",
+                    start=START, end=END, fuel_types=["WIND"])
+
+    assert sorted(df["startTime"]) == ["2024-01-01T03:00:00Z", "2024-01-01T05:00:00Z"]
+    assert list(df.columns) == ["startTime", "generation"]
+
+
+def test_read_frame_string_bounds_match_either_iso_form():
+    df = pd.DataFrame({"from": ["2024-01-01T02:30Z", "2024-01-01T03:00Z",
+                                "2024-01-01T05:30Z", "2024-01-01T06:00Z"]})
+    sink = pa.BufferOutputStream()
+    write_frame(df, sink, "parquet", time_column="from")
+
+    result = read_frame(sink.getvalue(), "parquet", time_column="from", start=START, end=END)
+
+    assert result["from"].tolist() == ["2024-01-01T03:00Z", "2024-01-01T05:30Z"]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        write_frame(FRAME, pa.BufferOutputStream(), "csv")
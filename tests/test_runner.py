@@ -0,0 +1,41 @@
+"""
+Test script for runner.py
+"""
+from unittest.mock import MagicMock, patch
+
+from pipeline import runner
+
+
+@patch('pipeline.runner.get_shared_s3_client')
+@patch('pipeline.runner.pipeline')
+def test_run_shares_one_s3_client(mock_pipeline, mock_get_client, mock_logger):
+    mock_pipeline.return_value = [{"source": "carbon", "succeeded": True}]
+
+    result = runner.run(["carbon", "piechart"], logger=mock_logger)
+
+    sources = mock_pipeline.call_args[0][0]
+    assert list(sources) == ["carbon", "piechart"]
+    assert mock_pipeline.call_args[1]["s3_client"] is mock_get_client.return_value
+    mock_get_client.assert_called_once()
+    assert result["reports"] == mock_pipeline.return_value
+    assert set(result["timings"]) == {"startup", "extract", "total"}
+
+
+@patch('pipeline.transform.main')
+@patch('pipeline.runner.get_shared_s3_client')
+@patch('pipeline.runner.pipeline')
+def test_run_with_transform(mock_pipeline, mock_get_client, mock_transform_main,
+                            mock_logger):
+    result = runner.run(["demand"], transform=True, logger=mock_logger)
+
+    mock_transform_main.assert_called_once_with(s3_client=mock_get_client.return_value)
+    assert "transform" in result["timings"]
+
+
+def test_build_main_reuses_s3_client():
+    from pipeline import extract_carbon
+
+    s3_client = MagicMock()
+    main = extract_carbon.build_main(s3_client=s3_client)
+
+    assert main.data_processor.get_s3_client() is s3_client
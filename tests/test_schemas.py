@@ -0,0 +1,60 @@
+"""
+Test script for schemas.py
+"""
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+
+from pipeline.schemas import ARROW_TYPES, TIMESTAMP, apply_schema, cast_table, memory_report
+
+GENERATION = pd.DataFrame({
+    "dataset": ["FUELINST"] * 4,
+    "publishTime": ["2024-08-18T23:00:00Z", "2024-08-18T23:00:00Z",
+                    "2024-08-18T23:05:00Z", "2024-08-18T23:05:00Z"],
+    "settlementPeriod": [47, 47, 48, 48],
+    "fuelType": ["WIND", "CCGT", "WIND", "CCGT"],
+    "generation": [1200, -5, 1180, 0],
+})
+
+
+def test_apply_schema_types_the_declared_columns(mock_logger):
+    df = apply_schema(GENERATION, "generation", mock_logger)
+
+    assert df.dtypes.astype(str).to_dict() == {
+        "dataset": "category", "publishTime": TIMESTAMP, "settlementPeriod": "int8",
+        "fuelType": "category", "generation": "float32"}
+    assert df["publishTime"][2] == datetime(2024, 8, 18, 23, 5, tzinfo=timezone.utc)
+    assert df["generation"].tolist() == [1200, -5, 1180, 0]
+    assert "Typed %s data" in mock_logger.info.call_args[0][0]
+    # Already typed, so nothing is converted (or logged) again
+    assert apply_schema(df, "generation", mock_logger) is df
+    assert mock_logger.info.call_count == 1
+
+
+def test_apply_schema_keeps_missing_integers():
+    df = apply_schema(pd.DataFrame({"settlementPeriod": [1, None]}), "demand")
+
+    assert str(df["settlementPeriod"].dtype) == "Int8"
+    assert df["settlementPeriod"].isna().tolist() == [False, True]
+
+
+def test_apply_schema_leaves_other_datasets_alone():
+    assert apply_schema(GENERATION, "cost") is GENERATION
+
+
+def test_cast_table_agrees_old_and_new_files():
+    old = pa.Table.from_pandas(GENERATION)
+    new = pa.Table.from_pandas(apply_schema(GENERATION, "generation"))
+
+    assert cast_table(old, "generation").schema == cast_table(new, "generation").schema
+    assert cast_table(old, "generation").schema.field("fuelType").type == ARROW_TYPES["category"]
+
+
+def test_memory_report_shows_the_saving():
+    df = pd.concat([GENERATION] * 1000, ignore_index=True)
+
+    report = memory_report(df, apply_schema(df, "generation"))
+
+    assert report["after"] < report["before"] / 4
+    assert report["saved"] == 1 - report["after"] / report["before"]
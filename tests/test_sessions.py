@@ -0,0 +1,50 @@
+"""
+Test script for sessions.py
+"""
+from unittest.mock import MagicMock, patch
+
+from pipeline.sessions import HTTPSession, get_session
+
+
+def test_request_applies_default_timeout(mock_logger):
+    session = HTTPSession(timeout=(1, 2), logger=mock_logger)
+
+    with patch.object(session.session, "request") as mock_request:
+        mock_request.return_value = MagicMock(status_code=200)
+        session.get("https://example.org", params={"format": "json"})
+
+    mock_request.assert_called_once_with(
+        "GET", "https://example.org", params={"format": "json"}, timeout=(1, 2))
+    assert session.request_count == 1
+
+
+def test_request_keeps_explicit_timeout(mock_logger):
+    session = HTTPSession(timeout=(1, 2), logger=mock_logger)
+
+    with patch.object(session.session, "request") as mock_request:
+        mock_request.return_value = MagicMock(status_code=200)
+        session.post("https://example.org", timeout=20)
+
+    mock_request.assert_called_once_with("POST", "https://example.org", timeout=20)
+
+
+def test_retry_configuration(mock_logger):
+    session = HTTPSession(retries=5, backoff_factor=2, logger=mock_logger)
+    retry = session.adapter.max_retries
+
+    assert retry.total == 5
+    assert retry.backoff_factor == 2
+    assert 429 in retry.status_forcelist
+    assert 503 in retry.status_forcelist
+
+
+def test_connection_stats_counts_reuse(mock_logger):
+    session = HTTPSession(logger=mock_logger)
+    pool = MagicMock(num_connections=1, num_requests=4)
+
+    with patch.object(session.adapter.poolmanager, "pools", {"elexon": pool}):
+        assert session.connection_stats() == {"opened": 1, "reused": 3}
+
+
+def test_get_session_is_shared():
+    assert get_session() is get_session()
@@ -0,0 +1,107 @@
+"""
+Test script for storage.py
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from pipeline.common import DataProcessor
+from pipeline.storage import (LocalStorage, MemoryStorage, S3Storage,
+                              clear_memory_stores, get_storage)
+
+
+@pytest.fixture(params=["local", "memory"])
+def storage(request, tmp_path):
+    if request.param == "local":
+        return LocalStorage(str(tmp_path / "bucket"))
+    return MemoryStorage()
+
+
+def test_put_get_list_delete(storage):
+    storage.put("dataset=demand/date=2024-01-01/hour=01/run.feather", b"one")
+    storage.put("dataset=demand/date=2024-01-01/hour=00/run.feather", pa.py_buffer(b"two"))
+    storage.put("watermarks/demand.json", b"{}")
+
+    items = list(storage.list("dataset=demand/"))
+
+    assert [item["Key"] for item in items] == [
+        "dataset=demand/date=2024-01-01/hour=00/run.feather",
+        "dataset=demand/date=2024-01-01/hour=01/run.feather"]
+    assert items[0]["Size"] == 3
+    assert bytes(storage.get(items[0]["Key"])) == b"two"
+
+    storage.delete(items[0]["Key"])
+
+    assert len(list(storage.list())) == 2
+
+
+def test_rewriting_an_object_changes_its_etag(storage):
+    storage.put("key", b"one")
+    before = next(storage.list())
+
+    storage.put("key", b"other")
+    after = next(storage.list())
+
+    assert before["ETag"] != after["ETag"]
+
+
+def test_download_and_put_file(storage, tmp_path):
+    path = str(tmp_path / "local.feather")
+    with open(path, "wb") as file_data:
+        file_data.write(b"data")
+
+    storage.put_file("key", path)
+
+    assert storage.download("key", str(tmp_path / "copy")) == str(tmp_path / "copy")
+    assert (tmp_path / "copy").read_bytes() == b"data"
+
+
+def test_s3_storage_uses_managed_transfers(mock_logger):
+    s3_client = MagicMock()
+    s3_client.get_paginator.return_value.paginate.return_value = [
+        {"Contents": [{"Key": "a"}]}, {"Contents": [{"Key": "b"}]}]
+    storage = S3Storage(s3_client, "mock_bucket", mock_logger)
+
+    storage.put("key", b"data")
+    storage.download("key", "local", 4)
+    storage.delete("key")
+
+    body, bucket, key = s3_client.upload_fileobj.call_args[0]
+    assert (bucket, key, body.read()) == ("mock_bucket", "key", b"data")
+    assert s3_client.download_file.call_args[0] == ("mock_bucket", "key", "local")
+    s3_client.delete_object.assert_called_once_with(Bucket="mock_bucket", Key="key")
+    assert [item["Key"] for item in storage.list()] == ["a", "b"]
+
+
+def test_get_storage_selects_the_backend():
+    clear_memory_stores()
+
+    with patch.dict("os.environ", {"STORAGE_BACKEND": "memory"}):
+        assert get_storage(bucket="a") is get_storage(bucket="a")
+        assert get_storage(bucket="a") is not get_storage(bucket="b")
+    assert isinstance(get_storage("local"), LocalStorage)
+    assert isinstance(get_storage("s3", s3_client=MagicMock()), S3Storage)
+    with pytest.raises(ValueError):
+        get_storage("ftp")
+
+
+def test_extract_to_transform_without_s3(mock_logger, tmp_path):
+    storage = MemoryStorage()
+    processor = DataProcessor(save_location="mock_path", aws_access_key=None,
+                              aws_secret_key=None, region=None, s3_file_name="",
+                              bucket="mock_bucket", logger=mock_logger,
+                              keep_local_copy=False, dataset="demand",
+                              time_column="startTime", storage=storage)
+    processor.save_data_locally(pd.DataFrame({"startTime": ["2024-01-01T00:00:00Z",
+                                                            "2024-01-01T01:00:00Z"],
+                                              "demand": [1, 2]}))
+
+    assert processor.save_data_to_s3() is True
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    names = processor.get_files_from_bucket(directory=str(tmp_path), datasets=["demand"],
+                                            start=start, end=start + timedelta(hours=2))
+    assert [pd.read_feather(name)["demand"].tolist() for name in names] == [[1], [2]]
@@ -0,0 +1,59 @@
+"""
+Test script for streaming.py
+"""
+import json
+
+import pandas as pd
+import pytest
+
+from pipeline.streaming import ColumnBuffers, decode_data_frame, iter_array_items
+
+RECORDS = [
+    {"startTime": "2024-01-01T00:00:00Z", "fuelType": "WIND", "generation": 1000},
+    {"startTime": "2024-01-01T00:05:00Z", "fuelType": "CCGT", "generation": 2000},
+    {"startTime": "2024-01-01T00:10:00Z", "fuelType": "NUCLEAR", "generation": -3},
+]
+
+
+def chunked(payload: bytes, size: int):
+    return [payload[i:i + size] for i in range(0, len(payload), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1024])
+def test_decode_data_frame_matches_records_path(size):
+    payload = json.dumps({"metadata": {"datasets": ["FUELINST"]},
+                          "data": RECORDS, "total": 3}).encode()
+
+    df = decode_data_frame(chunked(payload, size), {"generation": "q"})
+
+    pd.testing.assert_frame_equal(df, pd.DataFrame(RECORDS))
+
+
+def test_decode_data_frame_handles_multibyte_characters():
+    payload = json.dumps({"data": [{"name": "Ynys Môn – 風"}]},
+                         ensure_ascii=False).encode()
+
+    df = decode_data_frame(chunked(payload, 1))
+
+    assert df["name"].tolist() == ["Ynys Môn – 風"]
+
+
+def test_decode_data_frame_empty_or_missing_array():
+    assert decode_data_frame([b'{"data": []}']).empty
+    assert decode_data_frame([b'{"other": 1}']).empty
+
+
+def test_iter_array_items_rejects_malformed_payload():
+    with pytest.raises(ValueError):
+        list(iter_array_items([b'[1, 2]']))
+    with pytest.raises(ValueError):
+        list(iter_array_items([b'{"data": [1, 2']))
+
+
+def test_column_buffers_pad_missing_values_and_fall_back_to_lists():
+    records = [{"a": 1}, {"a": 2, "b": "x"}, {"a": 2.5}]
+    buffers = ColumnBuffers({"a": "q"})
+    for record in records:
+        buffers.append(record)
+
+    pd.testing.assert_frame_equal(buffers.to_frame(), pd.DataFrame(records))
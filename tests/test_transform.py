@@ -2,57 +2,75 @@
 Test script for extract_production.py
 """
 import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from unittest.mock import MagicMock, patch
+
+import numpy as np
 import pandas as pd
-from pipeline.transform import Transform
+import pyarrow as pa
+from constants import Constants as ct
+from pipeline.common import DataProcessor
+from pipeline.formats import read_table
+from pipeline.schemas import apply_schema
+from pipeline.storage import MemoryStorage
+from pipeline.transform import (LOAD_QUERIES, Load, Transform, dataset_for, sync_files,
+                                to_batches, to_values)
 
 transform = Transform()
 
 
+def rows(batches):
+    """
+    Flattens a transform's batches back into one list of tuples.
+    """
+    return list(chain.from_iterable(batches))
+
+
 class TestTransform:
     """
     This is the class that tests fucntions in the Transform class
     """
 
     def test_generation_transform_general(self, mock_gen_df):
-        trans_df = transform.generation_transform(mock_gen_df)
+        trans_df = rows(transform.generation_transform(mock_gen_df))
         assert isinstance(trans_df, list)
         for row in trans_df:
             assert len(row) == 6
-            assert row[1] in row[0]
+            assert row[1] == row[0].date()
             assert isinstance(row[2], str) == True
             assert row[3] in ['-', '+']
-            assert isinstance(row[4], int) == True
+            assert isinstance(row[4], float) == True
 
     def test_generation_transform_gain_loss(self, mock_gen_df):
-        trans_df = transform.generation_transform(mock_gen_df)
+        trans_df = rows(transform.generation_transform(mock_gen_df))
         assert trans_df[0][3] == '+'
         assert trans_df[1][3] == '-'
         assert trans_df[2][3] == '-'
 
     def test_generation_transform_valid_dates(self, mock_gen_df):
-        trans_df = transform.generation_transform(mock_gen_df)
+        trans_df = rows(transform.generation_transform(mock_gen_df))
         for row in trans_df:
-            time = datetime.datetime.strptime(row[0], "%Y-%m-%dT%H:%M:%SZ")
-            assert isinstance(time, datetime.datetime) == True
-            date = datetime.datetime.strptime(row[1], "%Y-%m-%d")
-            assert isinstance(date, datetime.datetime) == True
+            assert isinstance(row[0], datetime.datetime) == True
+            # UTC wall-clock times, as the TIMESTAMP columns hold them
+            assert row[0].tzinfo is None
+            assert isinstance(row[1], datetime.date) == True
 
     def test_demand_transform_general(self, mock_demand_df):
-        trans_df = transform.demand_transform(mock_demand_df)
+        trans_df = rows(transform.demand_transform(mock_demand_df))
         assert isinstance(trans_df, list)
         for row in trans_df:
             assert len(row) == 2
-            time = datetime.datetime.strptime(row[0], "%Y-%m-%dT%H:%M:%SZ")
-            assert isinstance(time, datetime.datetime) == True
+            assert isinstance(row[0], datetime.datetime) == True
             assert isinstance(row[1], int) == True
 
     def test_carbon_transform_general(self, mock_carbon_df):
-        trans_df = transform.carbon_transform(mock_carbon_df)
+        trans_df = rows(transform.carbon_transform(mock_carbon_df))
         assert isinstance(trans_df, list)
         for row in trans_df:
             assert len(row) == 3
-            time = datetime.datetime.strptime(row[0], "%Y-%m-%dT%H:%MZ")
-            assert isinstance(time, datetime.datetime) == True
+            assert isinstance(row[0], datetime.datetime) == True
             assert isinstance(row[1], int)
             assert row[2] in ["very low", "low",
                               "moderate", "high", "very high"]
@@ -61,7 +79,7 @@ class TestTransform:
         assert mock_carbon_df['carbon level'][2] == 'low'
         assert mock_carbon_df['carbon level'][2] == 'low'
         assert mock_carbon_df['carbon level'][2] == 'low'
-        trans_df = transform.carbon_transform(mock_carbon_df)
+        trans_df = rows(transform.carbon_transform(mock_carbon_df))
 
         assert trans_df[0][2] == 'very low'
         assert trans_df[1][2] == 'low'
@@ -77,7 +95,255 @@ class TestTransform:
         data = transform.difference_of_dates(data)
         assert isinstance(data, dict)
         times = []
-        for values in data['demand']:
+        for values in rows(data['demand']) + rows(data['demand_gaps']):
             times.append(values[0])
-        assert '2024-08-18T23:00:00Z' in times
+        assert datetime.datetime(2024, 8, 18, 23) in times
         assert len(times) == 4
+
+
+def test_get_data_from_partition_frames(mock_carbon_df):
+    frames = {"carbon": mock_carbon_df, "piechart": pd.DataFrame()}
+
+    data = Transform().get_data(frames)
+
+    assert list(data) == ["carbon"]
+    assert len(rows(data["carbon"])) == len(mock_carbon_df)
+
+def test_get_data_groups_and_deduplicates_files_by_dataset(tmp_path):
+    first = pd.DataFrame({"from": ["2024-01-01T00:00Z", "2024-01-01T00:30Z"], "forecast": [1, 2]})
+    second = pd.DataFrame({"from": ["2024-01-01T00:30Z", "2024-01-01T01:00Z"], "forecast": [2, 3]})
+    files = []
+    for hour, df in enumerate([first, second]):
+        path = str(tmp_path / f"dataset=carbon_date=2024-01-01_hour=0{hour}_run.feather")
+        df.to_feather(path)
+        files.append(path)
+
+    data = Transform().get_data(files=files)
+
+    assert list(data) == ["carbon"]
+    # Read in the carbon schema's types, each time once
+    assert sorted(row[0] for row in rows(data["carbon"])) == [
+        datetime.datetime(2024, 1, 1, hour, minute)
+        for hour, minute in ((0, 0), (0, 30), (1, 0))]
+
+@patch("pipeline.transform.execute_values")
+def test_load_values_only_loads_datasets_present(mock_execute_values):
+    conn = MagicMock()
+
+    Load().load_values(conn, {"carbon": [("2024-08-18T23:00Z", 20, "low")]})
+
+    assert mock_execute_values.call_count == 1
+    assert "INSERT INTO Carbon" in mock_execute_values.call_args[0][1]
+
+def test_carbon_levels_match_pandas_cut():
+    forecasts = [0, 1, 34, 35, 109, 110, 189, 270, 271, 1000, 1001]
+    df = pd.DataFrame({"from": ["2024-08-18T23:00Z"] * len(forecasts), "forecast": forecasts})
+
+    levels = [row[2] for row in rows(Transform().carbon_transform(df))]
+
+    expected = pd.cut(df["forecast"], bins=[0, 34, 109, 189, 270, 1000],
+                      labels=["very low", "low", "moderate", "high", "very high"])
+    assert levels == [None if pd.isna(level) else level for level in expected]
+
+def test_get_data_reads_downloaded_files_memory_mapped(tmp_path, monkeypatch, mock_gen_df):
+    monkeypatch.chdir(tmp_path)
+    mock_gen_df.to_feather("generation.feather 2024-08-19")
+
+    with patch("pipeline.transform.read_table", wraps=read_table) as mock_read_table:
+        data = Transform().get_data()
+
+    assert mock_read_table.call_args[1] == {"memory_map": True}
+    assert len(rows(data["generation"])) == len(mock_gen_df)
+    assert not (tmp_path / "generation.feather 2024-08-19").exists()
+
+def test_generation_transform_matches_row_by_row_version():
+    rng = np.random.default_rng(0)
+    times = [f"2024-08-{day:02}T{hour:02}:{minute:02}:00Z"
+             for day in (18, 19) for hour in range(24) for minute in (0, 5, 30)]
+    df = pd.DataFrame({
+        "publishTime": rng.choice(times, 500),
+        "fuelType": rng.choice(["WIND", "CCGT", "NUCLEAR", "INTFR"], 500),
+        "settlementPeriod": rng.integers(1, 49, 500),
+        "generation": rng.integers(-200, 200, 500),
+    })
+    df.loc[::50, "generation"] = 0
+
+    expected = df.copy()
+    expected['publish_date'] = expected['publishTime'].apply(lambda x: x.split('T')[0])
+    expected['gain_loss'] = expected['generation'].apply(lambda x: '+' if x > 0 else '-')
+    expected = expected.get(['publishTime', 'publish_date', 'fuelType', 'gain_loss',
+                             'generation', 'settlementPeriod'])
+    # Loaded as typed values rather than the strings they were parsed from
+    times = pd.to_datetime(expected['publishTime'], utc=True).dt.tz_localize(None)
+    expected = expected.assign(publishTime=times,
+                               publish_date=times.dt.date,
+                               generation=expected['generation'].astype(float))
+
+    transform = Transform()
+    assert rows(transform.generation_transform(df)) == list(expected.itertuples(index=False, name=None))
+    assert transform.time_g.to_pylist() == list(times.unique())
+
+T1, T2, T3 = (f"2024-08-18T0{hour}:00:00Z" for hour in (1, 2, 3))
+
+def test_difference_of_dates_adds_each_missing_time_once():
+    transform = Transform()
+    generation = transform.generation_transform(pd.DataFrame({
+        "publishTime": [T3, T1, T3, T2, T1],
+        "fuelType": ["WIND", "WIND", "CCGT", "WIND", "CCGT"],
+        "settlementPeriod": [1, 1, 1, 1, 1],
+        "generation": [1, 2, 3, 4, 5]}))
+    demand = transform.demand_transform(pd.DataFrame({"startTime": [T2], "demand": [7]}))
+
+    data = transform.difference_of_dates({"generation": generation, "demand": demand})
+
+    assert rows(data["demand"]) == [(datetime.datetime(2024, 8, 18, 2), 7)]
+    assert rows(data["demand_gaps"]) == [(datetime.datetime(2024, 8, 18, hour), 0)
+                                         for hour in (3, 1)]
+
+
+def test_demand_gaps_never_overwrite_loaded_demand():
+    transform = Transform()
+    # Demand for T1 was loaded by an earlier run, so isn't in this run's files
+    data = transform.get_data({"generation": pd.DataFrame({
+        "publishTime": [T1], "fuelType": ["WIND"], "settlementPeriod": [1],
+        "generation": [1]})})
+
+    assert rows(data["demand_gaps"]) == [(datetime.datetime(2024, 8, 18, 1), 0)]
+    assert "DO NOTHING" in LOAD_QUERIES["demand_gaps"]
+    # Inserted before the generation rows that reference them
+    assert list(LOAD_QUERIES).index("demand_gaps") < list(LOAD_QUERIES).index("generation")
+
+def test_transforms_yield_batches_of_the_configured_size(mock_gen_df):
+    batches = list(Transform(batch_size=2).generation_transform(mock_gen_df))
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert rows(batches) == rows(Transform().generation_transform(mock_gen_df))
+
+@patch("pipeline.transform.execute_values")
+def test_load_values_inserts_a_batch_at_a_time(mock_execute_values):
+    batches = iter([[("t1", 1), ("t2", 2)], [("t3", 3)]])
+
+    Load().load_values(MagicMock(), {"demand": batches})
+
+    assert [call[0][2] for call in mock_execute_values.call_args_list] == [
+        [("t1", 1), ("t2", 2)], [("t3", 3)]]
+    assert [call[1]["page_size"] for call in mock_execute_values.call_args_list] == [2, 1]
+
+def test_dataset_for_maps_files_to_their_datasets():
+    assert dataset_for("tmp/data/sync/dataset=demand_date=2024-01-01_hour=00_run.feather") == "demand"
+    assert dataset_for("raw_generation_data.feather 2024-08-19") == "generation"
+    assert dataset_for("raw_cost_data.feather") is None
+    assert dataset_for("generation_vs_demand.feather") is None
+
+def test_get_data_merges_files_of_the_same_dataset(tmp_path, monkeypatch, mock_gen_df):
+    monkeypatch.chdir(tmp_path)
+    later = mock_gen_df.assign(publishTime="2024-08-19T00:00:00Z")
+    mock_gen_df.to_feather("raw_generation_data.feather 2024-08-18")
+    later.to_feather("raw_generation_data.feather 2024-08-19")
+
+    data = Transform().get_data()
+
+    assert len(rows(data["generation"])) == len(mock_gen_df) + len(later)
+
+def test_get_data_transforms_datasets_in_parallel(tmp_path, mock_gen_df, mock_demand_df):
+    files = []
+    for dataset, df in (("generation", mock_gen_df), ("demand", mock_demand_df)):
+        path = str(tmp_path / f"dataset={dataset}_date=2024-08-18_hour=23_run.feather")
+        df.to_feather(path)
+        files.append(path)
+    transform = Transform(max_workers=2)
+
+    with patch("pipeline.transform.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool:
+        data = transform.get_data(files=files)
+
+    assert pool.call_args[1] == {"max_workers": 2}
+    assert set(transform.timings) == {"generation", "demand"}
+    assert rows(data["generation"]) == rows(Transform().generation_transform(mock_gen_df))
+    # Both transforms were noted, so demand still gets generation's missing times
+    assert len(rows(data["demand"]) + rows(data["demand_gaps"])) == 4
+    assert all(map(os.path.exists, files))
+
+
+def test_get_data_stays_in_process_on_one_core(tmp_path, mock_gen_df, mock_demand_df):
+    files = []
+    for dataset, df in (("generation", mock_gen_df), ("demand", mock_demand_df)):
+        path = str(tmp_path / f"dataset={dataset}_date=2024-08-18_hour=23_run.feather")
+        df.to_feather(path)
+        files.append(path)
+
+    with patch("pipeline.transform.os.sched_getaffinity", return_value={0}, create=True), \
+            patch("pipeline.transform.ProcessPoolExecutor") as pool:
+        transform = Transform()
+        data = transform.get_data(files=files)
+
+    assert transform.max_workers == 1
+    pool.assert_not_called()
+    assert len(rows(data["demand"]) + rows(data["demand_gaps"])) == 4
+
+def test_get_data_merges_files_from_before_and_after_typing(tmp_path, mock_gen_df):
+    old = str(tmp_path / "dataset=generation_date=2024-08-18_hour=23_old.feather")
+    new = str(tmp_path / "dataset=generation_date=2024-08-18_hour=23_new.feather")
+    mock_gen_df.to_feather(old)
+    apply_schema(mock_gen_df, "generation").to_feather(new)
+
+    data = Transform().get_data(files=[old, new])
+
+    # The same rows, once strings and once typed, are only loaded once
+    assert rows(data["generation"]) == rows(Transform().generation_transform(mock_gen_df))
+
+
+def test_sync_files_reads_the_whole_carbon_forecast(tmp_path, monkeypatch, mock_logger):
+    monkeypatch.setattr(ct, "SYNC_DIR", str(tmp_path))
+    storage = MemoryStorage()
+    processor = DataProcessor(save_location="mock_path", aws_access_key=None,
+                              aws_secret_key=None, region=None, s3_file_name="",
+                              bucket="mock_bucket", logger=mock_logger,
+                              keep_local_copy=False, dataset="carbon",
+                              time_column="from", storage=storage)
+    # A day's forecast, as /intensity/date gives it, extracted at noon
+    times = pd.date_range("2024-08-18T00:00Z", periods=48, freq="30min")
+    processor.save_data_locally(apply_schema(pd.DataFrame({
+        "from": times, "to": times + pd.Timedelta(minutes=30),
+        "forecast": range(48)}), "carbon"))
+    assert processor.save_data_to_s3() is True
+    now = datetime.datetime(2024, 8, 18, 12, tzinfo=datetime.timezone.utc)
+
+    data = Transform().get_data(files=sync_files(processor, now), now=now)
+
+    loaded = [row[0] for row in rows(data["carbon"])]
+    # The afternoon's forecast is read too, not just the hour after noon
+    assert len(loaded) == 48
+    assert max(loaded) == datetime.datetime(2024, 8, 18, 23, 30)
+
+
+def test_get_data_reads_only_the_transform_window(tmp_path):
+    path = str(tmp_path / "dataset=demand_date=2024-08-18_hour=00_run.feather")
+    apply_schema(pd.DataFrame({
+        "startTime": ["2024-08-17T23:00Z", "2024-08-18T00:00Z", "2024-08-18T14:00Z"],
+        "demand": [1, 2, 3]}), "demand").to_feather(path)
+    now = datetime.datetime(2024, 8, 18, 12, tzinfo=datetime.timezone.utc)
+
+    with patch("pipeline.transform.read_table", wraps=read_table) as mock_read_table:
+        data = Transform().get_data(files=[path], now=now)
+
+    assert mock_read_table.call_args[1]["time_column"] == "startTime"
+    # Before the lookback and after the hour following now
+    assert rows(data["demand"]) == [(datetime.datetime(2024, 8, 18), 2)]
+
+
+def test_to_batches_decodes_dictionaries_a_batch_at_a_time():
+    fuel = pa.chunked_array([pa.array(["WIND", None, "WIND"]).dictionary_encode(),
+                             pa.array(["CCGT", "WIND"]).dictionary_encode()])
+    amount = pa.chunked_array([[1, 2, 3], [4, 5]])
+
+    # Only each chunk's distinct values (and a None) are Python objects
+    assert [len(decoded) for _, decoded in to_values(fuel)] == [2, 3]
+    assert list(to_batches([fuel, amount], 2)) == [
+        [("WIND", 1), (None, 2)], [("WIND", 3), ("CCGT", 4)], [("WIND", 5)]]
+
+def test_max_workers_is_raised_only_by_its_variable(monkeypatch):
+    with patch("pipeline.transform.os.sched_getaffinity", return_value={0, 1, 2, 3}, create=True):
+        assert Transform().max_workers == ct.TRANSFORM_MAX_WORKERS == 1
+        monkeypatch.setenv("TRANSFORM_MAX_WORKERS", "8")
+        # Still no more than the cores there are
+        assert Transform().max_workers == 4
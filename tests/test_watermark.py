@@ -0,0 +1,73 @@
+"""
+Test script for watermark.py
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+
+from pipeline.storage import MemoryStorage, S3Storage
+from pipeline.watermark import Watermark
+
+
+def test_load_without_watermark(tmp_path, mock_logger):
+    watermark = Watermark("sweets", mock_logger, directory=str(tmp_path))
+
+    assert watermark.load() is None
+
+
+def test_save_and_load_locally(tmp_path, mock_logger):
+    watermark = Watermark("sweets", mock_logger, directory=str(tmp_path))
+    last_seen = datetime(1066, 10, 14, 9, 0, tzinfo=timezone.utc)
+
+    watermark.save(last_seen)
+
+    assert watermark.load() == last_seen
+
+
+def test_naive_watermark_is_treated_as_utc(tmp_path, mock_logger):
+    watermark = Watermark("sweets", mock_logger, directory=str(tmp_path))
+
+    watermark.save(datetime(1066, 10, 14, 9, 0))
+
+    assert watermark.load() == datetime(1066, 10, 14, 9, 0, tzinfo=timezone.utc)
+
+
+def test_save_and_load_in_storage(mock_logger):
+    storage = MemoryStorage()
+    watermark = Watermark("sweets", mock_logger, storage=storage)
+
+    watermark.save(datetime(1066, 10, 14, 9, 0, tzinfo=timezone.utc))
+
+    assert [item["Key"] for item in storage.list()] == ["watermarks/sweets.json"]
+    # As a later run, which only shares the storage, would load it
+    assert Watermark("sweets", mock_logger, storage=storage).load() == \
+        datetime(1066, 10, 14, 9, 0, tzinfo=timezone.utc)
+
+
+def test_missing_s3_watermark(mock_logger):
+    s3_client = MagicMock()
+    s3_client.get_object.side_effect = ClientError(
+        {"Error": {"Code": "NoSuchKey"}}, "GetObject")
+    watermark = Watermark("sweets", mock_logger,
+                          storage=S3Storage(s3_client, "mock_bucket", mock_logger))
+
+    assert watermark.load() is None
+
+
+def test_window_start(tmp_path, mock_logger):
+    watermark = Watermark("sweets", mock_logger, overlap=timedelta(minutes=30),
+                          directory=str(tmp_path))
+    full_window_start = datetime(2000, 1, 1, 0, 0, tzinfo=timezone.utc)
+
+    # No watermark falls back to the full window
+    assert watermark.window_start(full_window_start) == full_window_start
+
+    # A recent watermark starts the window just before it
+    watermark.save(datetime(2000, 1, 1, 11, 0, tzinfo=timezone.utc))
+    assert watermark.window_start(full_window_start) == \
+        datetime(2000, 1, 1, 10, 30, tzinfo=timezone.utc)
+
+    # An old watermark never widens the window past the full window
+    watermark.save(datetime(1999, 12, 25, 0, 0, tzinfo=timezone.utc))
+    assert watermark.window_start(full_window_start) == full_window_start
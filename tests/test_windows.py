@@ -0,0 +1,68 @@
+"""
+Test script for windows.py
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pipeline.windows import fetch_windows, split_range
+
+START = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def test_split_range_even_windows():
+    windows = split_range(START, START + timedelta(days=2), timedelta(days=1))
+
+    assert windows == [(START, START + timedelta(days=1)),
+                       (START + timedelta(days=1), START + timedelta(days=2))]
+
+
+def test_split_range_cuts_last_window_short():
+    windows = split_range(START, START + timedelta(hours=30), timedelta(days=1))
+
+    assert windows[-1] == (START + timedelta(days=1), START + timedelta(hours=30))
+
+
+def test_split_range_empty_and_invalid():
+    assert split_range(START, START, timedelta(days=1)) == []
+    with pytest.raises(ValueError):
+        split_range(START, START + timedelta(days=1), timedelta(0))
+
+
+def test_fetch_windows_caps_concurrency():
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def fetch_window(start, end):
+        with lock:
+            running.append(start)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(start)
+        return {"data": [start.isoformat()]}
+
+    windows = split_range(START, START + timedelta(days=10), timedelta(days=1))
+    results = list(fetch_windows(fetch_window, windows, max_workers=3))
+
+    assert len(results) == 10
+    assert max(peak) <= 3
+    assert sorted(start for start, _, _ in results) == [start for start, _ in windows]
+    for start, _, data in results:
+        assert data == {"data": [start.isoformat()]}
+
+
+def test_fetch_range_on_api_client(api_client_generation):
+    api_client_generation.session.get.return_value.json.return_value = {"data": []}
+
+    results = list(api_client_generation.fetch_range(
+        START, START + timedelta(days=3), timedelta(days=1), max_workers=2))
+
+    assert len(results) == 3
+    assert api_client_generation.session.get.call_count == 3
+    requested = sorted(call.kwargs["params"]["publishDateTimeFrom"]
+                       for call in api_client_generation.session.get.call_args_list)
+    assert requested[0] == START.isoformat()